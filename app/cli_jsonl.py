@@ -0,0 +1,171 @@
+# app/cli_jsonl.py
+"""
+Pontuação em fluxo (JSON por linha) sem PyQt5, matplotlib ou skfuzzy.
+
+Uso:
+    python cli_jsonl.py [entrada.jsonl | -] [-o saida.jsonl] [--modo analitico] [--inferencia sugeno] [--medir]
+    python cli_jsonl.py --compilar [--modo analitico] [--inferencia sugeno]
+
+Cada linha de entrada é um objeto {"id": ..., "disease": ..., "febre": ...,
+"tosse": ..., "saturacao": ...}; cada linha de saída repete o id e traz
+"risco" e "regras" ({"R1": grau, ...}) ou "erro". A leitura, a pontuação e a
+escrita são geradores encadeados: uma linha só é lida depois que a resposta
+anterior foi gravada, então um consumidor lento segura o produtor (pipe).
+
+O motor vem do mesmo snapshot de cli_lote.py e cli_servico.py
+(DiagnosticoFuzzy.de_snapshot), que só depende do NumPy. Quando as regras
+mudam, o snapshot é regravado num processo separado (--compilar, que
+importa o skfuzzy).
+"""
+import time
+
+_T0 = time.perf_counter()  # partida medida antes dos imports (--medir)
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy  # noqa: E402
+from fuzzy_engine.regras_compiladas import INFERENCIAS, MODOS  # noqa: E402
+
+
+def carregar(modo="amostrado", inferencia="mamdani"):
+    """
+    Motor carregado do snapshot compartilhado (DiagnosticoFuzzy.de_snapshot)
+    no modo e inferência dados. Se o snapshot estiver desatualizado, ele é
+    regravado num subprocesso (--compilar) para que este processo não
+    importe skfuzzy/matplotlib.
+    """
+    if not DiagnosticoFuzzy.snapshot_atual(modo=modo, inferencia=inferencia):
+        subprocess.run([sys.executable, str(Path(__file__).resolve()), "--compilar",
+                        "--modo", modo, "--inferencia", inferencia], check=True)
+    return DiagnosticoFuzzy.de_snapshot(modo=modo, inferencia=inferencia)
+
+
+# --- pipeline ---
+def _para_float(v):
+    if isinstance(v, bool):
+        raise ValueError
+    if isinstance(v, (int, float)):
+        return float(v)
+    return float(str(v).strip().replace(',', '.'))
+
+
+def ler_pedidos(linhas):
+    """Decodifica as linhas não vazias; JSON inválido vira um pedido com 'erro'."""
+    for linha in linhas:
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            pedido = json.loads(linha)
+            if not isinstance(pedido, dict):
+                raise ValueError
+        except ValueError:
+            pedido = {"erro": "JSON inválido"}
+        yield pedido
+
+
+def pontuar(pedidos, compilados):
+    """Gera uma resposta para cada pedido, na mesma ordem."""
+    for pedido in pedidos:
+        resposta = {"id": pedido.get("id")}
+        if "erro" in pedido:
+            resposta["erro"] = pedido["erro"]
+            yield resposta
+            continue
+        disease = pedido.get("disease", pedido.get("doenca"))
+        compilado = compilados.get(disease) if isinstance(disease, str) else None
+        if compilado is None:
+            resposta["erro"] = "doença desconhecida"
+            yield resposta
+            continue
+
+        # mesmas verificações de MainWindow._get_input_values
+        valores = []
+        for k, (vmin, vmax) in compilado.limites().items():
+            try:
+                x = _para_float(pedido[k])
+            except (KeyError, ValueError):
+                resposta["erro"] = f"{k} inválido"
+                break
+            if not (vmin <= x <= vmax):
+                resposta["erro"] = f"{k} deve estar entre {vmin} e {vmax}"
+                break
+            valores.append(x)
+        if "erro" in resposta:
+            yield resposta
+            continue
+
+        risco, ativ = compilado.avaliar_um(valores)
+        if risco != risco:  # NaN
+            resposta["erro"] = "nenhuma regra acionada"
+        else:
+            resposta["risco"] = round(risco, 4)
+            resposta["regras"] = {f"R{i + 1}": round(g, 4) for i, g in enumerate(ativ) if g > 0.0}
+        yield resposta
+
+
+def escrever(respostas, saida):
+    """Grava uma resposta por linha, com flush a cada linha. Retorna o total."""
+    n = 0
+    for resposta in respostas:
+        saida.write(json.dumps(resposta, ensure_ascii=False) + "\n")
+        saida.flush()
+        n += 1
+    return n
+
+
+def _memoria_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return kb / (1024 * 1024) if sys.platform == "darwin" else kb / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontuação fuzzy em fluxo JSON por linha (sem interface gráfica).")
+    parser.add_argument("entrada", nargs="?", default="-", help="arquivo .jsonl ou - para stdin (padrão)")
+    parser.add_argument("-o", "--saida", default="-", help="arquivo de saída ou - para stdout (padrão)")
+    parser.add_argument("--compilar", action="store_true", help="apenas (re)grava o snapshot do motor e sai")
+    parser.add_argument("--modo", choices=MODOS, default="amostrado",
+                        help="pertinências e centroide amostrados nos universos (padrão) ou analíticos")
+    parser.add_argument("--inferencia", choices=INFERENCIAS, default="mamdani",
+                        help="centroide Mamdani (padrão) ou média ponderada Sugeno de ordem zero")
+    parser.add_argument("--medir", action="store_true", help="informa no stderr tempo de partida, memória e vazão")
+    args = parser.parse_args(argv)
+
+    if args.compilar:
+        DiagnosticoFuzzy.de_snapshot(modo=args.modo, inferencia=args.inferencia)
+        return 0
+
+    engine = carregar(args.modo, args.inferencia)
+    if args.medir:
+        pesados = [m for m in ("PyQt5", "matplotlib", "skfuzzy", "fpdf") if m in sys.modules]
+        sys.stderr.write(f"partida {(time.perf_counter() - _T0) * 1000:.1f} ms, memória {_memoria_mb():.1f} MB, "
+                         f"módulos pesados: {', '.join(pesados) or 'nenhum'}\n")
+
+    entrada = sys.stdin if args.entrada == "-" else open(args.entrada, encoding="utf-8")
+    saida = sys.stdout if args.saida == "-" else open(args.saida, "w", encoding="utf-8")
+    t1 = time.perf_counter()
+    try:
+        n = escrever(pontuar(ler_pedidos(entrada), engine.compilados), saida)
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+
+    if args.medir:
+        dt = time.perf_counter() - t1
+        sys.stderr.write(f"{n} linhas em {dt:.2f}s ({n / max(dt, 1e-9):,.0f} linhas/s), "
+                         f"memória máxima {_memoria_mb():.1f} MB\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+# app/cli_lote.py
+"""
+Pontuação em lote, sem interface gráfica, de arquivos CSV/Parquet de pacientes.
+
+Uso:
+    python cli_lote.py entrada.csv saida.csv [--workers N] [--bloco 20000] [--inferencia sugeno]
+
+A entrada precisa das colunas disease (ou doenca), febre, tosse e saturacao;
+as demais colunas são copiadas para a saída, que recebe ainda risco, regras
+(ex.: "R1=0.333|R2=0.044") e erro (motivo quando a linha é inválida).
+As linhas são lidas e gravadas em blocos, processados em paralelo por um
+pool de processos com um DiagnosticoFuzzy por worker, então a memória fica
+limitada a alguns blocos em voo, independentemente do tamanho do arquivo.
+O processo principal garante um snapshot atualizado do motor e os workers
+só o mapeiam (DiagnosticoFuzzy.de_snapshot): a partida de cada um não
+reconstrói o motor e os arrays das regras são compartilhados entre eles.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from fuzzy_engine.definicoes import DIR_DEFINICOES
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+from fuzzy_engine.regras_compiladas import INFERENCIAS
+from fuzzy_engine.snapshot import caminho_padrao
+
+COLUNAS_SAIDA = ["risco", "regras", "erro"]
+
+_engine = None
+
+
+def _init_worker(snapshot, inferencia):
+    global _engine
+    _engine = DiagnosticoFuzzy.de_snapshot(snapshot, inferencia=inferencia)
+
+
+def _para_float(valores):
+    """Converte textos (aceita vírgula decimal) para float; inválidos viram NaN."""
+    out = np.full(len(valores), np.nan)
+    for i, v in enumerate(valores):
+        if isinstance(v, (int, float)):
+            out[i] = v
+            continue
+        try:
+            out[i] = float(str(v).strip().replace(',', '.'))
+        except ValueError:
+            pass
+    return out
+
+
+def pontuar_bloco(colunas):
+    """
+    Pontua um bloco {coluna: lista de valores}. Retorna as colunas de saída
+    (risco, regras, erro) como listas de strings, na ordem das linhas.
+    Executado nos workers; usa o DiagnosticoFuzzy do processo.
+    """
+    engine = _engine
+    doencas = colunas.get("disease", colunas.get("doenca"))
+    n = len(doencas)
+    valores = {k: _para_float(colunas[k]) for k in ("febre", "tosse", "saturacao")}
+
+    risco = [""] * n
+    regras = [""] * n
+    erro = [""] * n
+    validas = np.ones(n, dtype=bool)
+
+    # mesmas verificações de MainWindow._get_input_values
+    for k, (vmin, vmax) in engine.limites().items():
+        x = valores[k]
+        for i in np.flatnonzero(np.isnan(x) & validas):
+            erro[i] = f"{k} inválido"
+        fora = ~np.isnan(x) & ((x < vmin) | (x > vmax)) & validas
+        for i in np.flatnonzero(fora):
+            erro[i] = f"{k} deve estar entre {vmin} e {vmax}"
+        validas &= ~np.isnan(x) & ~fora
+
+    doencas = np.asarray(doencas, dtype=object)
+    for disease in set(doencas[validas]):
+        sel = np.flatnonzero(validas & (doencas == disease))
+        if disease not in engine.compilados:
+            for i in sel:
+                erro[i] = "doença desconhecida"
+            continue
+        r, ativ = engine.calcular_risco_lote(
+            disease, valores["febre"][sel], valores["tosse"][sel], valores["saturacao"][sel])
+        for j, i in enumerate(sel):
+            if np.isnan(r[j]):
+                erro[i] = "nenhuma regra acionada"
+                continue
+            risco[i] = f"{r[j]:.4f}"
+            regras[i] = "|".join(f"R{idx + 1}={g:.3f}" for idx, g in enumerate(ativ[j]) if g > 0.0)
+    return {"risco": risco, "regras": regras, "erro": erro}
+
+
+# --- leitura/escrita em blocos ---
+def ler_blocos(path, tamanho):
+    """Gera blocos {coluna: lista} a partir de um CSV ou Parquet."""
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Leitura de Parquet requer o pacote pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=tamanho):
+            yield batch.to_pydict()
+        return
+
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        cabecalho = next(reader)
+        n = len(cabecalho)
+        bloco = []
+        for linha in reader:
+            if not linha:  # linha em branco, como no csv.DictReader
+                continue
+            # linha curta (campo final vazio, registro truncado) é completada
+            # com '' e falha só ela na validação; campos a mais são ignorados
+            if len(linha) != n:
+                linha = (linha + [""] * n)[:n]
+            bloco.append(linha)
+            if len(bloco) >= tamanho:
+                yield dict(zip(cabecalho, map(list, zip(*bloco))))
+                bloco = []
+        if bloco:
+            yield dict(zip(cabecalho, map(list, zip(*bloco))))
+
+
+class EscritorSaida:
+    """Grava blocos de saída em CSV ou Parquet conforme a extensão."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.parquet = self.path.suffix.lower() == ".parquet"
+        self._csv = None
+        self._pq = None
+        self._f = None
+
+    def escrever(self, colunas):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            tabela = pa.table({k: [None if v == "" else str(v) for v in vs] for k, vs in colunas.items()})
+            if self._pq is None:
+                self._pq = pq.ParquetWriter(self.path, tabela.schema)
+            self._pq.write_table(tabela)
+            return
+        if self._csv is None:
+            self._f = open(self.path, "w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._f)
+            self._csv.writerow(colunas.keys())
+        self._csv.writerows(zip(*colunas.values()))
+
+    def fechar(self):
+        if self._pq is not None:
+            self._pq.close()
+        if self._f is not None:
+            self._f.close()
+
+
+def processar(entrada, saida, workers=None, bloco=20000, progresso=sys.stderr, inferencia="mamdani"):
+    """Pontua `entrada` e grava em `saida`. Retorna (linhas, segundos)."""
+    workers = workers or os.cpu_count() or 1
+    max_pendentes = 2 * workers
+    escritor = EscritorSaida(saida)
+    linhas = 0
+    t0 = time.perf_counter()
+    # (re)gravado aqui, antes dos workers, para que eles só o carreguem
+    snapshot = caminho_padrao(DIR_DEFINICOES, "amostrado", inferencia)
+    DiagnosticoFuzzy.de_snapshot(snapshot, inferencia=inferencia)
+
+    def gravar(colunas, fut):
+        nonlocal linhas
+        res = fut.result()
+        colunas = {k: v for k, v in colunas.items() if k not in COLUNAS_SAIDA}
+        colunas.update(res)
+        escritor.escrever(colunas)
+        linhas += len(res["risco"])
+        if progresso is not None:
+            dt = time.perf_counter() - t0
+            progresso.write(f"\r{linhas} linhas — {linhas / dt:,.0f} linhas/s")
+            progresso.flush()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(str(snapshot), inferencia)) as pool:
+            pendentes = deque()
+            for colunas in ler_blocos(entrada, bloco):
+                if "disease" not in colunas and "doenca" not in colunas:
+                    raise SystemExit("Coluna 'disease' (ou 'doenca') ausente na entrada")
+                faltando = {"febre", "tosse", "saturacao"} - colunas.keys()
+                if faltando:
+                    raise SystemExit(f"Colunas ausentes na entrada: {', '.join(sorted(faltando))}")
+                pendentes.append((colunas, pool.submit(pontuar_bloco, colunas)))
+                # limita blocos em voo; a saída mantém a ordem da entrada
+                while len(pendentes) >= max_pendentes:
+                    gravar(*pendentes.popleft())
+            while pendentes:
+                gravar(*pendentes.popleft())
+    finally:
+        escritor.fechar()
+
+    dt = time.perf_counter() - t0
+    if progresso is not None:
+        progresso.write(f"\n{linhas} linhas em {dt:.2f}s ({linhas / max(dt, 1e-9):,.0f} linhas/s)\n")
+    return linhas, dt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pontuação fuzzy em lote de arquivos de pacientes.")
+    parser.add_argument("entrada", help="arquivo .csv ou .parquet")
+    parser.add_argument("saida", help="arquivo de saída .csv ou .parquet")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: nº de CPUs)")
+    parser.add_argument("--bloco", type=int, default=20000, help="linhas por bloco (padrão: 20000)")
+    parser.add_argument("--inferencia", choices=INFERENCIAS, default="mamdani",
+                        help="centroide Mamdani (padrão) ou média ponderada Sugeno de ordem zero")
+    args = parser.parse_args(argv)
+    processar(args.entrada, args.saida, args.workers, args.bloco, inferencia=args.inferencia)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
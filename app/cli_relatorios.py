@@ -0,0 +1,164 @@
+# app/cli_relatorios.py
+"""
+Exportação em lote de relatórios PDF, sem interface gráfica (Agg, sem Qt).
+
+Uso:
+    python cli_relatorios.py pacientes.csv --saida plantao.pdf   [--workers N]
+    python cli_relatorios.py pacientes.csv --pasta relatorios/   [--workers N]
+
+A entrada (CSV ou Parquet) tem as colunas disease (ou doenca), febre, tosse
+e saturacao, e opcionalmente nome (usado no nome do arquivo com --pasta).
+Com --saida todos os relatórios vão para um único PDF; com --pasta é gravado
+um PDF por paciente. Cada worker tem seu próprio DiagnosticoFuzzy e
+FuzzyPlotter, com as figuras desenhadas uma vez num canvas Agg na resolução
+de saída; para cada paciente só a linha de destaque é repintada (blit) e os
+pixels são lidos direto do canvas. O processo principal só monta os PDFs,
+na ordem da entrada.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from cli_lote import _para_float, ler_blocos
+from utils.pdf_exporter import DPI_PADRAO, PDFExporter, rasterizar_canvas
+
+_engine = None
+_plotter = None
+
+
+def _init_worker(dpi=DPI_PADRAO):
+    global _engine, _plotter
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+    from fuzzy_engine.fuzzy_plotter import FuzzyPlotter
+    _engine = DiagnosticoFuzzy()
+    _plotter = FuzzyPlotter(_engine)
+    # desenho completo único; depois o plotter só faz blit da linha
+    for fig in (_plotter.plot_febre(), _plotter.plot_tosse(), _plotter.plot_saturacao(), _plotter.plot_risco()):
+        fig.set_dpi(dpi)
+        FigureCanvasAgg(fig).draw()
+
+
+def renderizar_bloco(colunas, inicio):
+    """
+    Calcula o risco e rasteriza as quatro figuras de cada linha do bloco.
+    Retorna uma lista, na ordem das linhas, de (nome, patient_info, risco,
+    imagens) ou (nome, erro) para linhas inválidas.
+    """
+    doencas = colunas.get("disease", colunas.get("doenca"))
+    nomes = colunas.get("nome")
+    valores = {k: _para_float(colunas[k]) for k in ("febre", "tosse", "saturacao")}
+    limites = _engine.limites()
+
+    saida = []
+    for i, disease in enumerate(doencas):
+        nome = f"relatorio_{inicio + i + 1:05d}" + (f"_{nomes[i]}" if nomes else "")
+        feb, tos, sat = (float(valores[k][i]) for k in ("febre", "tosse", "saturacao"))
+        erro = None
+        # mesmas verificações de MainWindow._get_input_values
+        for k, x in zip(("febre", "tosse", "saturacao"), (feb, tos, sat)):
+            vmin, vmax = limites[k]
+            if not (vmin <= x <= vmax):  # falso também para NaN
+                erro = f"{k} inválido ou fora de {vmin}–{vmax}"
+                break
+        if erro is None and disease not in _engine.compilados:
+            erro = "doença desconhecida"
+        if erro is None:
+            riscos, _ = _engine.calcular_risco_lote(disease, [feb], [tos], [sat])
+            risco = float(riscos[0])
+            if risco != risco:
+                erro = "nenhuma regra acionada"
+        if erro is not None:
+            saida.append((nome, erro))
+            continue
+
+        figs = [
+            _plotter.plot_febre(highlight_value=feb),
+            _plotter.plot_tosse(highlight_value=tos),
+            _plotter.plot_saturacao(highlight_value=sat),
+            _plotter.plot_risco(highlight_value=risco),
+        ]
+        imagens = [rasterizar_canvas(f) for f in figs]
+        info = {"febre": feb, "tosse": tos, "saturacao": sat, "doenca": disease}
+        saida.append((nome, info, risco, imagens))
+    return saida
+
+
+def gerar(entrada, exportador, arquivo=None, workers=None, bloco=16, dpi=DPI_PADRAO, progresso=sys.stderr):
+    """Gera os relatórios de `entrada`. Retorna (relatórios, erros, segundos)."""
+    workers = workers or os.cpu_count() or 1
+    max_pendentes = 2 * workers
+    contagem = {"ok": 0, "erros": 0}
+    t0 = time.perf_counter()
+
+    def relatorios(pool):
+        pendentes = deque()
+        inicio = 0
+
+        def recolher():
+            for item in pendentes.popleft().result():
+                if len(item) == 2:
+                    contagem["erros"] += 1
+                    if progresso is not None:
+                        progresso.write(f"\n{item[0]}: {item[1]}")
+                    continue
+                contagem["ok"] += 1
+                yield item
+            if progresso is not None:
+                dt = time.perf_counter() - t0
+                progresso.write(f"\r{contagem['ok']} relatórios — {contagem['ok'] / dt:,.1f} relatórios/s")
+                progresso.flush()
+
+        for colunas in ler_blocos(entrada, bloco):
+            if "disease" not in colunas and "doenca" not in colunas:
+                raise SystemExit("Coluna 'disease' (ou 'doenca') ausente na entrada")
+            faltando = {"febre", "tosse", "saturacao"} - colunas.keys()
+            if faltando:
+                raise SystemExit(f"Colunas ausentes na entrada: {', '.join(sorted(faltando))}")
+            n = len(colunas["febre"])
+            pendentes.append(pool.submit(renderizar_bloco, colunas, inicio))
+            inicio += n
+            # limita blocos em voo; a saída mantém a ordem da entrada
+            while len(pendentes) >= max_pendentes:
+                yield from recolher()
+        while pendentes:
+            yield from recolher()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(dpi,)) as pool:
+        exportador.export_varios(relatorios(pool), arquivo)
+
+    dt = time.perf_counter() - t0
+    if progresso is not None:
+        progresso.write(f"\n{contagem['ok']} relatórios em {dt:.2f}s ({contagem['ok'] / max(dt, 1e-9):,.1f} relatórios/s)"
+                        f", {contagem['erros']} linhas inválidas\n")
+    return contagem["ok"], contagem["erros"], dt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportação em lote de relatórios PDF do diagnóstico fuzzy.")
+    parser.add_argument("entrada", help="arquivo .csv ou .parquet")
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument("--saida", help="um único PDF com todos os relatórios")
+    destino.add_argument("--pasta", help="diretório para um PDF por paciente")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: nº de CPUs)")
+    parser.add_argument("--dpi", type=int, default=DPI_PADRAO, help=f"resolução das figuras (padrão: {DPI_PADRAO})")
+    args = parser.parse_args(argv)
+
+    if args.saida:
+        saida = Path(args.saida)
+        exportador = PDFExporter(saida.parent, workers=1, dpi=args.dpi)
+        arquivo = saida.stem
+    else:
+        Path(args.pasta).mkdir(parents=True, exist_ok=True)
+        exportador = PDFExporter(Path(args.pasta), workers=1, dpi=args.dpi)
+        arquivo = None
+    gerar(args.entrada, exportador, arquivo, args.workers, dpi=args.dpi)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,429 @@
+# app/cli_servico.py
+"""
+Serviço local de pontuação (HTTP/1.1 sobre TCP ou socket Unix), sem PyQt5.
+
+Uso:
+    python cli_servico.py [--porta 8765 | --unix /tmp/fuzzy.sock] [--max-lote 256]
+                          [--max-espera-ms 2] [--fila 4096] [--timeout-ms 1000] [--paralelos 2]
+                          [--modo analitico] [--inferencia sugeno]
+
+Rotas:
+    POST /risco          {"id", "disease", "febre", "tosse", "saturacao"}
+                         -> {"id", "risco", "regras": {"R1": grau, ...}} ou {"id", "erro"}
+    GET  /estatisticas   latência (p50/p90/p99), vazão, tamanho dos lotes, rejeições
+    GET  /metrics        tempos por etapa no formato do Prometheus (utils.metricas)
+    GET  /saude
+
+Pedidos simultâneos são reunidos em micro-lotes (MicroLotes) e avaliados
+com calcular_risco_lote num pool de threads, então o laço de eventos nunca
+fica bloqueado pelo motor. Códigos de resposta: 400 pedido inválido,
+422 nenhuma regra acionada, 503 fila cheia (com Retry-After: o cliente
+deve reenviar mais tarde), 504 tempo do pedido esgotado, 500 erro
+inesperado ao atender (a conexão continua aberta).
+
+O motor vem de um snapshot (DiagnosticoFuzzy.de_snapshot), regravado só
+quando os arquivos de regras mudam: reiniciar o serviço não reconstrói o
+motor nem importa o skfuzzy.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import signal
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+from fuzzy_engine.regras_compiladas import INFERENCIAS, MODOS
+from utils.metricas import METRICAS, configurar_por_ambiente
+
+log = logging.getLogger(__name__)
+
+# tamanho máximo do corpo de um pedido (bytes)
+MAX_CORPO = 64 * 1024
+
+_MOTIVOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+            503: "Service Unavailable",
+            504: "Gateway Timeout"}
+
+
+class FilaCheia(Exception):
+    """A fila de pedidos atingiu o limite; o cliente deve tentar de novo mais tarde."""
+
+
+class EstatisticasServico:
+    """Contadores, latências e tamanhos de lote recentes (janelas limitadas)."""
+
+    def __init__(self, janela=10_000):
+        self.inicio = time.monotonic()
+        self.contagens = {"recebidos": 0, "respondidos": 0, "invalidos": 0, "sem_regras": 0,
+                          "rejeitados_fila": 0, "expirados": 0, "erros": 0}
+        self.latencias = deque(maxlen=janela)  # segundos, do recebimento à resposta
+        self.fins = deque(maxlen=janela)       # instantes das respostas (vazão recente)
+        self.lotes = deque(maxlen=janela)      # tamanhos dos lotes avaliados
+        self.n_lotes = 0
+
+    def contar(self, chave):
+        self.contagens[chave] += 1
+
+    def registrar_resposta(self, segundos):
+        self.latencias.append(segundos)
+        self.fins.append(time.monotonic())
+        if METRICAS.ativo:
+            METRICAS.observar("servico.pedido", segundos)
+
+    def registrar_lote(self, tamanho, segundos):
+        self.lotes.append(tamanho)
+        self.n_lotes += 1
+        if METRICAS.ativo:
+            METRICAS.observar("servico.lote", segundos)
+
+    def resumo(self, fila=0):
+        agora = time.monotonic()
+        lat = np.array(self.latencias) * 1e3
+        quantis = ({f"p{q}_ms": round(float(np.percentile(lat, q)), 3) for q in (50, 90, 99)}
+                   if lat.size else {})
+        recentes = sum(1 for t in self.fins if agora - t <= 10.0)
+        return {
+            **self.contagens,
+            "fila": fila,
+            "lotes": self.n_lotes,
+            "lote_medio": round(float(np.mean(self.lotes)), 2) if self.lotes else None,
+            "lote_max": max(self.lotes) if self.lotes else None,
+            **quantis,
+            "vazao_10s": round(recentes / min(10.0, max(agora - self.inicio, 1e-9)), 1),
+            "ativo_s": round(agora - self.inicio, 1),
+        }
+
+
+class _Pedido:
+    __slots__ = ("disease", "valores", "futuro")
+
+    def __init__(self, disease, valores, futuro):
+        self.disease = disease
+        self.valores = valores
+        self.futuro = futuro
+
+
+class MicroLotes:
+    """
+    Junta pedidos concorrentes em lotes e os avalia num pool de threads.
+
+    O coletor pega o primeiro pedido da fila e, em seguida, todos os que já
+    estiverem esperando. Se sobra uma thread livre, o lote sai na hora
+    (sob carga baixa ninguém espera por companhia); se todas estão
+    ocupadas, continua juntando pedidos até `max_lote` ou `max_espera`
+    segundos, já que o lote teria de esperar de qualquer forma. Assim o
+    tamanho dos lotes acompanha a carga. A fila tem `tamanho_fila` lugares:
+    cheia, o pedido é recusado na hora (FilaCheia) em vez de acumular
+    latência. Pedidos cujo tempo esgotou antes da avaliação são descartados.
+    """
+
+    def __init__(self, engine, max_lote=256, max_espera=0.002, tamanho_fila=4096, paralelos=2,
+                 estatisticas=None):
+        self.engine = engine
+        self.max_lote = max_lote
+        self.max_espera = max_espera
+        self.paralelos = paralelos
+        self.estatisticas = estatisticas or EstatisticasServico()
+        self._fila = asyncio.Queue(tamanho_fila)
+        self._livres = asyncio.Semaphore(paralelos)
+        self._executor = ThreadPoolExecutor(paralelos, thread_name_prefix="micro-lote")
+        self._tarefas = set()
+        self._coletor = None
+
+    def iniciar(self):
+        self._coletor = asyncio.get_running_loop().create_task(self._coletar())
+        return self
+
+    async def encerrar(self):
+        if self._coletor is not None:
+            self._coletor.cancel()
+        if self._tarefas:
+            await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._executor.shutdown(wait=False)
+
+    def tamanho_fila(self):
+        return self._fila.qsize()
+
+    async def avaliar(self, disease, valores, timeout):
+        """(risco, ativações) de um pedido; FilaCheia ou asyncio.TimeoutError."""
+        futuro = asyncio.get_running_loop().create_future()
+        try:
+            self._fila.put_nowait(_Pedido(disease, valores, futuro))
+        except asyncio.QueueFull:
+            raise FilaCheia from None
+        # wait_for cancela o futuro no tempo esgotado; o coletor o ignora
+        return await asyncio.wait_for(futuro, timeout)
+
+    async def _coletar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._fila.get()]
+            limite = loop.time() + self.max_espera
+            while len(lote) < self.max_lote:
+                try:
+                    lote.append(self._fila.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                restante = limite - loop.time()
+                if restante <= 0 or not self._livres.locked():
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+            await self._livres.acquire()
+            tarefa = loop.create_task(self._executar(lote))
+            self._tarefas.add(tarefa)
+            tarefa.add_done_callback(self._tarefas.discard)
+
+    async def _executar(self, lote):
+        try:
+            lote = [p for p in lote if not p.futuro.done()]
+            if not lote:
+                return
+            t0 = time.perf_counter()
+            try:
+                resultados = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._avaliar_lote, lote)
+            except Exception as e:
+                for p in lote:
+                    if not p.futuro.done():
+                        p.futuro.set_exception(e)
+                return
+            self.estatisticas.registrar_lote(len(lote), time.perf_counter() - t0)
+            for p, r in zip(lote, resultados):
+                if not p.futuro.done():
+                    p.futuro.set_result(r)
+        finally:
+            self._livres.release()
+
+    def _avaliar_lote(self, lote):
+        """Executado no pool: um calcular_risco_lote por doença presente no lote."""
+        resultados = [None] * len(lote)
+        por_doenca = {}
+        for i, p in enumerate(lote):
+            por_doenca.setdefault(p.disease, []).append(i)
+        for disease, idx in por_doenca.items():
+            colunas = np.array([lote[i].valores for i in idx], dtype=np.float64).T
+            riscos, ativ = self.engine.calcular_risco_lote(disease, *colunas)
+            for k, i in enumerate(idx):
+                resultados[i] = (float(riscos[k]), ativ[k])
+        return resultados
+
+
+# --- HTTP ---
+def validar(pedido, engine):
+    """(disease, valores) de um pedido JSON ou ValueError com o motivo."""
+    if not isinstance(pedido, dict):
+        raise ValueError("JSON inválido")
+    disease = pedido.get("disease", pedido.get("doenca"))
+    if not isinstance(disease, str) or disease not in engine.compilados:
+        raise ValueError("doença desconhecida")
+    valores = []
+    # mesmas verificações de MainWindow._get_input_values
+    for k, (vmin, vmax) in engine.limites().items():
+        v = pedido.get(k)
+        try:
+            if isinstance(v, bool):
+                raise ValueError
+            x = float(str(v).strip().replace(',', '.')) if isinstance(v, str) else float(v)
+        except (TypeError, ValueError):
+            raise ValueError(f"{k} inválido") from None
+        if not (vmin <= x <= vmax):
+            raise ValueError(f"{k} deve estar entre {vmin} e {vmax}")
+        valores.append(x)
+    return disease, tuple(valores)
+
+
+async def _ler_requisicao(reader):
+    """(método, caminho, cabeçalhos, corpo) ou None se a conexão terminou."""
+    linha = await reader.readline()
+    if not linha:
+        return None
+    metodo, caminho, _ = linha.decode("latin-1").split(" ", 2)
+    cabecalhos = {}
+    while True:
+        linha = await reader.readline()
+        if linha in (b"\r\n", b"\n", b""):
+            break
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    tamanho = int(cabecalhos.get("content-length", 0))
+    if tamanho > MAX_CORPO:
+        raise ValueError("corpo grande demais")
+    corpo = await reader.readexactly(tamanho) if tamanho else b""
+    return metodo, caminho.split("?")[0], cabecalhos, corpo
+
+
+def _resposta_http(status, corpo, manter, tipo="application/json", extras=()):
+    if not isinstance(corpo, bytes):
+        corpo = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+    linhas = [f"HTTP/1.1 {status} {_MOTIVOS.get(status, '')}",
+              f"Content-Type: {tipo}; charset=utf-8",
+              f"Content-Length: {len(corpo)}",
+              f"Connection: {'keep-alive' if manter else 'close'}",
+              *extras]
+    return ("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1") + corpo
+
+
+class ServicoFuzzy:
+    """Servidor asyncio: roteia as requisições e encaminha POST /risco ao MicroLotes."""
+
+    def __init__(self, engine, timeout=1.0, **opcoes_lote):
+        self.engine = engine
+        self.timeout = timeout
+        self.estatisticas = EstatisticasServico()
+        self.lotes = MicroLotes(engine, estatisticas=self.estatisticas, **opcoes_lote)
+
+    async def pontuar(self, pedido):
+        """Resposta (status, dict) para um pedido já decodificado."""
+        est = self.estatisticas
+        est.contar("recebidos")
+        resposta = {"id": pedido.get("id")} if isinstance(pedido, dict) else {"id": None}
+        try:
+            disease, valores = validar(pedido, self.engine)
+        except ValueError as e:
+            est.contar("invalidos")
+            return 400, {**resposta, "erro": str(e)}
+        try:
+            risco, ativ = await self.lotes.avaliar(disease, valores, self.timeout)
+        except FilaCheia:
+            est.contar("rejeitados_fila")
+            return 503, {**resposta, "erro": "fila cheia"}
+        except asyncio.TimeoutError:
+            est.contar("expirados")
+            return 504, {**resposta, "erro": "tempo esgotado"}
+        if math.isnan(risco):
+            est.contar("sem_regras")
+            return 422, {**resposta, "erro": "nenhuma regra acionada"}
+        est.contar("respondidos")
+        return 200, {**resposta, "risco": round(risco, 4),
+                     "regras": {f"R{i + 1}": round(float(g), 4) for i, g in enumerate(ativ) if g > 0.0}}
+
+    async def _rotear(self, metodo, caminho, corpo):
+        if caminho == "/risco":
+            if metodo != "POST":
+                return 405, {"erro": "use POST"}
+            try:
+                pedido = json.loads(corpo.decode("utf-8"))
+            except ValueError:
+                pedido = None
+            return await self.pontuar(pedido)
+        if metodo != "GET":
+            return 405, {"erro": "use GET"}
+        if caminho == "/estatisticas":
+            return 200, self.estatisticas.resumo(self.lotes.tamanho_fila())
+        if caminho == "/metrics":
+            return 200, METRICAS.prometheus().encode("utf-8")
+        if caminho == "/saude":
+            return 200, {"ok": True, "doencas": list(self.engine.compilados)}
+        return 404, {"erro": "rota desconhecida"}
+
+    async def atender(self, reader, writer):
+        try:
+            while True:
+                try:
+                    requisicao = await _ler_requisicao(reader)
+                except ValueError as e:
+                    writer.write(_resposta_http(413 if "grande" in str(e) else 400, {"erro": str(e)}, False))
+                    break
+                if requisicao is None:
+                    break
+                t0 = time.perf_counter()
+                metodo, caminho, cabecalhos, corpo = requisicao
+                try:
+                    status, resposta = await self._rotear(metodo, caminho, corpo)
+                except Exception:
+                    # um pedido com defeito não derruba a conexão nem o laço
+                    log.exception("Erro ao atender %s %s", metodo, caminho)
+                    self.estatisticas.contar("erros")
+                    status, resposta = 500, {"erro": "erro interno"}
+                manter = cabecalhos.get("connection", "").lower() != "close"
+                tipo = "text/plain" if caminho == "/metrics" else "application/json"
+                extras = ("Retry-After: 1",) if status == 503 else ()
+                writer.write(_resposta_http(status, resposta, manter, tipo, extras))
+                await writer.drain()
+                if caminho == "/risco":
+                    self.estatisticas.registrar_resposta(time.perf_counter() - t0)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def servir(self, host="127.0.0.1", porta=8765, unix=None, pronto=None):
+        """Atende até ser cancelado. `pronto(endereço)` é chamado quando o socket estiver aberto."""
+        self.lotes.iniciar()
+        if unix:
+            if os.path.exists(unix):
+                os.unlink(unix)
+            servidor = await asyncio.start_unix_server(self.atender, path=unix)
+            endereco = f"unix:{unix}"
+        else:
+            servidor = await asyncio.start_server(self.atender, host, porta)
+            h, p = servidor.sockets[0].getsockname()[:2]
+            endereco = f"http://{h}:{p}"
+        if pronto:
+            pronto(endereco)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            await self.lotes.encerrar()
+            if unix and os.path.exists(unix):
+                os.unlink(unix)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de pontuação fuzzy com micro-lotes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765, help="porta TCP (0 = qualquer livre; padrão 8765)")
+    parser.add_argument("--unix", help="caminho de um socket Unix (em vez de TCP)")
+    parser.add_argument("--max-lote", type=int, default=256, help="pedidos por lote (padrão 256)")
+    parser.add_argument("--max-espera-ms", type=float, default=2.0,
+                        help="espera máxima por mais pedidos quando o pool está ocupado (padrão 2 ms)")
+    parser.add_argument("--fila", type=int, default=4096, help="pedidos aguardando antes de responder 503 (padrão 4096)")
+    parser.add_argument("--timeout-ms", type=float, default=1000.0, help="tempo máximo por pedido (padrão 1000 ms)")
+    parser.add_argument("--paralelos", type=int, default=2, help="lotes avaliados ao mesmo tempo (padrão 2)")
+    parser.add_argument("--modo", choices=MODOS, default="amostrado", help="modo do motor compilado")
+    parser.add_argument("--inferencia", choices=INFERENCIAS, default="mamdani",
+                        help="centroide Mamdani (padrão) ou média ponderada Sugeno de ordem zero")
+    args = parser.parse_args(argv)
+
+    # FUZZY_METRICAS_*: tempos por etapa (ver utils/metricas.py); /metrics usa o mesmo registro
+    configurar_por_ambiente()
+    engine = DiagnosticoFuzzy.de_snapshot(modo=args.modo, inferencia=args.inferencia)
+    servico = ServicoFuzzy(engine, timeout=args.timeout_ms / 1e3,
+                           max_lote=args.max_lote, max_espera=args.max_espera_ms / 1e3,
+                           tamanho_fila=args.fila, paralelos=args.paralelos)
+
+    async def rodar():
+        tarefa = asyncio.current_task()
+        try:
+            for sinal in (signal.SIGINT, signal.SIGTERM):
+                asyncio.get_running_loop().add_signal_handler(sinal, tarefa.cancel)
+        except (NotImplementedError, AttributeError):  # Windows
+            pass
+        try:
+            await servico.servir(args.host, args.porta, args.unix,
+                                 pronto=lambda e: print(f"ouvindo em {e}", flush=True))
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(rodar())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
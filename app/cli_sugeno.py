@@ -0,0 +1,139 @@
+# app/cli_sugeno.py
+"""
+Constantes da inferência Sugeno de ordem zero e seu desvio em relação ao Mamdani.
+
+Uso:
+    python cli_sugeno.py [--doenca Viral] [--amostras 20000] [--modo analitico]
+                         [--limiar 1.0] [--gravar centroides|ajustadas]
+
+Para cada doença deriva as constantes dos termos da saída (baixo, medio,
+alto) de duas formas: os centroides dos termos (o padrão do motor quando o
+arquivo não define constantes) e o ajuste por mínimos quadrados ao risco
+Mamdani em entradas sorteadas nos universos (sugeno.ajustar_constantes).
+O desvio de cada uma (erro médio, p95, máximo e fração acima de --limiar
+pontos de risco) é medido contra o Mamdani em outro sorteio, com o tempo
+de avaliar_um e a vazão do lote nas duas inferências. --gravar escreve as
+constantes escolhidas no bloco "sugeno" dos arquivos JSON das doenças, que
+DiagnosticoFuzzy(inferencia="sugeno") passa a usar.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from fuzzy_engine.definicoes import DIR_DEFINICOES
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+from fuzzy_engine.regras_compiladas import MODOS
+from fuzzy_engine.sugeno import ajustar_constantes, amostrar_entradas, comparar
+
+# entradas usadas para medir avaliar_um
+PONTOS_LATENCIA = 2000
+
+
+def _latencia_um(compilado, entradas):
+    """Tempo médio (µs) de avaliar_um nas primeiras PONTOS_LATENCIA entradas."""
+    pontos = np.column_stack(entradas)[:PONTOS_LATENCIA].tolist()
+    t0 = time.perf_counter()
+    for valores in pontos:
+        compilado.avaliar_um(valores)
+    return (time.perf_counter() - t0) / len(pontos) * 1e6
+
+
+def _vazao_lote(compilado, entradas):
+    """Entradas por segundo de avaliar (melhor de 3)."""
+    tempos = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        compilado.avaliar(entradas)
+        tempos.append(time.perf_counter() - t0)
+    return len(entradas[0]) / min(tempos)
+
+
+def avaliar_doenca(compilado, amostras, limiar=1.0):
+    """
+    Constantes (centroides e ajustadas), desvio de cada uma em relação ao
+    Mamdani e tempos das duas inferências para a forma compilada (Mamdani)
+    de uma doença.
+    """
+    ajuste = amostrar_entradas(compilado, amostras, semente=0)
+    teste = amostrar_entradas(compilado, amostras, semente=1)
+    constantes = {"centroides": compilado.centroides_saida(), "ajustadas": ajustar_constantes(compilado, ajuste)}
+    sugeno = compilado.com_sugeno(constantes["ajustadas"])
+    return {
+        "constantes": constantes,
+        "desvio": {k: comparar(compilado, z, teste, limiar) for k, z in constantes.items()},
+        "latencia_us": {"mamdani": _latencia_um(compilado, teste), "sugeno": _latencia_um(sugeno, teste)},
+        "lote_por_s": {"mamdani": _vazao_lote(compilado, teste), "sugeno": _vazao_lote(sugeno, teste)},
+    }
+
+
+def _formatar_regras(spec):
+    """JSON no formato dos arquivos de app/regras: uma chave por linha e um item de lista por linha."""
+    linhas = []
+    for k, v in spec.items():
+        if isinstance(v, list):
+            itens = ",\n".join(f"    {json.dumps(x, ensure_ascii=False)}" for x in v)
+            valor = f"[\n{itens}\n  ]"
+        else:
+            valor = json.dumps(v, ensure_ascii=False)
+        linhas.append(f"  {json.dumps(k, ensure_ascii=False)}: {valor}")
+    return "{\n" + ",\n".join(linhas) + "\n}\n"
+
+
+def gravar_constantes(path, constantes):
+    """Grava (ou troca) o bloco "sugeno" de um arquivo de doença JSON."""
+    spec = json.loads(path.read_text(encoding="utf-8"))
+    spec["sugeno"] = {t: round(v, 2) for t, v in constantes.items()}
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(_formatar_regras(spec), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Constantes Sugeno das doenças e desvio em relação ao Mamdani.")
+    parser.add_argument("--doenca", action="append", help="doença a avaliar (repetível; padrão: todas)")
+    parser.add_argument("--regras", default=str(DIR_DEFINICOES), help="diretório das regras (padrão: app/regras)")
+    parser.add_argument("--amostras", type=int, default=20_000, help="entradas sorteadas para ajuste e teste")
+    parser.add_argument("--modo", choices=MODOS, default="amostrado", help="modo do motor compilado")
+    parser.add_argument("--limiar", type=float, default=1.0, help="desvio (pontos de risco) considerado relevante")
+    parser.add_argument("--gravar", choices=("centroides", "ajustadas"),
+                        help="grava essas constantes no bloco \"sugeno\" dos arquivos de regras")
+    args = parser.parse_args(argv)
+
+    engine = DiagnosticoFuzzy(dir_regras=args.regras, modo=args.modo)
+    doencas = args.doenca or engine.doencas()
+    desconhecidas = [d for d in doencas if d not in engine.rulesets]
+    if desconhecidas:
+        raise SystemExit(f"Doença desconhecida: {', '.join(desconhecidas)}")
+
+    for disease in doencas:
+        res = avaliar_doenca(engine.compilados[disease], args.amostras, args.limiar)
+        termos = list(res["constantes"]["centroides"])
+        n, sem = res["desvio"]["centroides"]["n"], res["desvio"]["centroides"]["sem_regras"]
+        print(f"{disease} ({n} de {n + sem} entradas acionam regras)")
+        print(f"  {'constantes':<12}" + "".join(f"{t:>8}" for t in termos) +
+              f"{'EAM':>8}{'p95':>8}{'máx':>8}{f'>{args.limiar:g}':>8}")
+        for nome, z in res["constantes"].items():
+            d = res["desvio"][nome]
+            print(f"  {nome:<12}" + "".join(f"{z[t]:8.2f}" for t in termos) +
+                  f"{d['mae']:8.2f}{d['p95']:8.2f}{d['max']:8.2f}{d['acima_limiar']:8.1%}")
+        lat, lote = res["latencia_us"], res["lote_por_s"]
+        print(f"  avaliar_um: Mamdani {lat['mamdani']:.1f} µs, Sugeno {lat['sugeno']:.1f} µs "
+              f"({lat['mamdani'] / lat['sugeno']:.1f}x)   lote: Mamdani {lote['mamdani']:,.0f}/s, "
+              f"Sugeno {lote['sugeno']:,.0f}/s ({lote['sugeno'] / lote['mamdani']:.1f}x)")
+
+        if args.gravar:
+            origem = engine.registro.origem(disease)
+            if origem is None or origem.suffix != ".json":
+                print(f"  {disease}: só arquivos JSON são gravados; acrescente o bloco \"sugeno\" à mão")
+            else:
+                gravar_constantes(origem, res["constantes"][args.gravar])
+                print(f"  constantes {args.gravar} gravadas em {origem.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# fuzzy_engine/cache_inferencia.py
+import threading
+from collections import OrderedDict
+
+# passos de quantização padrão (febre °C, tosse, saturação %)
+PASSOS_MEMO = (0.1, 1.0, 1.0)
+
+
+class CacheInferencia:
+    """
+    Memoização LRU de resultados de calcular_risco.
+
+    As entradas são quantizadas com `passos` (um por variável; None desliga a
+    quantização daquela variável) e o resultado é calculado sobre os valores
+    quantizados, de modo que um acerto devolve exatamente o que seria
+    calculado. A chave inclui a assinatura das regras/pertinências, então
+    alterar a definição de uma doença invalida as entradas antigas
+    (elas deixam de ser acessadas e saem pelo LRU).
+    """
+
+    def __init__(self, max_itens=4096, passos=PASSOS_MEMO):
+        self.max_itens = max_itens
+        self.passos = tuple(passos) if passos is not None else (None, None, None)
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.remocoes = 0
+
+    def quantizar(self, valores):
+        """Retorna (índices usados na chave, valores quantizados)."""
+        idx, vals = [], []
+        for x, passo in zip(valores, self.passos):
+            x = float(x)
+            if passo:
+                i = round(x / passo)
+                idx.append(i)
+                vals.append(i * passo)
+            else:
+                idx.append(x)
+                vals.append(x)
+        return tuple(idx), tuple(vals)
+
+    def obter(self, chave):
+        with self._lock:
+            try:
+                valor = self._dados[chave]
+            except KeyError:
+                self.faltas += 1
+                return None
+            self._dados.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._dados[chave] = valor
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.max_itens:
+                self._dados.popitem(last=False)
+                self.remocoes += 1
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "itens": len(self._dados),
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "remocoes": self.remocoes,
+            }
@@ -0,0 +1,302 @@
+# fuzzy_engine/definicoes.py
+import hashlib
+import json
+import threading
+from functools import reduce
+from pathlib import Path
+
+import numpy as np
+
+from fuzzy_engine.regras_compiladas import RegrasCompiladas
+
+# o skfuzzy (que importa o matplotlib) só é importado ao criar variáveis,
+# regras ou ControlSystems: um motor carregado de um snapshot não precisa dele
+
+# diretório com variaveis.json e um arquivo por doença
+DIR_DEFINICOES = Path(__file__).resolve().parents[1] / "regras"
+ARQUIVO_VARIAVEIS = "variaveis"
+EXTENSOES = (".json", ".yaml", ".yml")
+
+# o motor recebe sempre estas entradas, nesta ordem, e calcula esta saída
+ENTRADAS = ("febre", "tosse", "saturacao")
+SAIDA = "risco"
+
+# nome no arquivo -> função (módulo skfuzzy, universo, parâmetros)
+PERTINENCIAS = {
+    "trimf": lambda fuzz, u, p: fuzz.trimf(u, p),
+    "trapmf": lambda fuzz, u, p: fuzz.trapmf(u, p),
+    "gaussmf": lambda fuzz, u, p: fuzz.gaussmf(u, *p),
+    "gauss2mf": lambda fuzz, u, p: fuzz.gauss2mf(u, *p),
+    "gbellmf": lambda fuzz, u, p: fuzz.gbellmf(u, *p),
+    "sigmf": lambda fuzz, u, p: fuzz.sigmf(u, *p),
+    "zmf": lambda fuzz, u, p: fuzz.zmf(u, *p),
+    "smf": lambda fuzz, u, p: fuzz.smf(u, *p),
+}
+
+
+def criar_variaveis(spec):
+    """
+    Cria as variáveis do skfuzzy a partir de variaveis.json:
+      {"entradas": {"febre": {"universo": [início, fim, passo],
+                              "termos": {"alta": ["trimf", 38.5, 40, 41], ...}}, ...},
+       "saida": {"risco": {...}}}
+    O universo é np.arange(início, fim, passo). Retorna (entradas, saída),
+    com as entradas na ordem de ENTRADAS.
+    """
+    import skfuzzy as fuzz
+    from skfuzzy import control as ctrl
+
+    entradas = spec.get("entradas", {})
+    saidas = spec.get("saida", {})
+    if set(entradas) != set(ENTRADAS) or list(saidas) != [SAIDA]:
+        raise ValueError(f"As variáveis devem ser {', '.join(ENTRADAS)} (entradas) e {SAIDA} (saída)")
+
+    def variavel(classe, nome, definicao):
+        var = classe(np.arange(*definicao["universo"]), nome)
+        for termo, (tipo, *params) in definicao["termos"].items():
+            if tipo not in PERTINENCIAS:
+                raise ValueError(f"{nome}.{termo}: função de pertinência desconhecida '{tipo}'")
+            var[termo] = PERTINENCIAS[tipo](fuzz, var.universe, params)
+            # parâmetros guardados no termo para a avaliação analítica (RegrasCompiladas)
+            var[termo].parametros = (tipo, tuple(float(p) for p in params))
+        return var
+
+    return ([variavel(ctrl.Antecedent, n, entradas[n]) for n in ENTRADAS],
+            variavel(ctrl.Consequent, SAIDA, saidas[SAIDA]))
+
+
+def variaveis_de_compilado(compilado):
+    """
+    Variáveis do skfuzzy iguais às de uma forma compilada (universos,
+    pertinências amostradas e parâmetros), p.ex. para um motor carregado de
+    um snapshot. Retorna (entradas, saída), como criar_variaveis.
+    """
+    from skfuzzy import control as ctrl
+
+    def variavel(classe, nome, universo, termos, mfs, params):
+        var = classe(np.array(universo), nome)
+        for termo, mf, p in zip(termos, mfs, params):
+            var[termo] = np.array(mf)
+            if p is not None:
+                var[termo].parametros = (p[0], tuple(p[1:]))
+        return var
+
+    termos = {}
+    for nome, termo in compilado.termos:
+        termos.setdefault(nome, []).append(termo)
+    entradas = [variavel(ctrl.Antecedent, n, u, termos[n], mfs, ps)
+                for n, u, mfs, ps in zip(compilado.nomes_variaveis, compilado.universos,
+                                         compilado.mfs_entrada, compilado.params_entrada)]
+    return entradas, variavel(ctrl.Consequent, compilado.nome_saida, compilado.universo_saida,
+                              compilado.termos_saida, compilado.mfs_saida, compilado.params_saida)
+
+
+def criar_regras(spec, entradas, saida):
+    """
+    Cria as regras do skfuzzy a partir do arquivo de uma doença:
+      {"se": {"febre": "alta", "tosse": ["moderada", "forte"]}, "entao": "alto"}
+    As variáveis são combinadas por E (ou por OU com "operador": "ou"); uma
+    lista de termos da mesma variável é combinada por OU e "~termo" é a
+    negação. "peso" (padrão 1) pondera o consequente.
+    """
+    from skfuzzy import control as ctrl
+
+    por_nome = {v.label: v for v in entradas}
+    rules = []
+    for n, regra in enumerate(spec["regras"], start=1):
+        try:
+            partes = []
+            for nome, termos in regra["se"].items():
+                var = por_nome[nome]
+                termos = [termos] if isinstance(termos, str) else termos
+                folhas = [~var[t[1:]] if t.startswith("~") else var[t] for t in termos]
+                partes.append(reduce(lambda a, b: a | b, folhas))
+            operador = regra.get("operador", "e")
+            if operador not in ("e", "ou"):
+                raise ValueError(f"operador '{operador}'")
+            antecedente = reduce((lambda a, b: a | b) if operador == "ou" else (lambda a, b: a & b), partes)
+            consequente = saida[regra["entao"]]
+            if "peso" in regra:
+                consequente = consequente % float(regra["peso"])
+            rules.append(ctrl.Rule(antecedente, consequente))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"regra {n}: inválida ({e!r})") from None
+    if not rules:
+        raise ValueError("nenhuma regra definida")
+    return rules
+
+
+def constantes_sugeno(spec, saida):
+    """
+    Bloco opcional "sugeno" do arquivo de uma doença, {termo da saída:
+    constante}, usado pela inferência Sugeno (None se ausente).
+    """
+    constantes = spec.get("sugeno")
+    if constantes is None:
+        return None
+    if not isinstance(constantes, dict) or set(constantes) != set(saida.terms):
+        raise ValueError(f"sugeno: informe uma constante para cada termo de '{saida.label}' "
+                         f"({', '.join(saida.terms)})")
+    return {t: float(constantes[t]) for t in saida.terms}
+
+
+class ConjuntoRegras:
+    """
+    Regras de uma doença: objetos do skfuzzy, forma compilada e assinatura.
+    Não muda depois de criado; recarregar as regras cria outro objeto e o
+    motor troca a referência, então quem já pegou um conjunto o usa inteiro
+    até o fim. O ControlSystem (só usado pelo avaliador skfuzzy) é criado no
+    primeiro acesso. Um conjunto lido de um snapshot (de_compilado) tem só a
+    forma compilada: sem as regras do skfuzzy nem ControlSystem.
+    Com inferencia="sugeno" a forma compilada usa as `constantes` dadas
+    ({termo: valor}) ou, sem elas, os centroides dos termos da saída.
+    """
+
+    def __init__(self, nome, rules, entradas, saida, origem=None, ordem=0, modo="amostrado",
+                 inferencia="mamdani", constantes=None):
+        self.nome = nome
+        self.rules = rules
+        self.origem = origem
+        self.ordem = ordem
+        compilado = RegrasCompiladas(entradas, saida, rules, modo=modo)
+        if inferencia == "sugeno":
+            compilado = compilado.com_sugeno(constantes or compilado.centroides_saida())
+        self.compilado = compilado
+        self.assinatura = self.compilado.assinatura
+        self._ctrl = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def de_compilado(cls, nome, compilado, origem=None, ordem=0):
+        """Conjunto a partir de uma forma compilada pronta (rules fica None)."""
+        obj = cls.__new__(cls)
+        obj.nome = nome
+        obj.rules = None
+        obj.origem = origem
+        obj.ordem = ordem
+        obj.compilado = compilado
+        obj.assinatura = compilado.assinatura
+        obj._ctrl = None
+        obj._lock = threading.Lock()
+        return obj
+
+    @property
+    def ctrl(self):
+        if self._ctrl is None:
+            if self.rules is None:
+                raise RuntimeError(f"'{self.nome}' veio de um snapshot e não tem o ControlSystem do skfuzzy")
+            with self._lock:
+                if self._ctrl is None:
+                    from fuzzy_engine.pool_simulacoes import ControlSystemOrdenado
+
+                    ctrl_ = ControlSystemOrdenado(self.rules)
+                    # o skfuzzy recusa entradas que as regras não usam
+                    self.entradas_usadas = tuple(n for n in ENTRADAS
+                                                 if any(a.label == n for a in ctrl_.antecedents))
+                    self._ctrl = ctrl_
+        return self._ctrl
+
+
+class RepositorioRegras:
+    """
+    Diretório de definições: variaveis.(json|yaml) e um arquivo por doença.
+
+    mudancas() compara o diretório com a última leitura de cada arquivo (ler)
+    e diz o que precisa ser recompilado. Olha primeiro mtime e tamanho e só
+    relê o conteúdo (sha256) dos arquivos que parecem alterados, então pode
+    ser chamada com frequência. Uma leitura com erro também é registrada: o
+    arquivo só é tentado de novo quando mudar outra vez.
+    """
+
+    def __init__(self, diretorio=DIR_DEFINICOES):
+        self.diretorio = Path(diretorio)
+        # caminho -> ((mtime_ns, tamanho), sha256) da última leitura
+        self._vistos = {}
+
+    def arquivos(self):
+        """Caminhos de todos os arquivos de definição, em ordem de nome."""
+        if not self.diretorio.is_dir():
+            raise FileNotFoundError(f"Diretório de regras não encontrado: {self.diretorio}")
+        return sorted(p for p in self.diretorio.iterdir() if p.suffix in EXTENSOES and p.is_file())
+
+    def arquivo_variaveis(self, arquivos=None):
+        for p in arquivos if arquivos is not None else self.arquivos():
+            if p.stem == ARQUIVO_VARIAVEIS:
+                return p
+        raise FileNotFoundError(f"{ARQUIVO_VARIAVEIS}.json não encontrado em {self.diretorio}")
+
+    def doencas(self, arquivos=None):
+        return [p for p in (arquivos if arquivos is not None else self.arquivos()) if p.stem != ARQUIVO_VARIAVEIS]
+
+    @staticmethod
+    def _marca(path):
+        st = path.stat()
+        return st.st_mtime_ns, st.st_size
+
+    def mudancas(self):
+        """
+        Retorna (variáveis mudaram, arquivos de doença novos ou alterados,
+        arquivos removidos) desde a última leitura.
+        """
+        atuais = self.arquivos()
+        alterados = []
+        for p in atuais:
+            marca = self._marca(p)
+            visto = self._vistos.get(p)
+            if visto is not None and visto[0] == marca:
+                continue
+            h = hashlib.sha256(p.read_bytes()).hexdigest()
+            if visto is not None and visto[1] == h:
+                self._vistos[p] = (marca, h)  # só o mtime mudou
+                continue
+            alterados.append(p)
+        removidos = [p for p in self._vistos if p not in atuais]
+        variaveis = self.arquivo_variaveis(atuais)
+        return (variaveis in alterados or variaveis in removidos,
+                [p for p in alterados if p != variaveis], removidos)
+
+    def esquecer(self, path):
+        self._vistos.pop(path, None)
+
+    def estado(self):
+        """Cópia do registro de leituras (para restaurar se uma recarga falhar)."""
+        return dict(self._vistos)
+
+    def restaurar(self, estado):
+        self._vistos = dict(estado)
+
+    def ler(self, path):
+        """Lê um arquivo JSON ou YAML (este requer o PyYAML) e registra a versão lida."""
+        path = Path(path)
+        marca = self._marca(path)
+        dados = path.read_bytes()
+        self._vistos[path] = (marca, hashlib.sha256(dados).hexdigest())
+        if path.suffix == ".json":
+            return json.loads(dados.decode("utf-8"))
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError(f"{path.name}: arquivos YAML requerem o pacote PyYAML (pip install pyyaml)") from None
+        return yaml.safe_load(dados.decode("utf-8"))
+
+    def ler_variaveis(self, path=None):
+        """Retorna (entradas, saída) do arquivo de variáveis."""
+        path = path or self.arquivo_variaveis()
+        try:
+            return criar_variaveis(self.ler(path))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{path.name}: {e}") from None
+
+    def ler_especificacao(self, path, entradas, saida):
+        """
+        Lê o arquivo de uma doença e valida as regras (criar_regras) sem
+        compilá-las. Retorna (nome, ordem, caminho, definição), o item de
+        um RegistroRegras.
+        """
+        try:
+            spec = self.ler(path)
+            criar_regras(spec, entradas, saida)
+            constantes_sugeno(spec, saida)
+            return spec["doenca"], spec.get("ordem", 0), path, spec
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{path.name}: {e}") from None
@@ -1,142 +1,676 @@
 # fuzzy_engine/diagnostico_fuzzy.py
+import hashlib
+import logging
+import threading
+import time
+from collections.abc import Mapping
+
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
+
+from fuzzy_engine.cache_inferencia import PASSOS_MEMO, CacheInferencia
+from fuzzy_engine.definicoes import DIR_DEFINICOES, ConjuntoRegras, RepositorioRegras, variaveis_de_compilado
+from fuzzy_engine.regras_compiladas import INFERENCIAS, MODOS, RegrasCombinadas
+from fuzzy_engine.registro_regras import RegistroRegras
+from fuzzy_engine.snapshot import caminho_padrao, carregar_snapshot, salvar_snapshot
+from fuzzy_engine.tabela_risco import CACHE_DIR, PASSOS_PADRAO, TabelaRisco
+from fuzzy_engine.varredura import Varredura
+from utils.metricas import METRICAS
+
+# Diferença máxima (em pontos percentuais de risco) aceita entre
+# calcular_risco_lote e calcular_risco. Na prática a diferença fica na ordem
+# de 1e-12: ambos integram o mesmo agregado linear por partes.
+TOLERANCIA_LOTE = 1e-6
+
+SEM_REGRAS = "Nenhuma regra acionada para estas entradas"
+
+# avaliadores de calcular_risco
+AVALIADORES = ("compilado", "skfuzzy")
+
+log = logging.getLogger(__name__)
+
+
+def _validar_inferencia(inferencia):
+    """Inferências usadas em `inferencia` ("mamdani", "sugeno" ou {doença: uma delas})."""
+    valores = set(inferencia.values()) if isinstance(inferencia, dict) else {inferencia}
+    for v in valores:
+        if v not in INFERENCIAS:
+            raise ValueError(f"Inferência desconhecida: {v} (use {', '.join(INFERENCIAS)})")
+    return valores
+
+
+def _ler_snapshot(path, repositorio, modo, inferencia):
+    """
+    (conjuntos, {arquivo de regras: sha256}) do snapshot em `path` se ele é
+    desse modo, inferência e diretório e nenhum arquivo de regras mudou
+    desde que foi gravado; senão None.
+    """
+    try:
+        info, conjuntos = carregar_snapshot(path)
+        if not (info["modo"] == modo and info.get("inferencia", "mamdani") == inferencia
+                and info["dir_regras"] == str(repositorio.diretorio.resolve())):
+            return None
+        hashes = {p: hashlib.sha256(p.read_bytes()).hexdigest() for p in repositorio.arquivos()}
+        if {p.name: h for p, h in hashes.items()} != info["arquivos"]:
+            return None
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        log.warning("Snapshot %s inválido (%s); reconstruindo o motor", path, e)
+        return None
+    return conjuntos, hashes
+
+
+class _PorDoenca(Mapping):
+    """
+    Visão {doença: valor(registro, doença)} sempre do registro de regras
+    atual (p.ex. {doença: ControlSystem}, usada pelo pool). Iterar e `in`
+    não compilam nada.
+    """
+
+    def __init__(self, diagnostico, valor):
+        self._d = diagnostico
+        self._valor = valor
+
+    def __getitem__(self, disease):
+        return self._valor(self._d._conjuntos, disease)
+
+    def __iter__(self):
+        return iter(self._d._conjuntos)
+
+    def __len__(self):
+        return len(self._d._conjuntos)
+
+    def __contains__(self, disease):
+        return disease in self._d._conjuntos
+
 
 class DiagnosticoFuzzy:
     """
     Motor fuzzy com suporte a múltiplas 'doenças'. Cada doença tem
     seu conjunto de regras. Retorna também quais regras foram acionadas.
+
+    As variáveis, pertinências e regras vêm dos arquivos em `dir_regras`
+    (variaveis.json e um arquivo por doença, ver definicoes.py) e cada
+    doença é compilada uma vez em matrizes NumPy (RegrasCompiladas). Por
+    padrão calcular_risco avalia essas matrizes direto; avaliador="skfuzzy"
+    usa o ControlSystem do skfuzzy (mesmo resultado, dentro de
+    TOLERANCIA_LOTE). modo="analitico" troca a amostragem dos universos
+    por pertinências e centroide exatos (ver RegrasCompiladas); o avaliador
+    skfuzzy só existe no modo amostrado. recarregar_regras() relê só os arquivos alterados e
+    troca o conjunto da doença numa única atribuição: cálculos em andamento
+    terminam com a versão que começaram.
+
+    de_snapshot() cria o motor a partir de um snapshot (salvar_snapshot):
+    as formas compiladas são mapeadas do arquivo, sem ler os arquivos de
+    regras nem importar o skfuzzy, e processos que usam o mesmo snapshot
+    compartilham os arrays. O skfuzzy só é importado quando algo precisa
+    dele (avaliador skfuzzy, variáveis para os gráficos, recarga de regras).
+
+    As doenças ficam num RegistroRegras: os arquivos são lidos e validados
+    na criação, mas cada doença só é compilada no primeiro cálculo. Com
+    `max_conjuntos` e/ou `max_bytes` só as usadas recentemente ficam
+    compiladas (LRU, com a simulação do skfuzzy de cada uma); `fixadas`
+    nunca são descartadas. registro.estatisticas() informa memória e tempo
+    de compilação por doença. doencas(), `in rulesets` e iterar não compilam.
+
+    `inferencia` escolhe a defuzzificação de cada doença: "mamdani"
+    (centroide, padrão), "sugeno" (ordem zero: cada termo da saída vale uma
+    constante e o risco é a média ponderada pela ativação das regras, sem
+    universo de saída) ou {doença: inferência}. As constantes vêm do bloco
+    "sugeno" do arquivo da doença ou, sem ele, dos centroides dos termos;
+    cli_sugeno.py ajusta as constantes e mede o desvio em relação ao
+    Mamdani. O Sugeno só existe no avaliador compilado.
     """
 
-    def __init__(self):
-        # Universos
-        self.febre = ctrl.Antecedent(np.arange(35, 41.1, 0.1), 'febre')
-        self.tosse = ctrl.Antecedent(np.arange(0, 11, 1), 'tosse')
-        self.saturacao = ctrl.Antecedent(np.arange(70, 101, 1), 'saturacao')
-        self.risco = ctrl.Consequent(np.arange(0, 101, 1), 'risco')
-
-        # Pertinências (reutilizáveis)
-        self._criar_pertinencias()
-
-        # Regras por doença
-        self.rulesets = {
-            'Respiratória': self._rules_respiratoria(),
-            'Viral': self._rules_viral(),
-            'Bacteriana': self._rules_bacteriana()
+    # variáveis do skfuzzy, criadas sob demanda num motor de snapshot
+    _VARIAVEIS = ("febre", "tosse", "saturacao", "risco", "_entradas")
+
+    def __init__(self, dir_regras=DIR_DEFINICOES, avaliador="compilado", modo="amostrado",
+                 max_conjuntos=None, max_bytes=None, fixadas=(), inferencia="mamdani"):
+        if avaliador not in AVALIADORES:
+            raise ValueError(f"Avaliador desconhecido: {avaliador} (use {', '.join(AVALIADORES)})")
+        if modo not in MODOS:
+            raise ValueError(f"Modo desconhecido: {modo} (use {', '.join(MODOS)})")
+        if avaliador == "skfuzzy" and modo != "amostrado":
+            raise ValueError("O avaliador skfuzzy só calcula no modo amostrado")
+        if "sugeno" in _validar_inferencia(inferencia) and avaliador == "skfuzzy":
+            raise ValueError("O avaliador skfuzzy só calcula com inferência Mamdani")
+        self.avaliador = avaliador
+        self.modo = modo
+        self.inferencia = inferencia
+
+        # Variáveis (febre, tosse, saturacao, risco) e regras por doença
+        self.repositorio = RepositorioRegras(dir_regras)
+        self._lock_recarga = threading.Lock()
+        self._conjuntos = RegistroRegras([], modo=modo, max_conjuntos=max_conjuntos, max_bytes=max_bytes,
+                                         fixadas=fixadas, ao_remover=self._descartar_simulacoes,
+                                         inferencia=inferencia)
+        self._carregar_tudo()
+        self._iniciar()
+
+    def _iniciar(self):
+        """Estado comum a __init__ e de_snapshot (depois das regras carregadas)."""
+        # Uma simulação por doença, reutilizada entre chamadas (avaliador
+        # skfuzzy) e criada no primeiro uso. O skfuzzy guarda estado nos
+        # Antecedents compartilhados, então input + compute é serializado
+        # por um lock único: um cálculo skfuzzy por vez no motor.
+        self._pool = None
+        self._lock_skfuzzy = threading.RLock()
+        self._lock_variaveis = threading.Lock()
+
+        # Tabelas de risco pré-calculadas (modo compilado, ver compilar_tabelas)
+        self.tabelas = {}
+        self._config_tabelas = None
+
+        # Memoização opcional de calcular_risco (ver ativar_memo)
+        self.memo = None
+
+        # (registro, RegrasCombinadas) usado por calcular_todas; refeito
+        # quando recarregar_regras troca o registro
+        self._combinadas = None
+
+    @property
+    def pool(self):
+        """PoolSimulacoes do avaliador skfuzzy (importa o skfuzzy no primeiro acesso)."""
+        if self._pool is None:
+            with self._lock_skfuzzy:
+                if self._pool is None:
+                    from fuzzy_engine.pool_simulacoes import PoolSimulacoes
+
+                    self._pool = PoolSimulacoes(self.ctrls)
+        return self._pool
+
+    def _descartar_simulacoes(self, disease):
+        """Chamado pelo registro ao descartar uma doença compilada."""
+        pool = self.__dict__.get("_pool")
+        if pool is not None:
+            pool.descartar(disease)
+
+    def __getattr__(self, nome):
+        # só chamado para atributos ausentes: num motor de snapshot, as
+        # variáveis do skfuzzy são recriadas a partir da forma compilada
+        if nome not in self._VARIAVEIS or "_conjuntos" not in self.__dict__:
+            raise AttributeError(nome)
+        # lock próprio: recarregar_regras pede as variáveis segurando _lock_recarga
+        with self._lock_variaveis:
+            if "_entradas" not in self.__dict__:
+                compilado = next(iter(self._conjuntos.values())).compilado
+                entradas, saida = variaveis_de_compilado(compilado)
+                self.febre, self.tosse, self.saturacao = entradas
+                self.risco = saida
+                self._entradas = entradas
+        return self.__dict__[nome]
+
+    # --- snapshot ---
+    def salvar_snapshot(self, path=None):
+        """
+        Grava as formas compiladas de todas as doenças num snapshot
+        versionado (fuzzy_engine/snapshot.py), com o hash dos arquivos de
+        regras lidos. Padrão: snapshot.caminho_padrao(dir_regras, modo,
+        inferencia). Retorna o caminho.
+        """
+        if path is None:
+            path = caminho_padrao(self.repositorio.diretorio, self.modo, self.inferencia)
+        info = {
+            "modo": self.modo,
+            "inferencia": self.inferencia,
+            "dir_regras": str(self.repositorio.diretorio.resolve()),
+            "arquivos": {p.name: h for p, (_, h) in self.repositorio.estado().items()},
         }
+        conjuntos = [(c.nome, c.ordem, None if c.origem is None else c.origem.name, c.compilado)
+                     for c in self._conjuntos.values()]
+        return salvar_snapshot(path, conjuntos, info)
+
+    @staticmethod
+    def snapshot_atual(path=None, dir_regras=DIR_DEFINICOES, modo="amostrado", inferencia="mamdani"):
+        """
+        True se de_snapshot com esses argumentos só mapearia o arquivo, sem
+        construir o motor (não importa o skfuzzy).
+        """
+        path = caminho_padrao(dir_regras, modo, inferencia) if path is None else path
+        return _ler_snapshot(path, RepositorioRegras(dir_regras), modo, inferencia) is not None
+
+    @classmethod
+    def de_snapshot(cls, path=None, dir_regras=DIR_DEFINICOES, modo="amostrado", inferencia="mamdani"):
+        """
+        Motor carregado de um snapshot (avaliador compilado). Se o arquivo
+        não existir, for de outra versão, de outro modo, inferência ou
+        diretório, ou se algum arquivo de regras mudou desde que foi gravado,
+        o motor é construído dos arquivos e o snapshot regravado. Padrão:
+        snapshot.caminho_padrao(dir_regras, modo, inferencia).
+
+        Para um pool de processos, chame uma vez no processo principal (o
+        snapshot fica atualizado) e de novo em cada worker, que então só
+        mapeia o arquivo.
+        """
+        if modo not in MODOS:
+            raise ValueError(f"Modo desconhecido: {modo} (use {', '.join(MODOS)})")
+        _validar_inferencia(inferencia)
+        path = caminho_padrao(dir_regras, modo, inferencia) if path is None else path
+        repositorio = RepositorioRegras(dir_regras)
+        lido = _ler_snapshot(path, repositorio, modo, inferencia)
+        if lido is None:
+            engine = cls(dir_regras=dir_regras, modo=modo, inferencia=inferencia)
+            engine.salvar_snapshot(path)
+            return engine
+        conjuntos, hashes = lido
 
-        # ControlSystems cache
-        self.ctrls = {k: ctrl.ControlSystem(v) for k, v in self.rulesets.items()}
-
-    def _criar_pertinencias(self):
-        # febre
-        self.febre['normal']   = fuzz.gaussmf(self.febre.universe, 36.5, 0.3)
-        self.febre['moderada'] = fuzz.gaussmf(self.febre.universe, 38.0, 0.4)
-        self.febre['alta']     = fuzz.trimf(self.febre.universe, [38.5, 40, 41])
-
-        # tosse
-        self.tosse['leve']     = fuzz.trimf(self.tosse.universe, [0, 0, 4])
-        self.tosse['moderada'] = fuzz.trimf(self.tosse.universe, [2, 5, 8])
-        self.tosse['forte']    = fuzz.trimf(self.tosse.universe, [6, 10, 10])
-
-        # saturacao
-        self.saturacao['boa']     = fuzz.trimf(self.saturacao.universe, [94, 100, 100])
-        self.saturacao['moderada'] = fuzz.trimf(self.saturacao.universe, [88, 94, 98])
-        self.saturacao['baixa']   = fuzz.trimf(self.saturacao.universe, [70, 70, 90])
-
-        # risco
-        self.risco['baixo']  = fuzz.trimf(self.risco.universe, [0, 0, 50])
-        self.risco['medio']  = fuzz.trapmf(self.risco.universe, [30, 50, 70, 90])
-        self.risco['alto']   = fuzz.trimf(self.risco.universe, [70, 100, 100])
-
-    # --- Rules for each disease (examples) ---
-    def _rules_respiratoria(self):
-        r1 = ctrl.Rule(self.febre['alta'] & self.tosse['forte'] & self.saturacao['baixa'], self.risco['alto'])
-        r2 = ctrl.Rule(self.febre['moderada'] & self.tosse['moderada'], self.risco['medio'])
-        r3 = ctrl.Rule(self.tosse['leve'] & self.saturacao['boa'], self.risco['baixo'])
-        r4 = ctrl.Rule(self.saturacao['baixa'] & self.tosse['forte'], self.risco['alto'])
-        r5 = ctrl.Rule(self.febre['alta'] & self.saturacao['moderada'], self.risco['medio'])
-        r6 = ctrl.Rule(self.febre['normal'] & self.tosse['leve'], self.risco['baixo'])
-        return [r1, r2, r3, r4, r5, r6]
-
-    def _rules_viral(self):
-        # Exemplo: viral tem febre alta mas tosse moderada
-        r1 = ctrl.Rule(self.febre['alta'] & self.tosse['moderada'], self.risco['alto'])
-        r2 = ctrl.Rule(self.febre['moderada'] & self.tosse['moderada'], self.risco['medio'])
-        r3 = ctrl.Rule(self.febre['normal'] & self.tosse['leve'], self.risco['baixo'])
-        r4 = ctrl.Rule(self.saturacao['baixa'] & self.febre['alta'], self.risco['alto'])
-        return [r1, r2, r3, r4]
-
-    def _rules_bacteriana(self):
-        # Exemplo: bacteriana tende a dar risco alto quando febre alta mesmo sem saturação baixa
-        r1 = ctrl.Rule(self.febre['alta'] & (self.tosse['moderada'] | self.tosse['forte']), self.risco['alto'])
-        r2 = ctrl.Rule(self.febre['moderada'] & self.tosse['forte'], self.risco['medio'])
-        r3 = ctrl.Rule(self.tosse['leve'] & self.saturacao['boa'], self.risco['baixo'])
-        r4 = ctrl.Rule(self.febre['alta'] & self.saturacao['baixa'], self.risco['alto'])
-        return [r1, r2, r3, r4]
+        engine = cls.__new__(cls)
+        engine.avaliador = "compilado"
+        engine.modo = modo
+        engine.inferencia = inferencia
+        # as leituras registradas são as do snapshot: recarregar_regras só
+        # relê o que mudar depois
+        repositorio.restaurar({p: (repositorio._marca(p), h) for p, h in hashes.items()})
+        engine.repositorio = repositorio
+        engine._lock_recarga = threading.Lock()
+        # já compiladas e sem definição: ficam sempre no registro
+        origens = [repositorio.diretorio / origem if origem else None for _, _, origem, _ in conjuntos]
+        engine._conjuntos = RegistroRegras(
+            [(nome, ordem, o, None, ConjuntoRegras.de_compilado(nome, compilado, o, ordem))
+             for (nome, ordem, _, compilado), o in zip(conjuntos, origens)],
+            modo=modo, ao_remover=engine._descartar_simulacoes, inferencia=inferencia)
+        engine._iniciar()
+        return engine
+
+    # --- regras ---
+    @property
+    def registro(self):
+        """RegistroRegras em uso (fixar, limitar, estatisticas)."""
+        return self._conjuntos
+
+    def doencas(self):
+        """Nomes das doenças, na ordem definida nos arquivos (sem compilar nenhuma)."""
+        return list(self._conjuntos)
+
+    @property
+    def rulesets(self):
+        """
+        {doença: lista de ctrl.Rule}, na ordem definida nos arquivos (None
+        para doenças carregadas de um snapshot). Ler as regras de uma doença
+        não a compila.
+        """
+        return _PorDoenca(self, RegistroRegras.regras)
+
+    @property
+    def compilados(self):
+        """{doença: RegrasCompiladas}; cada uma é compilada no primeiro acesso."""
+        return _PorDoenca(self, lambda registro, disease: registro[disease].compilado)
+
+    @property
+    def ctrls(self):
+        """{doença: ControlSystem}; cada um é criado no primeiro acesso."""
+        return _PorDoenca(self, lambda registro, disease: registro[disease].ctrl)
+
+    def _carregar_tudo(self):
+        entradas, saida = self.repositorio.ler_variaveis()
+        itens = [self.repositorio.ler_especificacao(p, entradas, saida) for p in self.repositorio.doencas()]
+        self._publicar(entradas, saida, self._conjuntos.derivar(itens, None, entradas, saida))
+
+    def _publicar(self, entradas, saida, registro):
+        """Troca variáveis e registro; o registro é sempre substituído inteiro."""
+        self.febre, self.tosse, self.saturacao = entradas
+        self.risco = saida
+        self._entradas = entradas
+        self._conjuntos = registro
+
+    def recarregar_regras(self):
+        """
+        Relê os arquivos de regras alterados desde a última leitura e
+        recompila só as doenças afetadas (todas, se variaveis.json mudou).
+        Retorna a lista de doenças recompiladas, adicionadas ou removidas.
+        Se algum arquivo tiver erro, levanta ValueError e nada é trocado.
+        """
+        with self._lock_recarga:
+            # em caso de erro, o repositório volta a refletir a versão em uso
+            # e a próxima chamada tenta de novo
+            estado = self.repositorio.estado()
+            try:
+                variaveis, alterados, removidos = self.repositorio.mudancas()
+                if not (variaveis or alterados or removidos):
+                    return []
+                antigos = self._conjuntos
+                if variaveis:
+                    entradas, saida = self.repositorio.ler_variaveis()
+                    arquivos = self.repositorio.doencas()
+                else:
+                    entradas, saida = self._entradas, self.risco
+                    arquivos = alterados
+                novos = [self.repositorio.ler_especificacao(p, entradas, saida) for p in arquivos]
+
+                trocados = set(arquivos) | set(removidos)
+                self._publicar(entradas, saida,
+                               antigos.derivar(novos, None if variaveis else trocados, entradas, saida))
+            except Exception:
+                self.repositorio.restaurar(estado)
+                raise
+            for p in removidos:
+                self.repositorio.esquecer(p)
 
+            mudaram = sorted({nome for nome, *_ in novos} | {n for n in antigos if antigos.origem(n) in trocados})
+            self._reconstruir_tabelas(mudaram)
+            log.info("Regras recarregadas: %s", ", ".join(mudaram))
+            return mudaram
+
+    def observar_regras(self, intervalo=1.0):
+        """
+        Recarrega as regras em segundo plano a cada `intervalo` segundos.
+        Erros nos arquivos são registrados no log e a versão anterior continua
+        em uso. Retorna um threading.Event; set() encerra a observação.
+        """
+        parar = threading.Event()
+
+        def laco():
+            ultimo_erro = None
+            while not parar.wait(intervalo):
+                try:
+                    self.recarregar_regras()
+                    ultimo_erro = None
+                except Exception as e:
+                    # o mesmo erro não é registrado de novo a cada verificação
+                    if str(e) != ultimo_erro:
+                        log.error("Falha ao recarregar as regras; mantendo a versão anterior: %s", e)
+                        ultimo_erro = str(e)
+
+        threading.Thread(target=laco, name="observar-regras", daemon=True).start()
+        return parar
+
+    # --- cálculo ---
     def calcular_risco(self, disease, febre_val, tosse_val, saturacao_val):
         """
         Retorna (risco_val, fired_rules_indices, simulation object)
-        fired_rules_indices: lista de índices das regras que tiveram ativação > 0
+        fired_rules_indices: lista de (índice, grau) das regras com ativação > 0.
+        A simulação só existe com avaliador="skfuzzy" sem memoização; ela vem
+        do pool e é reutilizada: trate-a como somente leitura e válida apenas
+        até a próxima chamada. Com a memoização ativa (ativar_memo) as
+        entradas são quantizadas. Levanta ValueError se nenhuma regra for
+        acionada.
         """
-        if disease not in self.ctrls:
+        conj = self._conjuntos.get(disease)
+        if conj is None:
             raise ValueError("Doença desconhecida")
 
-        csim = ctrl.ControlSystemSimulation(self.ctrls[disease])
+        with METRICAS.medir("motor.calcular_risco", doenca=disease):
+            if self.memo is None:
+                return self._calcular_risco(conj, febre_val, tosse_val, saturacao_val)
 
-        csim.input['febre'] = febre_val
-        csim.input['tosse'] = tosse_val
-        csim.input['saturacao'] = saturacao_val
+            idx, vals = self.memo.quantizar((febre_val, tosse_val, saturacao_val))
+            chave = (disease, conj.assinatura) + idx
+            res = self.memo.obter(chave)
+            if res is None:
+                risco, fired, _ = self._calcular_risco(conj, *vals)
+                res = (risco, tuple(fired))
+                self.memo.guardar(chave, res)
+            return res[0], list(res[1]), None
 
-        csim.compute()
-        risco = csim.output['risco']
+    def _calcular_risco(self, conj, febre_val, tosse_val, saturacao_val):
+        if self.avaliador == "skfuzzy":
+            if METRICAS.ativo:
+                return self._calcular_skfuzzy_medido(conj, febre_val, tosse_val, saturacao_val)
+            return self._calcular_skfuzzy(conj, febre_val, tosse_val, saturacao_val)
 
-        # Determinar regras ativadas: percorrer regras do sistema
-        fired = []
-        rules = self.rulesets[disease]
-        # Para pegar a ativação, precisamos recomputar manualmente as antecedências:
-        # skfuzzy não expõe diretamente os graus cada regra após compute() de forma trivial,
-        # mas podemos avaliar a antecedência fuzzy usando as funções de pertinência.
-        # Iremos aproximar: avaliar MIN/OR conforme cada regra criada e checar se > 0
-        for idx, r in enumerate(rules):
-            # r.antecedent é uma skfuzzy AntecedentLabel (complex). Para simplicidade,
-            # usaremos uma heurística: se as condições textuais estiverem presentes nas labels,
-            # testamos os graus:
+        c = conj.compilado
+        valores = (febre_val, tosse_val, saturacao_val)
+        if not METRICAS.ativo:
+            risco, ativ = c.avaliar_um(valores)
+        else:
+            t0 = time.perf_counter()
+            graus = c.fuzzificar_um(valores)
+            t1 = time.perf_counter()
+            regras = c.regras_possiveis(valores)
+            ativ = c.ativacoes_um(graus, regras)
+            t2 = time.perf_counter()
+            risco = c.defuzzificar_um(ativ, regras)
+            t3 = time.perf_counter()
+            METRICAS.observar("motor.fuzzificacao", t1 - t0, doenca=conj.nome)
+            METRICAS.observar("motor.regras", t2 - t1, doenca=conj.nome)
+            METRICAS.observar("motor.defuzzificacao", t3 - t2, doenca=conj.nome)
+        if risco != risco:
+            raise ValueError(SEM_REGRAS)
+        return risco, [(i, g) for i, g in enumerate(ativ) if g > 0.0], None
+
+    def _calcular_skfuzzy(self, conj, febre_val, tosse_val, saturacao_val):
+        with self._lock_skfuzzy, self.pool.simulacao(conj.nome, conj.ctrl) as csim:
+            self._definir_entradas(csim, conj, febre_val, tosse_val, saturacao_val)
+
+            csim.compute()
+            risco = csim.output.get('risco')
+            if risco is None:
+                raise ValueError(SEM_REGRAS)
+            fired = self._regras_acionadas(conj.nome, csim, conj.rules)
+
+        return risco, fired, csim
+
+    def _calcular_skfuzzy_medido(self, conj, febre_val, tosse_val, saturacao_val):
+        """_calcular_skfuzzy com o tempo de cada etapa registrado em METRICAS."""
+        disease = conj.nome
+        t0 = time.perf_counter()
+        with self._lock_skfuzzy, self.pool.simulacao(disease, conj.ctrl) as csim:
+            t1 = time.perf_counter()
+            self._definir_entradas(csim, conj, febre_val, tosse_val, saturacao_val)
+
+            marcas = csim.marcas = {}
             try:
-                # cada termo antecedent pode ser composto por expr; skfuzzy fornece uma string em r.__repr__.
-                # Heurística: verificar presença de labels e calcular grau mínimo (AND) / máximo (OR)
-                # Vamos buscar r.antecedent.A que representa um expression tree; para compatibilidade e robustez,
-                # calcular manualmente as combinações mais simples (AND das partes).
-                antecedent = r.antecedent
-                # skfuzzy uses fuzzy expressions; evaluate via .inputs? Fallback:
-                # We'll approximate by checking textual labels in repr:
-                rep = repr(antecedent)
-                # For each known label, compute membership degree and then approximate rule degree
-                degrees = []
-                # febre labels:
-                if "febre" in rep:
-                    # check which label name appears
-                    for label in ['alta', 'moderada', 'normal']:
-                        if f"febre.{label}" in rep:
-                            degrees.append(self.febre[label].membership_function(self.febre.universe, febre_val) if hasattr(self.febre[label],'membership_function') else fuzz.interp_membership(self.febre.universe, self.febre[label].mf, febre_val))
-                if "tosse" in rep:
-                    for label in ['forte','moderada','leve']:
-                        if f"tosse.{label}" in rep:
-                            degrees.append(self.tosse[label].membership_function(self.tosse.universe, tosse_val) if hasattr(self.tosse[label],'membership_function') else fuzz.interp_membership(self.tosse.universe, self.tosse[label].mf, tosse_val))
-                if "saturacao" in rep:
-                    for label in ['baixa','moderada','boa']:
-                        if f"saturacao.{label}" in rep:
-                            degrees.append(self.saturacao[label].membership_function(self.saturacao.universe, saturacao_val) if hasattr(self.saturacao[label],'membership_function') else fuzz.interp_membership(self.saturacao.universe, self.saturacao[label].mf, saturacao_val))
-                # fallback: if degrees empty, set 0
-                rule_degree = 0.0
-                if degrees:
-                    # if rule used AND, approx as min; if OR present, max. We're conservative and use min.
-                    rule_degree = min(degrees)
-                if rule_degree > 0.0:
-                    fired.append((idx, float(rule_degree)))
-            except Exception:
-                continue
+                t2 = time.perf_counter()
+                csim.compute()
+                t3 = time.perf_counter()
+            finally:
+                csim.marcas = None
+            risco = csim.output.get('risco')
+            if risco is None:
+                raise ValueError(SEM_REGRAS)
+            fired = self._regras_acionadas(disease, csim, conj.rules)
+            t4 = time.perf_counter()
 
+        METRICAS.observar("motor.espera_lock", t1 - t0, doenca=disease)
+        METRICAS.observar("motor.inferencia", t3 - t2, doenca=disease)
+        if 'regras' in marcas and 'defuzzificacao' in marcas:
+            # sem as marcas, o skfuzzy respondeu do próprio cache
+            METRICAS.observar("motor.fuzzificacao", marcas['regras'] - t2, doenca=disease)
+            METRICAS.observar("motor.regras", marcas['defuzzificacao'] - marcas['regras'], doenca=disease)
+            METRICAS.observar("motor.defuzzificacao", t3 - marcas['defuzzificacao'], doenca=disease)
+        METRICAS.observar("motor.regras_acionadas", t4 - t3, doenca=disease)
         return risco, fired, csim
+
+    @staticmethod
+    def _definir_entradas(csim, conj, febre_val, tosse_val, saturacao_val):
+        valores = {'febre': febre_val, 'tosse': tosse_val, 'saturacao': saturacao_val}
+        for nome in conj.entradas_usadas:
+            csim.input[nome] = valores[nome]
+
+    def _regras_acionadas(self, disease, csim, rules=None):
+        """
+        Lista (índice, grau) das regras com ativação > 0 na última execução
+        de `csim`. Usa o grau que o próprio skfuzzy calculou ao avaliar a
+        árvore do antecedente (AND = min, OR = max, NOT = 1 - x) a partir das
+        pertinências já fuzzificadas, sem recalcular nada.
+        """
+        if rules is None:
+            rules = self._conjuntos[disease].rules
+        fired = []
+        for idx, r in enumerate(rules):
+            grau = r.aggregate_firing[csim]
+            if grau is not None and grau > 0.0:
+                fired.append((idx, float(grau)))
+        return fired
+
+    def calcular_risco_lote(self, disease, febre_vals, tosse_vals, saturacao_vals):
+        """
+        Versão vetorizada de calcular_risco para N pacientes de uma vez.
+
+        Recebe arrays (ou sequências) de mesmo tamanho e retorna
+        (riscos, ativacoes): riscos é um array (N,) e ativacoes uma matriz
+        (N x regras) com o grau exato de cada regra (AND = min, OR = max).
+        O resultado coincide com calcular_risco dentro de TOLERANCIA_LOTE.
+        Linhas em que nenhuma regra é ativada recebem NaN (no caminho
+        escalar o cálculo levanta ValueError nesse caso).
+        """
+        conj = self._conjuntos.get(disease)
+        if conj is None:
+            raise ValueError("Doença desconhecida")
+
+        entradas = [np.atleast_1d(np.asarray(x, dtype=np.float64))
+                    for x in (febre_vals, tosse_vals, saturacao_vals)]
+        if len({x.shape for x in entradas}) != 1 or entradas[0].ndim != 1:
+            raise ValueError("febre, tosse e saturação devem ser vetores de mesmo tamanho")
+
+        with METRICAS.medir("motor.lote", doenca=disease):
+            return conj.compilado.avaliar(entradas)
+
+    def _regras_combinadas(self):
+        conjuntos = self._conjuntos
+        combinadas = self._combinadas
+        if combinadas is None or combinadas[0] is not conjuntos:
+            combinadas = (conjuntos, RegrasCombinadas({k: c.compilado for k, c in conjuntos.items()}))
+            self._combinadas = combinadas
+        return combinadas[1]
+
+    def calcular_todas(self, febre_val, tosse_val, saturacao_val):
+        """
+        Avalia todas as doenças para o mesmo paciente, fuzzificando as
+        entradas uma única vez. Retorna {doença: (risco, fired_rules_indices)}
+        na ordem de `rulesets`; risco é None nas doenças em que nenhuma regra
+        foi acionada (calcular_risco levantaria ValueError). Não usa a
+        memoização; com avaliador="skfuzzy" chama calcular_risco por doença.
+        """
+        if self.avaliador == "skfuzzy":
+            resultado = {}
+            for disease in self._conjuntos:
+                try:
+                    risco, fired, _ = self.calcular_risco(disease, febre_val, tosse_val, saturacao_val)
+                except ValueError as e:
+                    if str(e) != SEM_REGRAS:
+                        raise
+                    risco, fired = None, []
+                resultado[disease] = (risco, fired)
+            return resultado
+
+        with METRICAS.medir("motor.calcular_todas"):
+            avaliados = self._regras_combinadas().avaliar_um((febre_val, tosse_val, saturacao_val))
+        return {disease: (None if risco != risco else risco, [(i, g) for i, g in enumerate(ativ) if g > 0.0])
+                for disease, (risco, ativ) in avaliados.items()}
+
+    def calcular_todas_lote(self, febre_vals, tosse_vals, saturacao_vals):
+        """
+        calcular_risco_lote para todas as doenças de uma vez, com a
+        fuzzificação compartilhada. Retorna {doença: (riscos (N,), ativacoes
+        (N x regras da doença))}; NaN onde nenhuma regra foi ativada.
+        """
+        entradas = [np.atleast_1d(np.asarray(x, dtype=np.float64))
+                    for x in (febre_vals, tosse_vals, saturacao_vals)]
+        if len({x.shape for x in entradas}) != 1 or entradas[0].ndim != 1:
+            raise ValueError("febre, tosse e saturação devem ser vetores de mesmo tamanho")
+
+        with METRICAS.medir("motor.lote_todas"):
+            return self._regras_combinadas().avaliar(entradas)
+
+    def varrer(self, disease, febre_val, tosse_val, saturacao_val, **faixas):
+        """
+        Simulação "e se": risco de `disease` com uma ou duas entradas
+        percorrendo os valores dados e as demais fixas no paciente, p.ex.
+        varrer("Viral", 38.2, 6, 94, saturacao=np.arange(85, 100)).
+        Retorna uma Varredura (curva ou superfície e sensibilidades). Usa
+        sempre a forma compilada e recalcula só o que depende das entradas
+        variadas (ver RegrasCompiladas.varrer).
+        """
+        conj = self._conjuntos.get(disease)
+        if conj is None:
+            raise ValueError("Doença desconhecida")
+        c = conj.compilado
+        desconhecidas = set(faixas) - set(c.nomes_variaveis)
+        if desconhecidas or not 1 <= len(faixas) <= 2:
+            raise ValueError(f"Varie uma ou duas entradas entre {', '.join(c.nomes_variaveis)}")
+
+        base = (febre_val, tosse_val, saturacao_val)
+        with METRICAS.medir("motor.varredura", doenca=disease):
+            riscos, ativ = c.varrer(base, {c.nomes_variaveis.index(v): x for v, x in faixas.items()})
+            risco_base = c.avaliar_um(base)[0]
+        return Varredura(disease, zip(c.nomes_variaveis, base), list(faixas), list(faixas.values()),
+                         riscos, ativ, None if risco_base != risco_base else risco_base)
+
+    def sensibilidades(self, disease, febre_val, tosse_val, saturacao_val, passos=None):
+        """
+        Derivada do risco em relação a cada entrada no ponto do paciente, por
+        diferença central (lateral na borda do universo): {'febre': dR/d°C, ...}.
+        `passos` ({entrada: passo}) tem como padrão o passo de cada universo.
+        NaN onde algum dos pontos não aciona regras.
+        """
+        conj = self._conjuntos.get(disease)
+        if conj is None:
+            raise ValueError("Doença desconhecida")
+        c = conj.compilado
+        passos = passos or {}
+        base = np.array([febre_val, tosse_val, saturacao_val], dtype=np.float64)
+        pontos, hs = [], []
+        for iv, (nome, u) in enumerate(zip(c.nomes_variaveis, c.universos)):
+            h = float(passos.get(nome, u[1] - u[0]))
+            menos, mais = base.copy(), base.copy()
+            menos[iv] = max(base[iv] - h, u[0])
+            mais[iv] = min(base[iv] + h, u[-1])
+            pontos += [menos, mais]
+            hs.append(mais[iv] - menos[iv])
+        riscos, _ = c.avaliar(list(np.array(pontos).T))
+        return {nome: float((riscos[2 * iv + 1] - riscos[2 * iv]) / hs[iv]) if hs[iv] > 0 else float("nan")
+                for iv, nome in enumerate(c.nomes_variaveis)}
+
+    def limites(self):
+        """Intervalos válidos das entradas: {'febre': (min, max), ...}."""
+        for conj in self._conjuntos.values():
+            # todas as doenças têm as mesmas variáveis (e assim um motor de
+            # snapshot não precisa criar as do skfuzzy)
+            return conj.compilado.limites()
+        return {v.label: (float(v.universe[0]), float(v.universe[-1]))
+                for v in (self.febre, self.tosse, self.saturacao)}
+
+    def assinatura(self, disease):
+        """Hash da definição (pertinências + regras) do conjunto de regras da doença."""
+        return self._conjuntos[disease].assinatura
+
+    def compilar_tabelas(self, passos=PASSOS_PADRAO, cache_dir=CACHE_DIR):
+        """
+        Ativa o modo compilado: pré-calcula (ou carrega do cache em disco) a
+        superfície de risco de cada doença numa grade com os `passos` dados.
+        Retorna {doença: erro máximo de interpolação} medido contra o motor exato.
+        As tabelas das doenças recarregadas depois são refeitas com os mesmos passos.
+        """
+        self._config_tabelas = (passos, cache_dir)
+        self.tabelas = {
+            k: TabelaRisco.carregar_ou_construir(k, c.compilado, passos, cache_dir)
+            for k, c in self._conjuntos.items()
+        }
+        return {k: t.erro_max for k, t in self.tabelas.items()}
+
+    def _reconstruir_tabelas(self, doencas):
+        if self._config_tabelas is None:
+            return
+        passos, cache_dir = self._config_tabelas
+        tabelas = {k: t for k, t in self.tabelas.items() if k in self._conjuntos and k not in doencas}
+        for k in doencas:
+            if k in self._conjuntos:
+                tabelas[k] = TabelaRisco.carregar_ou_construir(k, self._conjuntos[k].compilado, passos, cache_dir)
+        self.tabelas = tabelas
+
+    def calcular_risco_compilado(self, disease, febre_val, tosse_val, saturacao_val):
+        """
+        Risco interpolado a partir da tabela pré-calculada (escalares ou arrays).
+        Não informa regras acionadas; o erro máximo da aproximação está em
+        self.tabelas[disease].erro_max.
+        """
+        tabela = self.tabelas.get(disease)
+        if tabela is None:
+            if disease not in self._conjuntos:
+                raise ValueError("Doença desconhecida")
+            raise RuntimeError("Tabelas não compiladas: chame compilar_tabelas() antes")
+        return tabela.consultar(febre_val, tosse_val, saturacao_val)
+
+    def ativar_memo(self, max_itens=4096, passos=PASSOS_MEMO):
+        """
+        Liga a memoização LRU de calcular_risco. `passos` define a quantização
+        de (febre, tosse, saturação); None usa os valores exatos como chave.
+        Retorna o cache, que expõe estatisticas() (acertos/faltas/remoções).
+        """
+        self.memo = CacheInferencia(max_itens, passos)
+        return self.memo
+
+    def desativar_memo(self):
+        self.memo = None
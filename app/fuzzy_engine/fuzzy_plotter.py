@@ -1,70 +1,164 @@
 # fuzzy_engine/fuzzy_plotter.py
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+import numpy as np
+from matplotlib.figure import Figure
 
 from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+from utils.metricas import METRICAS
+
+# variável do motor -> título do gráfico
+TITULOS = {
+    "febre": "Febre (°C)",
+    "tosse": "Tosse (0-10)",
+    "saturacao": "Saturação (%)",
+    "risco": "Risco (%)",
+}
+
 
 class FuzzyPlotter:
     """
     Cria figuras matplotlib com as funções de pertinência e pode retorná-las
     embutidas em um canvas para exibir no PyQt5.
+
+    Cada variável tem uma única figura persistente: as curvas de pertinência
+    são desenhadas uma vez e o destaque (highlight_value) apenas move a linha
+    marcadora. Quando o canvas suporta blitting, só a área dos eixos é
+    repintada, a partir do fundo guardado no último desenho completo.
+    Chamadas repetidas devolvem sempre a mesma figura, então o número de
+    figuras e artistas não cresce.
+
+    As figuras são criadas sem o pyplot (Figure direto). Uma instância não é
+    thread-safe: use uma por thread (p.ex. uma para a interface e outra
+    para exportar PDFs em segundo plano).
     """
 
     def __init__(self, diagnostico: 'DiagnosticoFuzzy'):
         self.d = diagnostico
+        # nome -> (fig, ax, linha marcadora)
+        self._figuras = {}
+        # nome -> fundo (eixos sem a linha) do último desenho completo
+        self._fundos = {}
+        # número de entradas variadas -> (fig, ax, curva ou imagem, marcador do paciente)
+        self._varreduras = {}
 
     def plot_febre(self, highlight_value=None):
-        fig, ax = plt.subplots(figsize=(4.5,2.8), dpi=100)
-        x = self.d.febre.universe
-        for name in self.d.febre.terms.keys():
-            mf = self.d.febre[name]
-            ax.plot(x, mf.mf if hasattr(mf, 'mf') else x, label=name)
-        ax.set_title("Febre (°C)")
-        ax.legend()
-        if highlight_value is not None:
-            ax.axvline(highlight_value, color='k', linestyle='--')
-        fig.tight_layout()
-        return fig
+        return self._destacar("febre", highlight_value)
 
     def plot_tosse(self, highlight_value=None):
-        fig, ax = plt.subplots(figsize=(4.5,2.8), dpi=100)
-        x = self.d.tosse.universe
-        for name in self.d.tosse.terms.keys():
-            mf = self.d.tosse[name]
-            ax.plot(x, mf.mf if hasattr(mf, 'mf') else x, label=name)
-        ax.set_title("Tosse (0-10)")
-        ax.legend()
-        if highlight_value is not None:
-            ax.axvline(highlight_value, color='k', linestyle='--')
-        fig.tight_layout()
-        return fig
+        return self._destacar("tosse", highlight_value)
 
     def plot_saturacao(self, highlight_value=None):
-        fig, ax = plt.subplots(figsize=(4.5,2.8), dpi=100)
-        x = self.d.saturacao.universe
-        for name in self.d.saturacao.terms.keys():
-            mf = self.d.saturacao[name]
-            ax.plot(x, mf.mf if hasattr(mf, 'mf') else x, label=name)
-        ax.set_title("Saturação (%)")
-        ax.legend()
-        if highlight_value is not None:
-            ax.axvline(highlight_value, color='k', linestyle='--')
-        fig.tight_layout()
-        return fig
+        return self._destacar("saturacao", highlight_value)
 
     def plot_risco(self, highlight_value=None):
-        fig, ax = plt.subplots(figsize=(4.5,2.8), dpi=100)
-        x = self.d.risco.universe
-        for name in self.d.risco.terms.keys():
-            mf = self.d.risco[name]
-            ax.plot(x, mf.mf if hasattr(mf, 'mf') else x, label=name)
-        ax.set_title("Risco (%)")
-        ax.legend()
-        if highlight_value is not None:
-            ax.axvline(highlight_value, color='k', linestyle='--')
-        fig.tight_layout()
+        return self._destacar("risco", highlight_value)
+
+    def plot_varredura(self, varredura):
+        """
+        Gráfico de uma Varredura (DiagnosticoFuzzy.varrer): curva do risco
+        para uma entrada variada ou mapa de calor para duas, com o paciente
+        marcado. Há uma figura por tipo; novas varreduras só trocam os dados
+        da curva ou da imagem (um único AxesImage para a superfície inteira,
+        em vez de uma malha de polígonos) e pedem um redesenho. O mapa
+        supõe eixos igualmente espaçados (np.arange/np.linspace).
+        """
+        dims = len(varredura.variaveis)
+        if dims not in self._varreduras:
+            with METRICAS.medir("grafico.criacao", variavel=f"varredura_{dims}d"):
+                self._varreduras[dims] = self._criar_varredura(dims)
+        fig, ax, artista, marcador = self._varreduras[dims]
+
+        eixos = varredura.eixos
+        base = [varredura.base[v] for v in varredura.variaveis]
+        ax.set_title(f"{varredura.disease}: risco (%)")
+        ax.set_xlabel(TITULOS[varredura.variaveis[0]])
+        if dims == 1:
+            artista.set_data(eixos[0], varredura.riscos)
+            ax.set_xlim(eixos[0][0], eixos[0][-1])
+            marcador.set_xdata([base[0], base[0]])
+        else:
+            # imagem: linhas = segunda entrada (eixo y), colunas = primeira (eixo x)
+            meio = [(e[1] - e[0]) / 2 if e.size > 1 else 0.5 for e in eixos]
+            artista.set_data(np.ma.masked_invalid(varredura.riscos.T))
+            artista.set_extent((eixos[0][0] - meio[0], eixos[0][-1] + meio[0],
+                                eixos[1][0] - meio[1], eixos[1][-1] + meio[1]))
+            ax.set_ylabel(TITULOS[varredura.variaveis[1]])
+            marcador.set_data([base[0]], [base[1]])
+        fig.canvas.draw_idle()
         return fig
 
+    def _criar_varredura(self, dims):
+        fig = Figure(figsize=(5, 3.6), dpi=100)
+        ax = fig.subplots()
+        # textos provisórios para o tight_layout reservar espaço (trocados a cada varredura)
+        ax.set_title(TITULOS["risco"])
+        ax.set_xlabel(TITULOS["febre"])
+        if dims == 1:
+            artista, = ax.plot([], [])
+            ax.set_ylabel(TITULOS["risco"])
+            ax.set_ylim(0, 100)
+            ax.grid(True, alpha=0.3)
+            marcador = ax.axvline(0, color='k', linestyle='--')
+        else:
+            ax.set_ylabel(TITULOS["saturacao"])
+            artista = ax.imshow(np.zeros((2, 2)), origin='lower', aspect='auto', vmin=0, vmax=100,
+                                interpolation='nearest')
+            fig.colorbar(artista, ax=ax, label=TITULOS["risco"])
+            marcador, = ax.plot([], [], 'wx', markersize=10, markeredgewidth=2)
+        fig.tight_layout()
+        return fig, ax, artista, marcador
+
     def to_canvas(self, fig):
+        # import local: sem Qt, o plotter funciona só com Agg (p.ex. PDFs em lote)
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
         canvas = FigureCanvas(fig)
         return canvas
+
+    def _figura(self, nome):
+        if nome not in self._figuras:
+            with METRICAS.medir("grafico.criacao", variavel=nome):
+                self._figuras[nome] = self._criar_figura(nome)
+        return self._figuras[nome]
+
+    def _criar_figura(self, nome):
+        var = getattr(self.d, nome)
+        fig = Figure(figsize=(4.5,2.8), dpi=100)
+        ax = fig.subplots()
+        x = var.universe
+        for name in var.terms.keys():
+            mf = var[name]
+            ax.plot(x, mf.mf if hasattr(mf, 'mf') else x, label=name)
+        ax.set_title(TITULOS[nome])
+        ax.legend()
+        # animated: fica fora do desenho normal e é pintada por blit
+        linha = ax.axvline(x[0], color='k', linestyle='--', visible=False, animated=True)
+        fig.tight_layout()
+        fig.canvas.mpl_connect('draw_event', lambda ev, nome=nome: self._on_draw(nome, ev))
+        return fig, ax, linha
+
+    def _on_draw(self, nome, ev):
+        """Após um desenho completo: guarda o fundo e pinta a linha por cima."""
+        fig, ax, linha = self._figuras[nome]
+        canvas = ev.canvas
+        if canvas.supports_blit:
+            self._fundos[nome] = (canvas, canvas.copy_from_bbox(ax.bbox))
+        ax.draw_artist(linha)
+
+    def _destacar(self, nome, valor):
+        fig, ax, linha = self._figura(nome)
+        if valor is None:
+            linha.set_visible(False)
+        else:
+            linha.set_xdata([valor, valor])
+            linha.set_visible(True)
+
+        canvas = fig.canvas
+        fundo = self._fundos.get(nome)
+        if fundo is not None and fundo[0] is canvas:
+            with METRICAS.medir("grafico.blit", variavel=nome):
+                canvas.restore_region(fundo[1])
+                ax.draw_artist(linha)
+                canvas.blit(ax.bbox)
+        else:
+            # sem fundo guardado (ou canvas trocado): desenho completo
+            canvas.draw_idle()
+        return fig
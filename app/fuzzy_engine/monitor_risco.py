@@ -0,0 +1,230 @@
+# fuzzy_engine/monitor_risco.py
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from fuzzy_engine.cache_inferencia import PASSOS_MEMO
+from fuzzy_engine.diagnostico_fuzzy import SEM_REGRAS
+from utils.metricas import METRICAS
+
+ENTRADAS = ("febre", "tosse", "saturacao")
+
+# amostras na média móvel de cada entrada
+JANELA_PADRAO = 5
+# variação mínima da média (febre °C, tosse, saturação %) para o valor
+# usado no cálculo mudar
+ZONAS_MORTAS_PADRAO = (0.1, 0.0, 1.0)
+# variação mínima do risco (pontos percentuais) para emitir uma atualização
+LIMIAR_RISCO_PADRAO = 1.0
+# grau a partir do qual uma regra conta como acionada na comparação do
+# conjunto de regras (graus residuais não geram atualizações)
+GRAU_MINIMO_PADRAO = 0.01
+
+
+class _Fluxo:
+    """Estado de um par (paciente, doença)."""
+
+    __slots__ = ("lock", "janelas", "somas", "referencia", "quantizado", "risco", "regras", "emitido")
+
+    def __init__(self, janela):
+        # amostras de um mesmo fluxo são tratadas em ordem; fluxos diferentes
+        # são avaliados em paralelo
+        self.lock = threading.Lock()
+        self.janelas = [deque(maxlen=janela) for _ in ENTRADAS]
+        self.somas = [0.0] * len(ENTRADAS)
+        # valores aceitos pela zona morta, último ponto avaliado, resultado
+        # desse ponto e o que foi emitido por último (risco, regras)
+        self.referencia = [None] * len(ENTRADAS)
+        self.quantizado = None
+        self.risco = None
+        self.regras = None
+        self.emitido = None
+
+
+class MonitorRisco:
+    """
+    Acompanha o risco de muitos pacientes a partir de leituras contínuas
+    (p.ex. febre e saturação de um monitor a cada poucos segundos), sem
+    chamar calcular_risco a cada amostra.
+
+    Para cada par (paciente, doença), cada entrada passa por uma média
+    móvel das últimas `janela` amostras e por uma zona morta: o valor usado
+    no cálculo só muda quando a média se afasta dele mais que
+    `zonas_mortas` (febre, tosse, saturação). Esse valor é então quantizado
+    com `passos` (como em ativar_memo; None desliga) e o motor só é chamado
+    se o ponto quantizado mudou. Uma atualização é emitida na primeira
+    avaliação, quando o risco se afasta da última emitida ao menos
+    `limiar_risco` pontos percentuais ou quando muda o conjunto de regras
+    com grau acima de `grau_minimo`.
+
+    Entradas ausentes numa amostra mantêm o último valor (o monitor pode
+    mandar só febre e saturação; a tosse vem uma vez, p.ex. da triagem);
+    nada é avaliado até as três serem conhecidas. No máximo `max_fluxos`
+    pares ficam em memória: o menos recente é descartado (LRU) e recomeça
+    do zero se voltar a enviar amostras.
+
+    Com `history` (HistoryManager), cada atualização emitida é guardada e
+    gravada em lote (add_lote) quando há `tamanho_lote` pendentes ou a mais
+    antiga tem `intervalo_historico` segundos; descarregar() grava o resto.
+    Pode ser usado por várias threads: o lock do monitor só cobre a tabela
+    de fluxos, os contadores e as pendências; o motor é chamado sob o lock
+    do fluxo, então pacientes diferentes não esperam uns pelos outros.
+    """
+
+    def __init__(self, engine, janela=JANELA_PADRAO, zonas_mortas=ZONAS_MORTAS_PADRAO, passos=PASSOS_MEMO,
+                 limiar_risco=LIMIAR_RISCO_PADRAO, grau_minimo=GRAU_MINIMO_PADRAO, max_fluxos=10_000,
+                 history=None, tamanho_lote=500, intervalo_historico=5.0):
+        if janela < 1:
+            raise ValueError("A janela deve ter ao menos uma amostra")
+        self.engine = engine
+        self.janela = janela
+        self.zonas_mortas = tuple(zonas_mortas)
+        self.passos = tuple(passos) if passos is not None else (None,) * len(ENTRADAS)
+        self.limiar_risco = limiar_risco
+        self.grau_minimo = grau_minimo
+        self.max_fluxos = max_fluxos
+        self.history = history
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_historico = intervalo_historico
+        self._fluxos = OrderedDict()
+        self._pendentes = []
+        self._desde_pendentes = None
+        self._lock = threading.Lock()
+        self.amostras = 0
+        self.avaliacoes = 0
+        self.emitidas = 0
+        self.descartados = 0
+        self.gravadas = 0
+
+    def observar(self, paciente, disease, febre=None, tosse=None, saturacao=None, timestamp=None):
+        """
+        Registra uma amostra. Retorna a atualização (dict com paciente,
+        disease, timestamp, risco, regras [(índice, grau)], entradas e
+        motivo: "inicio", "risco" ou "regras") ou None se nada mudou o
+        bastante. risco é None quando nenhuma regra é acionada.
+        """
+        with self._lock:
+            self.amostras += 1
+            chave = (paciente, disease)
+            fluxo = self._fluxos.get(chave)
+            if fluxo is None:
+                if disease not in self.engine.rulesets:
+                    raise ValueError("Doença desconhecida")
+                fluxo = self._fluxos[chave] = _Fluxo(self.janela)
+                while len(self._fluxos) > self.max_fluxos:
+                    self._fluxos.popitem(last=False)
+                    self.descartados += 1
+            else:
+                self._fluxos.move_to_end(chave)
+
+        with fluxo.lock:
+            avaliou, motivo = self._atualizar(fluxo, disease, (febre, tosse, saturacao))
+            if motivo is not None:
+                fluxo.emitido = (fluxo.risco, self._acionadas(fluxo.regras))
+                atualizacao = {
+                    "paciente": paciente,
+                    "disease": disease,
+                    "timestamp": timestamp or datetime.now(),
+                    "risco": fluxo.risco,
+                    "regras": fluxo.regras,
+                    "entradas": {k: round(v, 6) for k, v in zip(ENTRADAS, fluxo.quantizado)},
+                    "motivo": motivo,
+                }
+
+        with self._lock:
+            self.avaliacoes += avaliou
+            if motivo is None:
+                return None
+            self.emitidas += 1
+            if self.history is not None and atualizacao["risco"] is not None:
+                self._pendentes.append({"timestamp": atualizacao["timestamp"], "disease": disease,
+                                        "inputs": atualizacao["entradas"], "risco": atualizacao["risco"]})
+                if self._desde_pendentes is None:
+                    self._desde_pendentes = time.monotonic()
+            cheio = (len(self._pendentes) >= self.tamanho_lote
+                     or (self._pendentes and time.monotonic() - self._desde_pendentes >= self.intervalo_historico))
+        if cheio:
+            self.descarregar()
+        return atualizacao
+
+    def _atualizar(self, fluxo, disease, amostra):
+        """
+        Aplica a amostra ao fluxo (sob fluxo.lock) e avalia o ponto
+        quantizado se ele mudou. Retorna (avaliou, motivo da emissão ou
+        None). O ponto e o resultado só são guardados depois que o motor
+        respondeu: se ele falhar, a próxima amostra tenta de novo.
+        """
+        for i, x in enumerate(amostra):
+            if x is not None:
+                self._suavizar(fluxo, i, float(x))
+        if None in fluxo.referencia:
+            return False, None
+
+        quantizado = tuple(r if not p else round(r / p) * p for r, p in zip(fluxo.referencia, self.passos))
+        avaliou = quantizado != fluxo.quantizado
+        if avaliou:
+            try:
+                risco, fired, _ = self.engine.calcular_risco(disease, *quantizado)
+            except ValueError as e:
+                if str(e) != SEM_REGRAS:
+                    raise
+                risco, fired = None, []
+            fluxo.quantizado, fluxo.risco, fluxo.regras = quantizado, risco, fired
+        return avaliou, self._motivo(fluxo)
+
+    def _suavizar(self, fluxo, i, x):
+        """Média móvel da entrada i e zona morta sobre o valor aceito."""
+        janela = fluxo.janelas[i]
+        if len(janela) == janela.maxlen:
+            fluxo.somas[i] -= janela[0]
+        janela.append(x)
+        fluxo.somas[i] += x
+        media = fluxo.somas[i] / len(janela)
+        ref = fluxo.referencia[i]
+        if ref is None or abs(media - ref) > self.zonas_mortas[i]:
+            fluxo.referencia[i] = media
+
+    def _acionadas(self, fired):
+        return frozenset(i for i, g in fired if g > self.grau_minimo)
+
+    def _motivo(self, fluxo):
+        if fluxo.emitido is None:
+            return "inicio"
+        risco_emitido, regras_emitidas = fluxo.emitido
+        if (fluxo.risco is None) != (risco_emitido is None) or (
+                fluxo.risco is not None and abs(fluxo.risco - risco_emitido) >= self.limiar_risco):
+            return "risco"
+        if self._acionadas(fluxo.regras) != regras_emitidas:
+            return "regras"
+        return None
+
+    def descarregar(self):
+        """Grava no histórico as atualizações pendentes. Retorna quantas."""
+        with self._lock:
+            pendentes, self._pendentes, self._desde_pendentes = self._pendentes, [], None
+        if not pendentes:
+            return 0
+        with METRICAS.medir("monitor.historico"):
+            self.history.add_lote(pendentes)
+        with self._lock:
+            self.gravadas += len(pendentes)
+        return len(pendentes)
+
+    def encerrar(self, paciente, disease=None):
+        """Esquece o estado do paciente (de uma doença ou de todas)."""
+        with self._lock:
+            for chave in [c for c in self._fluxos if c[0] == paciente and disease in (None, c[1])]:
+                del self._fluxos[chave]
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "fluxos": len(self._fluxos),
+                "amostras": self.amostras,
+                "avaliacoes": self.avaliacoes,
+                "emitidas": self.emitidas,
+                "descartados": self.descartados,
+                "pendentes_historico": len(self._pendentes),
+                "gravadas_historico": self.gravadas,
+            }
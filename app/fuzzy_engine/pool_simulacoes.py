@@ -0,0 +1,139 @@
+# fuzzy_engine/pool_simulacoes.py
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from skfuzzy import control as ctrl
+from skfuzzy.control.controlsystem import RuleOrderGenerator
+
+
+class ControlSystemOrdenado(ctrl.ControlSystem):
+    """
+    ControlSystem que mantém a ordem de cálculo das regras entre chamadas.
+
+    O `ControlSystem.rules` original cria um RuleOrderGenerator novo a cada
+    acesso e refaz a ordenação (vários nx.compose) em todo compute(). Aqui o
+    gerador é persistente; ele mesmo invalida a ordem se o grafo mudar.
+    """
+
+    @property
+    def rules(self):
+        ordem = self.__dict__.get('_ordem_regras')
+        if ordem is None:
+            ordem = self.__dict__['_ordem_regras'] = RuleOrderGenerator(self)
+        return ordem
+
+
+class SimulacaoMarcada(ctrl.ControlSystemSimulation):
+    """
+    ControlSystemSimulation que, quando `marcas` é um dict, anota os instantes
+    (perf_counter) em que o compute() começa a avaliar as regras e a
+    defuzzificar; com o início e o fim do compute() isso separa o tempo de
+    fuzzificação, regras e defuzzificação. Com `marcas` None (padrão) o
+    custo extra é uma verificação por regra.
+    """
+
+    marcas = None
+
+    def compute(self):
+        # Numa entrada já calculada o skfuzzy só copia as saídas guardadas;
+        # se ela não acionou regras não há o que copiar e `output` ficaria
+        # com o risco do paciente anterior (a simulação é reutilizada).
+        self.output = OrderedDict()
+        super().compute()
+
+    def compute_rule(self, rule):
+        marcas = self.marcas
+        if marcas is not None and 'regras' not in marcas:
+            marcas['regras'] = time.perf_counter()
+        super().compute_rule(rule)
+
+    def defuzz_consequents(self):
+        if self.marcas is not None:
+            self.marcas['defuzzificacao'] = time.perf_counter()
+        return super().defuzz_consequents()
+
+
+class PoolSimulacoes:
+    """
+    Uma ControlSystemSimulation por doença, reutilizada entre cálculos.
+
+    O skfuzzy guarda as entradas e os graus em objetos do ControlSystem
+    (Antecedent/Term), compartilhados por todas as simulações do sistema;
+    por isso quem usa a simulação serializa input + compute (e a devolução,
+    que pode resetar) com um lock comum, e o motor nunca tem mais de uma
+    simulação em uso. Guardar várias por doença não acrescentaria nada: o
+    pool só evita recriar a simulação (e refazer a ordem das regras) a cada
+    cálculo. Se a guardada estiver retirada, retirar() cria outra, que é
+    descartada na devolução.
+
+    Como o cache do skfuzzy cresce a cada entrada nova, a simulação é
+    resetada na devolução depois de `reset_a_cada` execuções (o flush
+    automático do skfuzzy fica desligado para que os estados da última
+    execução continuem legíveis até a devolução). `ctrls` é consultado a
+    cada simulação criada; depois de uma recarga das regras, a guardada do
+    ControlSystem antigo é descartada na retirada.
+    """
+
+    def __init__(self, ctrls, reset_a_cada=1000):
+        self.ctrls = ctrls
+        self.reset_a_cada = reset_a_cada
+        self._livres = {}
+        self._lock = threading.Lock()
+        self.criadas = 0
+        self.reusos = 0
+        self.descartadas = 0
+
+    def retirar(self, disease, ctrl=None):
+        """
+        A simulação guardada de `ctrl` (padrão: self.ctrls[disease]) ou uma
+        nova. A guardada de outro ControlSystem (regras recarregadas) é descartada.
+        """
+        if ctrl is None:
+            ctrl = self.ctrls[disease]
+        with self._lock:
+            sim = self._livres.pop(disease, None)
+            if sim is not None:
+                if sim.ctrl is ctrl:
+                    self.reusos += 1
+                    return sim
+                self.descartadas += 1
+            self.criadas += 1
+        return SimulacaoMarcada(ctrl, flush_after_run=2 ** 62)
+
+    def devolver(self, disease, sim):
+        if sim._run >= self.reset_a_cada:
+            sim.reset()
+        with self._lock:
+            if disease not in self._livres:
+                self._livres[disease] = sim
+            else:
+                self.descartadas += 1
+
+    @contextmanager
+    def simulacao(self, disease, ctrl=None):
+        sim = self.retirar(disease, ctrl)
+        try:
+            yield sim
+        finally:
+            self.devolver(disease, sim)
+
+    def descartar(self, disease):
+        """Descarta a simulação guardada de uma doença (p.ex. removida do registro de regras)."""
+        with self._lock:
+            self.descartadas += self._livres.pop(disease, None) is not None
+
+    def limpar(self):
+        """Descarta todas as simulações guardadas (p.ex. após trocar as regras)."""
+        with self._lock:
+            self._livres.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "criadas": self.criadas,
+                "reusos": self.reusos,
+                "descartadas": self.descartadas,
+                "guardadas": sorted(self._livres),
+            }
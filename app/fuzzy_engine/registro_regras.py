@@ -0,0 +1,262 @@
+# fuzzy_engine/registro_regras.py
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+
+from fuzzy_engine.definicoes import ConjuntoRegras, constantes_sugeno, criar_regras
+
+
+def estimar_bytes(obj, _vistos=None):
+    """
+    Bytes aproximados de `obj` e de tudo o que ele referencia: arrays NumPy
+    pelo nbytes, contêineres e objetos pelo sys.getsizeof mais o conteúdo.
+    Objetos referenciados mais de uma vez contam uma vez só.
+    """
+    vistos = set() if _vistos is None else _vistos
+    if id(obj) in vistos:
+        return 0
+    vistos.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is not None else 0)
+    total = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        total += sum(estimar_bytes(k, vistos) + estimar_bytes(v, vistos) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        total += sum(estimar_bytes(x, vistos) for x in obj)
+    elif hasattr(obj, "__dict__"):
+        total += estimar_bytes(vars(obj), vistos)
+    return total
+
+
+class _Item:
+    """Um conjunto de regras do registro: definição, forma compilada (se houver) e contadores."""
+
+    __slots__ = ("nome", "ordem", "origem", "spec", "conjunto", "bytes", "compilacao_s", "compilacoes", "usos")
+
+    def __init__(self, nome, ordem, origem, spec, conjunto=None):
+        self.nome = nome
+        self.ordem = ordem
+        self.origem = origem
+        self.spec = spec
+        self.conjunto = conjunto
+        self.bytes = 0 if conjunto is None else estimar_bytes(conjunto.compilado)
+        self.compilacao_s = None
+        self.compilacoes = 0
+        self.usos = 0
+
+    def copia(self):
+        c = _Item.__new__(_Item)
+        for k in _Item.__slots__:
+            setattr(c, k, getattr(self, k))
+        return c
+
+
+class RegistroRegras(Mapping):
+    """
+    {doença: ConjuntoRegras} que compila cada conjunto no primeiro acesso e
+    mantém só os usados recentemente (LRU).
+
+    Guarda a definição (o conteúdo já lido do arquivo, validado com
+    criar_regras) de cada doença; a forma compilada, as regras e o
+    ControlSystem do skfuzzy só existem para as doenças em uso. Com
+    `max_conjuntos` e/ou `max_bytes` (estimativa de estimar_bytes sobre a
+    forma compilada), as menos usadas recentemente são descartadas e
+    recompiladas da definição guardada se voltarem a ser pedidas (o mesmo
+    resultado: os arquivos não são relidos). Doenças `fixadas` nunca saem;
+    as carregadas já compiladas, sem definição (snapshot), também não.
+    `ao_remover(doença)` é chamado a cada descarte (o motor solta ali a
+    simulação do skfuzzy da doença). `inferencia` ("mamdani", "sugeno" ou
+    {doença: inferência}, Mamdani para as omitidas) escolhe como cada
+    doença é compilada; no Sugeno, com as constantes do bloco "sugeno" do
+    arquivo, se houver.
+
+    Iterar, `in` e len() não compilam nada; a ordem é a dos arquivos
+    (ordem, nome). Não muda depois de criado, exceto pelo cache: recarregar
+    as regras cria outro registro com derivar().
+    """
+
+    def __init__(self, itens, entradas=None, saida=None, modo="amostrado", max_conjuntos=None, max_bytes=None,
+                 fixadas=(), ao_remover=None, inferencia="mamdani"):
+        """`itens`: (nome, ordem, origem, spec, ConjuntoRegras ou None)."""
+        itens = [i if isinstance(i, _Item) else _Item(*i) for i in itens]
+        nomes = [i.nome for i in itens]
+        repetidos = {n for n in nomes if nomes.count(n) > 1}
+        if repetidos:
+            raise ValueError(f"Doença definida em mais de um arquivo: {', '.join(sorted(repetidos))}")
+        self._itens = {i.nome: i for i in sorted(itens, key=lambda i: (i.ordem, i.nome))}
+        self.entradas = entradas
+        self.saida = saida
+        self.modo = modo
+        self.inferencia = inferencia
+        self.max_conjuntos = max_conjuntos
+        self.max_bytes = max_bytes
+        self.fixadas = set(fixadas)
+        self.ao_remover = ao_remover
+        self._lock = threading.RLock()
+        # doenças compiladas, da usada há mais tempo à mais recente
+        self._lru = OrderedDict((i.nome, None) for i in self._itens.values() if i.conjunto is not None)
+        self.bytes = sum(i.bytes for i in self._itens.values() if i.conjunto is not None)
+        self.acertos = 0
+        self.faltas = 0
+        self.remocoes = 0
+        for nome in self.fixadas & self._itens.keys():
+            self[nome]
+        self._remover_excedentes()
+
+    # --- Mapping ---
+    def __getitem__(self, disease):
+        item = self._itens[disease]
+        with self._lock:
+            item.usos += 1
+            if item.conjunto is not None:
+                self.acertos += 1
+                self._lru.move_to_end(disease)
+                return item.conjunto
+            self.faltas += 1
+            conjunto = self._compilar(item)
+            self._lru[disease] = None
+            self._remover_excedentes(manter=disease)
+            return conjunto
+
+    def __iter__(self):
+        return iter(self._itens)
+
+    def __len__(self):
+        return len(self._itens)
+
+    def __contains__(self, disease):
+        return disease in self._itens
+
+    def _compilar(self, item):
+        t0 = time.perf_counter()
+        try:
+            rules = criar_regras(item.spec, self.entradas, self.saida)
+            conjunto = ConjuntoRegras(item.nome, rules, self.entradas, self.saida, origem=item.origem,
+                                      ordem=item.ordem, modo=self.modo, inferencia=self.inferencia_de(item.nome),
+                                      constantes=constantes_sugeno(item.spec, self.saida))
+        except (KeyError, TypeError, ValueError) as e:
+            origem = item.origem.name if item.origem is not None else item.nome
+            raise ValueError(f"{origem}: {e}") from None
+        item.compilacao_s = time.perf_counter() - t0
+        item.compilacoes += 1
+        item.bytes = estimar_bytes(conjunto.compilado)
+        item.conjunto = conjunto
+        self.bytes += item.bytes
+        return conjunto
+
+    def _excedido(self):
+        return ((self.max_conjuntos is not None and len(self._lru) > self.max_conjuntos)
+                or (self.max_bytes is not None and self.bytes > self.max_bytes))
+
+    def _remover_excedentes(self, manter=None):
+        with self._lock:
+            removiveis = (n for n in list(self._lru)
+                          if n != manter and n not in self.fixadas and self._itens[n].spec is not None)
+            while self._excedido():
+                nome = next(removiveis, None)
+                if nome is None:
+                    break  # só restam fixadas (ou a que acabou de ser pedida)
+                item = self._itens[nome]
+                del self._lru[nome]
+                self.bytes -= item.bytes
+                item.conjunto = None
+                self.remocoes += 1
+                if self.ao_remover is not None:
+                    self.ao_remover(nome)
+
+    # --- consulta sem compilar ---
+    def inferencia_de(self, disease):
+        """Inferência ("mamdani"/"sugeno") com que a doença é compilada."""
+        if isinstance(self.inferencia, dict):
+            return self.inferencia.get(disease, "mamdani")
+        return self.inferencia
+
+    def origem(self, disease):
+        return self._itens[disease].origem
+
+    def compilada(self, disease):
+        """True se a doença está compilada agora."""
+        return self._itens[disease].conjunto is not None
+
+    def regras(self, disease):
+        """
+        Regras do skfuzzy da doença (None se veio de um snapshot). Se ela
+        não estiver compilada, cria as regras da definição sem compilar nem
+        mexer no LRU (p.ex. para listá-las).
+        """
+        item = self._itens[disease]
+        conjunto = item.conjunto
+        if conjunto is not None:
+            return conjunto.rules
+        return criar_regras(item.spec, self.entradas, self.saida)
+
+    # --- fixar / limites ---
+    def fixar(self, *doencas):
+        """Mantém as doenças sempre compiladas (compila as que ainda não estão)."""
+        for disease in doencas:
+            self._itens[disease]  # KeyError se não existir
+        with self._lock:
+            self.fixadas.update(doencas)
+            for disease in doencas:
+                self[disease]
+            self._remover_excedentes()
+
+    def soltar(self, *doencas):
+        """Devolve as doenças ao LRU (podem ser descartadas)."""
+        with self._lock:
+            self.fixadas.difference_update(doencas)
+            self._remover_excedentes()
+
+    def limitar(self, max_conjuntos=None, max_bytes=None):
+        """Troca os limites (None = sem limite) e descarta o que passar deles."""
+        with self._lock:
+            self.max_conjuntos = max_conjuntos
+            self.max_bytes = max_bytes
+            self._remover_excedentes()
+
+    def derivar(self, novos, trocados=None, entradas=None, saida=None):
+        """
+        Registro novo com os mesmos limites e doenças fixadas: `novos`
+        (itens como no construtor) mais as doenças deste registro cujo
+        arquivo não está em `trocados` (com o que já estiver compilado).
+        trocados=None substitui tudo (p.ex. quando as variáveis mudaram).
+        """
+        with self._lock:
+            mantidos = [] if trocados is None else [
+                i.copia() for i in self._itens.values() if i.origem not in trocados]
+        return RegistroRegras(mantidos + list(novos), entradas if entradas is not None else self.entradas,
+                              saida if saida is not None else self.saida, self.modo, self.max_conjuntos,
+                              self.max_bytes, self.fixadas, self.ao_remover, self.inferencia)
+
+    def estatisticas(self):
+        """
+        Totais do cache e, por doença, se está compilada/fixada, bytes
+        estimados, tempo da última compilação, compilações e acessos.
+        """
+        with self._lock:
+            return {
+                "doencas": len(self._itens),
+                "compiladas": len(self._lru),
+                "bytes": self.bytes,
+                "max_conjuntos": self.max_conjuntos,
+                "max_bytes": self.max_bytes,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "remocoes": self.remocoes,
+                "por_doenca": {
+                    nome: {
+                        "compilada": i.conjunto is not None,
+                        "inferencia": self.inferencia_de(nome),
+                        "fixada": nome in self.fixadas,
+                        "bytes": i.bytes,
+                        "compilacao_ms": None if i.compilacao_s is None else round(i.compilacao_s * 1e3, 3),
+                        "compilacoes": i.compilacoes,
+                        "usos": i.usos,
+                    }
+                    for nome, i in self._itens.items()
+                },
+            }
@@ -0,0 +1,918 @@
+# fuzzy_engine/regras_compiladas.py
+import copy
+import hashlib
+import json
+import math
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+# incrementar quando o formato salvo por RegrasCompiladas.salvar mudar
+VERSAO_FORMATO = 3
+
+# "amostrado": pertinências e agregado interpolados nos universos discretos,
+# como o skfuzzy; "analitico": fórmulas fechadas, sem depender da resolução
+MODOS = ("amostrado", "analitico")
+# funções de pertinência aceitas no modo analítico (na saída, só as lineares por partes)
+ANALITICAS_ENTRADA = ("trimf", "trapmf", "gaussmf")
+ANALITICAS_SAIDA = ("trimf", "trapmf")
+# "mamdani": centroide do agregado dos termos recortados; "sugeno": média
+# das constantes dos termos da saída ponderada pela ativação das regras
+INFERENCIAS = ("mamdani", "sugeno")
+
+
+def assinatura_regras(variaveis, saida, rules):
+    """
+    Hash (sha256 hex) da definição de um conjunto de regras: universos,
+    funções de pertinência de todas as variáveis e o texto das regras.
+    Muda sempre que qualquer um desses itens for alterado.
+    """
+    h = hashlib.sha256()
+    for v in list(variaveis) + [saida]:
+        h.update(v.label.encode())
+        h.update(np.ascontiguousarray(v.universe, dtype=np.float64).tobytes())
+        for nome, termo in v.terms.items():
+            h.update(nome.encode())
+            h.update(np.ascontiguousarray(termo.mf, dtype=np.float64).tobytes())
+    for r in rules:
+        h.update(f"{r.antecedent}=>{r.consequent}".encode())
+    return h.hexdigest()
+
+
+def _parametros(termo):
+    """[tipo, parâmetros...] guardados pelo definicoes.criar_variaveis (ou None)."""
+    p = getattr(termo, "parametros", None)
+    return None if p is None else [p[0], *p[1]]
+
+
+def _trapezio(x, a, b, c, d):
+    """Trapézio (a, b, c, d) em x; a == b ou c == d são lados verticais (trimf com ombro)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sobe = np.where(b > a, (x - a) / (b - a), np.where(x >= a, 1.0, 0.0))
+        desce = np.where(d > c, (d - x) / (d - c), np.where(x <= d, 1.0, 0.0))
+    return np.clip(np.minimum(sobe, desce), 0.0, 1.0)
+
+
+def _como_trapezio(tipo, params):
+    """Parâmetros (a, b, c, d) de um trimf/trapmf."""
+    if tipo == "trimf":
+        a, b, c = params
+        return a, b, b, c
+    return tuple(params)
+
+
+def _grau(x, p):
+    """Pertinência de um valor escalar; p vem de RegrasCompiladas._preparar_analitico."""
+    if p[0] == "g":
+        return math.exp(-(x - p[1]) ** 2 / p[2])
+    _, a, b, c, d = p
+    if x < a or x > d:
+        return 0.0
+    if x < b:
+        return (x - a) / (b - a)
+    if x > c:
+        return (d - x) / (d - c)
+    return 1.0
+
+
+class RegrasCompiladas:
+    """
+    Forma numérica densa de um conjunto de regras Mamdani, avaliada com
+    operações vetoriais do NumPy sobre lotes de entradas.
+
+    Cada regra vira uma linha nas matrizes abaixo (T = total de termos de
+    entrada, V = variáveis de entrada, K = termos da saída):
+      mascara   (R x 2T) termos usados pela regra; as T colunas finais são
+                os mesmos termos negados (NOT => 1 - grau)
+      presente  (R x V)  variáveis que aparecem no antecedente
+      op_ou     (R,)     True se as variáveis são combinadas por OR (max),
+                         False se por AND (min)
+      pesos     (R x K)  peso de cada termo da saída ativado pela regra
+    Dentro de uma mesma variável os termos são combinados por OR, o que
+    cobre regras como "febre alta E (tosse moderada OU tosse forte)".
+
+    A compilação lê os objetos do skfuzzy, mas a avaliação usa apenas os
+    arrays copiados aqui; salvar()/carregar() permitem usar a forma
+    compilada sem importar o skfuzzy (e, com ele, o matplotlib).
+
+    Com modo="analitico" as pertinências de entrada (trimf, trapmf,
+    gaussmf) são calculadas pela fórmula no valor exato e o centroide da
+    saída (trimf/trapmf) é integrado sobre os trapézios recortados, sem
+    amostrar os universos: o custo não depende do passo dos universos e o
+    resultado não tem erro de discretização. Requer os parâmetros das
+    pertinências, que definicoes.criar_variaveis guarda em cada termo.
+
+    com_sugeno() troca a defuzzificação por Sugeno de ordem zero: cada
+    termo da saída vale uma constante e o risco é a média das constantes
+    ponderada por ativação x peso de cada regra, sem universo de saída.
+    cortes(), defuzzificar() e centroides() continuam sendo os do Mamdani.
+
+    Na avaliação de uma entrada, um índice por intervalos de suporte
+    (_preparar_indice) descarta antes do cálculo as regras cujo antecedente
+    é zero no valor dado, de modo que o custo por consulta acompanha o
+    número de regras que podem disparar, não o total de regras.
+    """
+
+    # False avalia todas as regras em avaliar_um (para comparar com o índice)
+    usar_indice = True
+    # constantes Sugeno por termo da saída (K,); None = Mamdani
+    sugeno = None
+
+    def __init__(self, variaveis, saida, rules, modo="amostrado"):
+        self.nomes_variaveis = [v.label for v in variaveis]
+        self.universos = [np.asarray(v.universe, dtype=np.float64) for v in variaveis]
+        self.mfs_entrada = [np.array([v[t].mf for t in v.terms.keys()], dtype=np.float64)
+                            for v in variaveis]
+        self.termos = [(v.label, t) for v in variaveis for t in v.terms.keys()]
+        self.nome_saida = saida.label
+        self.termos_saida = list(saida.terms.keys())
+        self.assinatura_amostrada = assinatura_regras(variaveis, saida, rules)
+        self.params_entrada = [[_parametros(v[t]) for t in v.terms.keys()] for v in variaveis]
+        self.params_saida = [_parametros(saida[t]) for t in self.termos_saida]
+
+        # índice global de cada termo e variável a que pertence
+        self._idx_termo = {}
+        var_termo = []
+        for iv, v in enumerate(variaveis):
+            for t in v.terms.keys():
+                self._idx_termo[(v.label, t)] = len(var_termo)
+                var_termo.append(iv)
+        self._var_termo = np.array(var_termo, dtype=np.intp)
+
+        n_t = len(self.termos)
+        n_r = len(rules)
+        self.mascara = np.zeros((n_r, 2 * n_t), dtype=bool)
+        self.presente = np.zeros((n_r, len(variaveis)), dtype=bool)
+        self.op_ou = np.zeros(n_r, dtype=bool)
+        self.pesos = np.zeros((n_r, len(self.termos_saida)), dtype=np.float64)
+
+        for r, rule in enumerate(rules):
+            self._compilar_antecedente(r, rule.antecedent)
+            for c in rule.consequent:
+                if c.term.parent is not saida:
+                    raise ValueError(f"Consequente fora da saída '{saida.label}': {c}")
+                k = self.termos_saida.index(c.term.label)
+                self.pesos[r, k] = max(self.pesos[r, k], float(c.weight))
+
+        # funções de pertinência da saída, amostradas no universo
+        self.universo_saida = np.asarray(saida.universe, dtype=np.float64)
+        self.mfs_saida = np.array([saida[t].mf for t in self.termos_saida], dtype=np.float64)
+        self._preparar_escalar()
+        self._definir_modo(modo)
+
+    # --- modo de avaliação ---
+    def _definir_modo(self, modo):
+        if modo not in MODOS:
+            raise ValueError(f"Modo desconhecido: {modo} (use {', '.join(MODOS)})")
+        self.modo = modo
+        if modo == "analitico":
+            self._preparar_analitico()
+        self._assinar()
+        # o suporte dos termos depende do modo (amostrado x fórmula)
+        self._preparar_indice()
+
+    def _assinar(self):
+        # tabelas e caches indexados pela assinatura não misturam modos nem inferências
+        if self.modo == "amostrado" and self.sugeno is None:
+            self.assinatura = self.assinatura_amostrada
+            return
+        h = hashlib.sha256(self.assinatura_amostrada.encode())
+        if self.modo != "amostrado":
+            h.update(json.dumps([self.modo, self.params_entrada, self.params_saida]).encode())
+        if self.sugeno is not None:
+            h.update(json.dumps(["sugeno", self.sugeno.tolist()]).encode())
+        self.assinatura = h.hexdigest()
+
+    def com_modo(self, modo):
+        """Cópia avaliada no modo indicado (as matrizes são compartilhadas)."""
+        obj = copy.copy(self)
+        obj._definir_modo(modo)
+        return obj
+
+    @property
+    def inferencia(self):
+        return "mamdani" if self.sugeno is None else "sugeno"
+
+    def com_sugeno(self, constantes):
+        """
+        Cópia avaliada por Sugeno de ordem zero com as `constantes` dos termos
+        da saída ({termo: valor} ou sequência na ordem de termos_saida);
+        None volta ao Mamdani. As matrizes são compartilhadas.
+        """
+        obj = copy.copy(self)
+        obj._definir_sugeno(constantes)
+        obj._assinar()
+        return obj
+
+    def _definir_sugeno(self, constantes):
+        if constantes is None:
+            self.sugeno = self._sugeno_lista = None
+            return
+        if isinstance(constantes, dict):
+            faltam = set(self.termos_saida) ^ set(constantes)
+            if faltam:
+                raise ValueError(f"Constantes Sugeno devem cobrir os termos de '{self.nome_saida}' "
+                                 f"({', '.join(self.termos_saida)}): {', '.join(sorted(faltam))}")
+            constantes = [constantes[t] for t in self.termos_saida]
+        z = np.array(constantes, dtype=np.float64)
+        if z.shape != (len(self.termos_saida),) or not np.isfinite(z).all():
+            raise ValueError(f"Constantes Sugeno inválidas: {constantes}")
+        self.sugeno = z
+        self._sugeno_lista = z.tolist()
+
+    def centroides_saida(self):
+        """
+        {termo: centroide} de cada termo da saída sozinho e sem corte (o
+        risco Mamdani de uma regra isolada com ativação 1): as constantes
+        Sugeno que reproduzem o Mamdani quando só um termo está ativo.
+        """
+        riscos = self.defuzzificar(np.eye(len(self.termos_saida)))
+        return dict(zip(self.termos_saida, riscos.tolist()))
+
+    def _preparar_analitico(self):
+        """Valida os parâmetros e monta as estruturas do modo analítico."""
+        for (var, termo), p in zip(self.termos, (p for ps in self.params_entrada for p in ps)):
+            if p is None or p[0] not in ANALITICAS_ENTRADA:
+                tipo = "sem parâmetros" if p is None else p[0]
+                raise ValueError(f"{var}.{termo}: pertinência {tipo} não suportada no modo analítico "
+                                 f"(use {', '.join(ANALITICAS_ENTRADA)})")
+        for termo, p in zip(self.termos_saida, self.params_saida):
+            if p is None or p[0] not in ANALITICAS_SAIDA:
+                tipo = "sem parâmetros" if p is None else p[0]
+                raise ValueError(f"{self.nome_saida}.{termo}: pertinência {tipo} não suportada no modo "
+                                 f"analítico (use {', '.join(ANALITICAS_SAIDA)})")
+
+        # entradas: ("t", a, b, c, d) ou ("g", média, 2 sigma²) por termo
+        self._pert_listas = [
+            [("g", p[1], 2.0 * p[2] ** 2) if p[0] == "gaussmf" else ("t", *_como_trapezio(p[0], p[1:]))
+             for p in ps]
+            for ps in self.params_entrada
+        ]
+        self._limites_entrada = [(float(u[0]), float(u[-1])) for u in self.universos]
+
+        # saída: trapézios (K x 4), vértices dentro do universo e pares de termos
+        self._trap_saida = np.array([_como_trapezio(p[0], p[1:]) for p in self.params_saida], dtype=np.float64)
+        lo, hi = float(self.universo_saida[0]), float(self.universo_saida[-1])
+        self._limites_saida = (lo, hi)
+        self._vertices_saida = np.unique(np.clip(np.append(self._trap_saida.ravel(), [lo, hi]), lo, hi))
+        self._pares = np.triu_indices(len(self.termos_saida), k=1)
+        self._trap_listas = [("t", *map(float, linha)) for linha in self._trap_saida]
+
+    # --- persistência ---
+    _ARRAYS = ("mascara", "presente", "op_ou", "pesos", "universo_saida", "mfs_saida", "_var_termo")
+
+    def salvar(self, path):
+        """Grava a forma compilada num .npz (apenas arrays e textos)."""
+        meta, dados = self.exportar()
+        np.savez(path, meta=json.dumps(meta), **dados)
+
+    @classmethod
+    def carregar(cls, path):
+        """Lê um .npz gravado por salvar(), sem depender do skfuzzy."""
+        with np.load(path) as dados:
+            meta = json.loads(str(dados["meta"]))
+            return cls.importar(meta, {k: dados[k] for k in dados.files if k != "meta"})
+
+    def exportar(self):
+        """(metadados serializáveis em JSON, {nome: array}) da forma compilada."""
+        dados = {k: getattr(self, k) for k in self._ARRAYS}
+        for i, (u, mfs) in enumerate(zip(self.universos, self.mfs_entrada)):
+            dados[f"universo_{i}"] = u
+            dados[f"mfs_{i}"] = mfs
+        meta = {
+            "versao": VERSAO_FORMATO,
+            "nomes_variaveis": self.nomes_variaveis,
+            "termos": self.termos,
+            "nome_saida": self.nome_saida,
+            "termos_saida": self.termos_saida,
+            "assinatura": self.assinatura_amostrada,
+            "params_entrada": self.params_entrada,
+            "params_saida": self.params_saida,
+            "modo": self.modo,
+            "sugeno": None if self.sugeno is None else self.sugeno.tolist(),
+        }
+        return meta, dados
+
+    @classmethod
+    def importar(cls, meta, dados):
+        """
+        Inverso de exportar(). Os arrays são usados sem cópia: podem ser
+        somente leitura (p.ex. mapeados de um snapshot com mmap).
+        """
+        if meta["versao"] != VERSAO_FORMATO:
+            raise ValueError(f"Formato de regras compiladas incompatível: {meta['versao']}")
+        obj = cls.__new__(cls)
+        for k in cls._ARRAYS:
+            setattr(obj, k, dados[k])
+        n_v = len(meta["nomes_variaveis"])
+        obj.universos = [dados[f"universo_{i}"] for i in range(n_v)]
+        obj.mfs_entrada = [dados[f"mfs_{i}"] for i in range(n_v)]
+        obj.nomes_variaveis = meta["nomes_variaveis"]
+        obj.termos = [tuple(t) for t in meta["termos"]]
+        obj.nome_saida = meta["nome_saida"]
+        obj.termos_saida = meta["termos_saida"]
+        obj.assinatura_amostrada = meta["assinatura"]
+        obj.params_entrada = meta["params_entrada"]
+        obj.params_saida = meta["params_saida"]
+        obj._idx_termo = {t: i for i, t in enumerate(obj.termos)}
+        obj._preparar_escalar()
+        obj._definir_sugeno(meta["sugeno"])
+        obj._definir_modo(meta["modo"])
+        return obj
+
+    def limites(self):
+        """Intervalos válidos das entradas: {'febre': (min, max), ...}."""
+        return {n: (float(u[0]), float(u[-1])) for n, u in zip(self.nomes_variaveis, self.universos)}
+
+    def mesmas_variaveis(self, outro):
+        """True se `outro` tem as mesmas variáveis, pertinências, saída e modo."""
+        if (self.modo, self.termos, self.termos_saida, self.params_entrada, self.params_saida) != \
+                (outro.modo, outro.termos, outro.termos_saida, outro.params_entrada, outro.params_saida):
+            return False
+        arrays = self.universos + self.mfs_entrada + [self.universo_saida, self.mfs_saida]
+        outros = outro.universos + outro.mfs_entrada + [outro.universo_saida, outro.mfs_saida]
+        return all(np.array_equal(a, b) for a, b in zip(arrays, outros))
+
+    # --- compilação ---
+    def _folhas(self, expr, kind):
+        """Achata uma cadeia de nós do mesmo operador ('and'/'or')."""
+        from skfuzzy.control.term import TermAggregate
+
+        if isinstance(expr, TermAggregate) and expr.kind == kind:
+            return self._folhas(expr.term1, kind) + self._folhas(expr.term2, kind)
+        return [expr]
+
+    def _termo(self, expr):
+        """Retorna (coluna na máscara, variável) de um termo simples ou NOT termo."""
+        from skfuzzy.control.term import Term, TermAggregate
+
+        negado = False
+        if isinstance(expr, TermAggregate) and expr.kind == 'not':
+            negado, expr = True, expr.term1
+        if not isinstance(expr, Term):
+            raise ValueError(f"Antecedente não suportado na forma compilada: {expr}")
+        idx = self._idx_termo[(expr.parent.label, expr.label)]
+        return idx + (len(self.termos) if negado else 0), int(self._var_termo[idx])
+
+    def _compilar_antecedente(self, r, antecedente):
+        from skfuzzy.control.term import TermAggregate
+
+        if isinstance(antecedente, TermAggregate) and antecedente.kind == 'or':
+            self.op_ou[r] = True
+            grupos = [[f] for f in self._folhas(antecedente, 'or')]
+        else:
+            grupos = [self._folhas(f, 'or') for f in self._folhas(antecedente, 'and')]
+
+        for grupo in grupos:
+            variaveis_grupo = set()
+            for folha in grupo:
+                col, iv = self._termo(folha)
+                self.mascara[r, col] = True
+                variaveis_grupo.add(iv)
+            if len(variaveis_grupo) != 1:
+                raise ValueError(f"OR entre variáveis diferentes dentro de AND não é suportado: {antecedente}")
+            iv = variaveis_grupo.pop()
+            if not self.op_ou[r] and self.presente[r, iv]:
+                raise ValueError(f"Variável '{self.nomes_variaveis[iv]}' repetida em AND: {antecedente}")
+            self.presente[r, iv] = True
+
+    # --- avaliação ---
+    def fuzzificar(self, entradas):
+        """
+        entradas: lista de arrays (N,), um por variável, na ordem de `variaveis`.
+        Retorna a matriz de graus (N x T). Valores fora do universo são
+        recortados aos limites, como faz o ControlSystemSimulation.
+        """
+        return np.concatenate([self.fuzzificar_variavel(iv, x) for iv, x in enumerate(entradas)], axis=-1)
+
+    def fuzzificar_variavel(self, iv, x):
+        """Graus (N x termos da variável) dos valores x (N,) da variável de índice iv."""
+        if self.modo == "analitico":
+            lo, hi = self._limites_entrada[iv]
+            x = np.clip(np.asarray(x, dtype=np.float64), lo, hi)
+            colunas = [np.exp(-(x - p[1]) ** 2 / p[2]) if p[0] == "g" else _trapezio(x, *p[1:])
+                       for p in self._pert_listas[iv]]
+        else:
+            u = self.universos[iv]
+            x = np.clip(np.asarray(x, dtype=np.float64), u[0], u[-1])
+            colunas = [np.interp(x, u, mf, left=0.0, right=0.0) for mf in self.mfs_entrada[iv]]
+        return np.stack(colunas, axis=-1)
+
+    def ativacoes(self, graus, regras=None):
+        """
+        Grau de ativação de cada regra (N x R) a partir dos graus (N x T).
+        `regras` (máscara booleana ou índices) restringe o cálculo a essas regras.
+        """
+        mascara, presente, op_ou = self.mascara, self.presente, self.op_ou
+        if regras is not None:
+            mascara, presente, op_ou = mascara[regras], presente[regras], op_ou[regras]
+        ext = np.concatenate([graus, 1.0 - graus], axis=-1)
+        # (N, R, 2T): graus mascarados; zeros fora da máscara não alteram o max
+        m = ext[:, None, :] * mascara[None, :, :]
+        var_col = np.concatenate([self._var_termo, self._var_termo])
+        por_var = np.stack([m[:, :, var_col == iv].max(axis=-1)
+                            for iv in range(len(self.nomes_variaveis))], axis=-1)
+        e = np.where(presente[None], por_var, 1.0).min(axis=-1)
+        ou = np.where(presente[None], por_var, 0.0).max(axis=-1)
+        return np.where(op_ou[None], ou, e)
+
+    def cortes(self, ativ):
+        """Nível de corte de cada termo da saída (N x K), acumulado por max."""
+        return (ativ[:, :, None] * self.pesos[None, :, :]).max(axis=1)
+
+    def saida(self, ativ):
+        """Risco (N,) das ativações (N x R) pela inferência da forma compilada."""
+        if self.sugeno is None:
+            return self.defuzzificar(self.cortes(ativ))
+        return self.media_sugeno(ativ)
+
+    def media_sugeno(self, ativ, constantes=None):
+        """
+        Sugeno de ordem zero: soma de ativação x peso x constante sobre
+        regras e termos, dividida pela soma de ativação x peso. NaN onde
+        nada ativou. `constantes` (K,) tem como padrão self.sugeno.
+        """
+        forcas = ativ @ self.pesos
+        total = forcas.sum(axis=1)
+        z = self.sugeno if constantes is None else np.asarray(constantes, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(total > 0, (forcas @ z) / total, np.nan)
+
+    def defuzzificar(self, cortes):
+        """
+        Centroide do agregado (max dos termos recortados) para cada linha.
+
+        Reproduz o CrispValueCalculator do skfuzzy: o universo é acrescido
+        dos pontos onde cada termo cruza seu nível de corte e a área/momento
+        são integrados exatamente sobre a interpolação linear. Linhas sem
+        nenhuma ativação retornam NaN (o skfuzzy não gera saída nesse caso).
+        """
+        if self.modo == "analitico":
+            return self._defuzzificar_analitico(cortes)
+        u = self.universo_saida
+        mfs = self.mfs_saida
+        n = cortes.shape[0]
+        du = np.diff(u)
+        dmf = np.diff(mfs, axis=1)
+        pontos = [np.broadcast_to(u, (n, u.size))]
+        for k in range(mfs.shape[0]):
+            c = cortes[:, k:k + 1]
+            cruza = np.diff(mfs[k][None, :] >= c, axis=1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                xc = u[:-1] + (c - mfs[k][:-1]) * du / dmf[k]
+            # posições sem cruzamento viram duplicatas de u[0] (largura zero)
+            pontos.append(np.where(cruza, xc, u[0]))
+        xs = np.sort(np.concatenate(pontos, axis=1), axis=1)
+
+        y = np.zeros_like(xs)
+        for k in range(mfs.shape[0]):
+            np.maximum(y, np.minimum(cortes[:, k:k + 1], np.interp(xs, u, mfs[k])), out=y)
+
+        x1, x2 = xs[:, :-1], xs[:, 1:]
+        y1, y2 = y[:, :-1], y[:, 1:]
+        h = x2 - x1
+        area = 0.5 * h * (y1 + y2)
+        momento = x1 * area + h * h * (y2 + 0.5 * y1) / 3.0
+        # mesmo piso (eps) que skfuzzy.defuzzify.centroid usa no denominador
+        area_total = np.fmax(area.sum(axis=1), np.finfo(float).eps)
+        return np.where(y.sum(axis=1) > 0, momento.sum(axis=1) / area_total, np.nan)
+
+    def _recortados(self, x, cortes):
+        """Termos da saída recortados (N x S x K) nos pontos x (N x S)."""
+        a, b, c, d = self._trap_saida.T
+        return np.minimum(cortes[:, None, :], _trapezio(x[:, :, None], a, b, c, d))
+
+    def _defuzzificar_analitico(self, cortes):
+        """
+        Centroide exato do agregado de trapézios recortados.
+
+        O agregado é linear por partes; suas quebras estão entre os vértices
+        dos trapézios, os pontos onde cada termo atinge seu corte e os
+        cruzamentos entre termos. Com as duas primeiras listas cada termo é
+        uma reta em cada intervalo; os cruzamentos de cada par de retas
+        dentro do intervalo completam as quebras do max. Cada trecho é então
+        integrado pela fórmula (área e momento de um trapézio), com os
+        valores tomados no interior do trecho, o que trata lados verticais.
+        """
+        n = cortes.shape[0]
+        lo, hi = self._limites_saida
+        a, b, c, d = self._trap_saida.T
+        vertices = np.broadcast_to(self._vertices_saida, (n, self._vertices_saida.size))
+        xs = np.concatenate([vertices, a + cortes * (b - a), d - cortes * (d - c)], axis=1)
+        xs = np.sort(np.clip(xs, lo, hi), axis=1)
+
+        # cruzamentos de cada par de termos dentro de cada intervalo
+        x1, h = xs[:, :-1], np.diff(xs, axis=1)
+        g1 = self._recortados(x1 + h / 3.0, cortes)
+        g2 = self._recortados(x1 + 2.0 * h / 3.0, cortes)
+        i, j = self._pares
+        d1, d2 = g1[..., i] - g1[..., j], g2[..., i] - g2[..., j]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (1.0 + d1 / (d1 - d2)) / 3.0  # posição relativa no intervalo onde a diferença zera
+            xc = np.where((d1 != d2) & (t > 0.0) & (t < 1.0), x1[..., None] + t * h[..., None], lo)
+        xs = np.sort(np.concatenate([xs, xc.reshape(n, -1)], axis=1), axis=1)
+
+        # o max é uma reta em cada trecho: valores a 1/3 e 2/3 do trecho
+        x1, h = xs[:, :-1], np.diff(xs, axis=1)
+        y1 = self._recortados(x1 + h / 3.0, cortes).max(axis=-1)
+        y2 = self._recortados(x1 + 2.0 * h / 3.0, cortes).max(axis=-1)
+        area = 0.5 * h * (y1 + y2)
+        momento = (x1 + 0.5 * h) * area + 0.25 * h * h * (y2 - y1)
+        area_total = area.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(area_total > 0, momento.sum(axis=1) / area_total, np.nan)
+
+    # --- avaliação de uma entrada ---
+    def _preparar_escalar(self):
+        """
+        Índices das matrizes em listas Python para avaliar uma única entrada
+        sem o custo fixo das operações NumPy sobre lotes: por regra, o
+        operador e, para cada variável presente, as colunas (termos) em OR.
+        """
+        self._u_listas = [u.tolist() for u in self.universos]
+        self._mfs_listas = [mfs.tolist() for mfs in self.mfs_entrada]
+        var_col = np.concatenate([self._var_termo, self._var_termo])
+        self._regras_indices = [
+            (bool(self.op_ou[r]),
+             [np.flatnonzero(self.mascara[r] & (var_col == iv)).tolist() for iv in np.flatnonzero(self.presente[r])])
+            for r in range(self.mascara.shape[0])
+        ]
+        # por termo da saída, (regra, peso) das regras que o ativam
+        self._pesos_listas = [[(r, float(w)) for r, w in enumerate(self.pesos[:, k]) if w > 0]
+                              for k in range(self.pesos.shape[1])]
+        # por regra, (termo da saída, peso) que ela ativa
+        self._saidas_regra = [[(k, float(w)) for k, w in enumerate(linha) if w > 0] for linha in self.pesos]
+
+    def _preparar_indice(self):
+        """
+        Índice das regras que podem disparar em cada trecho das entradas.
+
+        Para cada variável, as quebras são os pontos onde algum termo passa
+        de zero a positivo: no modo amostrado, os pontos do universo com
+        grau zero vizinhos de um grau positivo (entre eles a interpolação é
+        toda zero ou toda positiva); no analítico, as bordas a e d dos
+        trapézios (gaussianas nunca zeram e não geram quebras). Cada
+        variável fica dividida em células — as quebras e os intervalos
+        abertos entre elas — e o grau de cada termo é avaliado num ponto
+        representativo da célula, com a mesma fuzzificação da avaliação.
+
+        Por célula guardam-se duas máscaras de bits sobre as regras: as
+        regras E que a variável não descarta (ausentes do antecedente ou com
+        algum termo não nulo) e as regras OU com algum termo não nulo na
+        variável. Termos negados contam sempre como não nulos. As regras
+        possíveis numa entrada são o E das primeiras com o OU das segundas
+        entre as variáveis; o índice nunca descarta uma regra com ativação
+        positiva.
+        """
+        n_t = len(self.termos)
+        n_r = len(self._regras_indices)
+        variaveis_regra = [np.flatnonzero(self.presente[r]).tolist() for r in range(n_r)]
+        self._quebras, self._mascaras_e, self._mascaras_ou = [], [], []
+        inicio = 0
+        for iv, u in enumerate(self.universos):
+            n_termos = self.mfs_entrada[iv].shape[0]
+            lo, hi = float(u[0]), float(u[-1])
+            quebras = {lo, hi}
+            if self.modo == "analitico":
+                for p in self._pert_listas[iv]:
+                    if p[0] == "t":
+                        quebras.update((p[1], p[4]))
+            else:
+                for mf in self.mfs_entrada[iv]:
+                    pos = mf > 0
+                    vizinho = np.zeros_like(pos)
+                    vizinho[1:] |= pos[:-1]
+                    vizinho[:-1] |= pos[1:]
+                    quebras.update(u[~pos & vizinho].tolist())
+            quebras = sorted(q for q in quebras if lo <= q <= hi)
+
+            # células: 2i = intervalo aberto antes da quebra i, 2i+1 = a quebra i
+            pontos = []
+            for i, q in enumerate(quebras):
+                pontos.append(0.5 * (quebras[i - 1] + q) if i > 0 else q)
+                pontos.append(q)
+            pontos.append(quebras[-1])
+            nao_nulos = self.fuzzificar_variavel(iv, pontos) > 0
+            if self.modo == "analitico":
+                for j, p in enumerate(self._pert_listas[iv]):
+                    nao_nulos[:, j] |= p[0] == "g"
+            # as células fora do universo (antes da primeira e depois da
+            # última quebra) nunca são consultadas
+            nao_nulos[0] = nao_nulos[-1] = True
+
+            mascaras_e, mascaras_ou = [], []
+            for linha in nao_nulos:
+                ativa = set((inicio + np.flatnonzero(linha)).tolist())
+                e = ou = 0
+                for r, (op_ou, grupos) in enumerate(self._regras_indices):
+                    if iv not in variaveis_regra[r]:
+                        if not op_ou:
+                            e |= 1 << r
+                        continue
+                    cols = grupos[variaveis_regra[r].index(iv)]
+                    if any(c >= n_t or c in ativa for c in cols):
+                        if op_ou:
+                            ou |= 1 << r
+                        else:
+                            e |= 1 << r
+                mascaras_e.append(e)
+                mascaras_ou.append(ou)
+            self._quebras.append(quebras)
+            self._mascaras_e.append(mascaras_e)
+            self._mascaras_ou.append(mascaras_ou)
+            inicio += n_termos
+        self._todas_e = (1 << n_r) - 1
+        # (célula de cada variável) -> índices das regras possíveis
+        self._candidatas = {}
+
+    def celulas(self, valores):
+        """Célula do índice de suporte de cada valor (recortado ao universo)."""
+        res = []
+        for quebras, x in zip(self._quebras, valores):
+            x = min(max(float(x), quebras[0]), quebras[-1])
+            i = bisect_left(quebras, x)
+            res.append(2 * i + 1 if quebras[i] == x else 2 * i)
+        return tuple(res)
+
+    def candidatas(self, celulas):
+        """Índices (lista ordenada) das regras que podem disparar nas células dadas."""
+        regras = self._candidatas.get(celulas)
+        if regras is None:
+            e, ou = self._todas_e, 0
+            for mascaras_e, mascaras_ou, c in zip(self._mascaras_e, self._mascaras_ou, celulas):
+                e &= mascaras_e[c]
+                ou |= mascaras_ou[c]
+            bits = e | ou
+            regras = [r for r in range(len(self._regras_indices)) if bits >> r & 1]
+            self._candidatas[celulas] = regras
+        return regras
+
+    def regras_possiveis(self, valores):
+        """Regras que podem disparar numa entrada (None = todas, com usar_indice falso)."""
+        if not self.usar_indice:
+            return None
+        return self.candidatas(self.celulas(valores))
+
+    def fuzzificar_um(self, valores):
+        """Graus (lista de T floats) de uma entrada; mesma interpolação de fuzzificar."""
+        if self.modo == "analitico":
+            graus = []
+            for (lo, hi), perts, x in zip(self._limites_entrada, self._pert_listas, valores):
+                x = min(max(float(x), lo), hi)
+                graus.extend(_grau(x, p) for p in perts)
+            return graus
+        graus = []
+        for u, mfs, x in zip(self._u_listas, self._mfs_listas, valores):
+            x = min(max(float(x), u[0]), u[-1])
+            i = min(bisect_right(u, x), len(u) - 1) - 1
+            t = (x - u[i]) / (u[i + 1] - u[i])
+            graus.extend(mf[i] + (mf[i + 1] - mf[i]) * t for mf in mfs)
+        return graus
+
+    def ativacoes_um(self, graus, regras=None):
+        """
+        Grau de ativação de cada regra (lista de R floats). Com `regras`
+        (índices, p.ex. de regras_possiveis) só essas são calculadas e as
+        demais ficam em zero.
+        """
+        ext = graus + [1.0 - g for g in graus]
+        if regras is None:
+            ativ = []
+            for ou, grupos in self._regras_indices:
+                por_var = [max(ext[c] for c in cols) for cols in grupos]
+                ativ.append(max(por_var) if ou else min(por_var))
+            return ativ
+        ativ = [0.0] * len(self._regras_indices)
+        for r in regras:
+            ou, grupos = self._regras_indices[r]
+            por_var = [max(ext[c] for c in cols) for cols in grupos]
+            ativ[r] = max(por_var) if ou else min(por_var)
+        return ativ
+
+    def cortes_um(self, ativ, regras=None):
+        """
+        Nível de corte de cada termo da saída (lista de K floats). Com
+        `regras`, só as ativações dessas regras são percorridas.
+        """
+        if regras is None:
+            return [max((ativ[r] * w for r, w in pesos), default=0.0) for pesos in self._pesos_listas]
+        cortes = [0.0] * len(self._pesos_listas)
+        for r in regras:
+            a = ativ[r]
+            if a > 0.0:
+                for k, w in self._saidas_regra[r]:
+                    if a * w > cortes[k]:
+                        cortes[k] = a * w
+        return cortes
+
+    def centroides(self, lista_cortes):
+        """
+        Centroides (lista de floats, NaN onde nada ativou) de várias listas de
+        cortes. No modo amostrado é uma única chamada vetorial, cujo custo é
+        quase todo fixo; no analítico, o cálculo escalar de cada uma.
+        """
+        if self.modo == "analitico":
+            return [self._centroide_analitico_um(c) for c in lista_cortes]
+        return self.defuzzificar(np.array(lista_cortes, dtype=np.float64)).tolist()
+
+    def defuzzificar_um(self, ativ, regras=None):
+        """
+        Risco para as ativações de uma entrada (NaN se nenhuma regra ativou):
+        o centroide ou, com Sugeno, a média ponderada das constantes.
+        """
+        if self.sugeno is not None:
+            return self._media_sugeno_um(ativ, regras)
+        return self.centroides([self.cortes_um(ativ, regras)])[0]
+
+    def _media_sugeno_um(self, ativ, regras=None):
+        """media_sugeno de uma entrada, percorrendo só `regras` (se dadas)."""
+        z = self._sugeno_lista
+        num = den = 0.0
+        for r in range(len(ativ)) if regras is None else regras:
+            a = ativ[r]
+            if a > 0.0:
+                for k, w in self._saidas_regra[r]:
+                    num += a * w * z[k]
+                    den += a * w
+        return num / den if den > 0.0 else float("nan")
+
+    def _centroide_analitico_um(self, cortes):
+        """Mesmo cálculo de _defuzzificar_analitico com listas Python (uma entrada)."""
+        termos = [(c, p) for c, p in zip(cortes, self._trap_listas) if c > 0]
+        if not termos:
+            return float("nan")
+        lo, hi = self._limites_saida
+        pontos = {lo, hi}
+        for c, (_, a, b, cc, d) in termos:
+            pontos.update((a, b, cc, d, a + c * (b - a), d - c * (d - cc)))
+        pontos = sorted(min(max(x, lo), hi) for x in pontos)
+
+        area = momento = 0.0
+        for x1, x2 in zip(pontos, pontos[1:]):
+            h = x2 - x1
+            if h <= 0:
+                continue
+            # cada termo é uma reta no intervalo, dada pelos valores a 1/3 e 2/3
+            m1, m2 = x1 + h / 3.0, x1 + 2.0 * h / 3.0
+            retas = [(min(c, _grau(m1, p)), min(c, _grau(m2, p))) for c, p in termos]
+            ts = [0.0, 1.0]
+            for i in range(len(retas)):
+                for j in range(i + 1, len(retas)):
+                    d1, d2 = retas[i][0] - retas[j][0], retas[i][1] - retas[j][1]
+                    if d1 != d2:
+                        t = (1.0 + d1 / (d1 - d2)) / 3.0
+                        if 0.0 < t < 1.0:
+                            ts.append(t)
+            ts.sort()
+            ys = [max(v1 + (v2 - v1) * (3.0 * t - 1.0) for v1, v2 in retas) for t in ts]
+            for t1, t2, y1, y2 in zip(ts, ts[1:], ys, ys[1:]):
+                xa, hh = x1 + t1 * h, (t2 - t1) * h
+                ar = 0.5 * hh * (y1 + y2)
+                area += ar
+                momento += xa * ar + hh * hh * (y2 + 0.5 * y1) / 3.0
+        return momento / area if area > 0 else float("nan")
+
+    def avaliar_um(self, valores):
+        """
+        Uma entrada (um valor por variável). Retorna (risco, ativações (R,)).
+        Só as regras que o índice de suporte não descarta são avaliadas.
+        """
+        regras = self.regras_possiveis(valores)
+        ativ = self.ativacoes_um(self.fuzzificar_um(valores), regras)
+        return self.defuzzificar_um(ativ, regras), ativ
+
+    def varrer(self, valores, faixas, bloco=4096):
+        """
+        Risco com uma ou mais variáveis percorrendo `faixas` ({índice da
+        variável: valores (M,)}) e as demais fixas em `valores`. Retorna
+        (riscos com forma (M1, M2, ...) na ordem de `faixas`, ativações
+        (M1, M2, ..., R)); NaN onde nenhuma regra foi ativada.
+
+        Só o que depende das variáveis alteradas é recalculado: cada valor
+        das faixas é fuzzificado uma vez (não uma vez por ponto da malha), as
+        variáveis fixas uma vez só, as regras que não usam nenhuma variável
+        alterada são avaliadas num único ponto e cortes repetidos ao longo
+        da malha (regiões planas) são defuzzificados uma vez.
+        """
+        ivs = list(faixas)
+        eixos = [np.atleast_1d(np.asarray(faixas[iv], dtype=np.float64)) for iv in ivs]
+        forma = tuple(e.size for e in eixos)
+        n = int(np.prod(forma))
+
+        # graus de cada variável, com uma dimensão por faixa (1 onde não varia)
+        blocos = []
+        for iv, valor in enumerate(valores):
+            dims = [1] * len(forma)
+            if iv in faixas:
+                k = ivs.index(iv)
+                g = self.fuzzificar_variavel(iv, eixos[k])
+                dims[k] = forma[k]
+            else:
+                g = self.fuzzificar_variavel(iv, [valor])
+            blocos.append(np.broadcast_to(g.reshape(*dims, -1), forma + (g.shape[-1],)).reshape(n, -1))
+        graus = np.concatenate(blocos, axis=1)
+
+        depende = self.presente[:, ivs].any(axis=1)
+        ativ = np.empty((n, self.mascara.shape[0]), dtype=np.float64)
+        ativ[:, ~depende] = self.ativacoes(graus[:1], ~depende)
+        for i in range(0, n, bloco):
+            ativ[i:i + bloco, depende] = self.ativacoes(graus[i:i + bloco], depende)
+
+        if self.sugeno is not None:
+            riscos = self.media_sugeno(ativ)
+        else:
+            unicos, inverso = np.unique(self.cortes(ativ), axis=0, return_inverse=True)
+            riscos = self.defuzzificar(unicos)[inverso.ravel()]
+        return riscos.reshape(forma), ativ.reshape(forma + (ativ.shape[1],))
+
+    def avaliar(self, entradas, bloco=4096):
+        """
+        Avalia N entradas de uma vez. Retorna (riscos (N,), ativações (N x R)).
+        O lote é processado em blocos para limitar a memória intermediária.
+        """
+        entradas = [np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in entradas]
+        n = entradas[0].shape[0]
+        riscos = np.empty(n, dtype=np.float64)
+        ativ = np.empty((n, self.mascara.shape[0]), dtype=np.float64)
+        for i in range(0, n, bloco):
+            fatia = [x[i:i + bloco] for x in entradas]
+            a = self.ativacoes(self.fuzzificar(fatia))
+            ativ[i:i + bloco] = a
+            riscos[i:i + bloco] = self.saida(a)
+        return riscos, ativ
+
+
+class RegrasCombinadas:
+    """
+    Vários conjuntos de regras (um por doença) sobre as mesmas variáveis,
+    avaliados juntos para a mesma entrada: a fuzzificação é feita uma vez e
+    os graus de cada termo são compartilhados por todos os conjuntos. No
+    lote, as regras de todas as doenças formam uma única matriz e os cortes
+    de todas as doenças são defuzzificados numa só chamada; cortes
+    repetidos (doenças cujas regras levam ao mesmo agregado, ou pacientes
+    com as mesmas entradas) são defuzzificados uma vez só. O custo cresce
+    com o número de termos e de agregados distintos, não com doenças x termos.
+    Conjuntos com Sugeno (com_sugeno) entram na mesma fuzzificação e nas
+    mesmas ativações; só a saída deles é a média das constantes.
+    """
+
+    def __init__(self, compilados):
+        """compilados: {nome: RegrasCompiladas}, todos com as mesmas variáveis."""
+        if not compilados:
+            raise ValueError("Nenhum conjunto de regras para combinar")
+        self.nomes = list(compilados)
+        self.compilados = list(compilados.values())
+        self.base = self.compilados[0]
+        for nome, c in zip(self.nomes[1:], self.compilados[1:]):
+            if not self.base.mesmas_variaveis(c):
+                raise ValueError(f"'{nome}' não usa as mesmas variáveis de '{self.nomes[0]}'")
+
+        inicios = np.cumsum([0] + [c.mascara.shape[0] for c in self.compilados])
+        self.fatias = [slice(int(a), int(b)) for a, b in zip(inicios[:-1], inicios[1:])]
+        # forma compilada com as regras de todos os conjuntos (só para ativacoes)
+        todas = copy.copy(self.base)
+        todas.mascara = np.vstack([c.mascara for c in self.compilados])
+        todas.presente = np.vstack([c.presente for c in self.compilados])
+        todas.op_ou = np.concatenate([c.op_ou for c in self.compilados])
+        self._todas = todas
+
+    def avaliar_um(self, valores):
+        """
+        Uma entrada. Retorna {nome: (risco, ativações (R,))}; risco NaN se
+        nada ativou. Cortes iguais em doenças diferentes (regras que levam ao
+        mesmo agregado) são defuzzificados uma vez só.
+        """
+        graus = self.base.fuzzificar_um(valores)
+        # as quebras do índice dependem só das variáveis: as células valem para todos
+        celulas = self.base.celulas(valores) if self.base.usar_indice else None
+        regras = [None if celulas is None else c.candidatas(celulas) for c in self.compilados]
+        ativacoes = [c.ativacoes_um(graus, r) for c, r in zip(self.compilados, regras)]
+        distintos = {}
+        posicoes = [None if c.sugeno is not None else distintos.setdefault(tuple(c.cortes_um(a, r)), len(distintos))
+                    for c, a, r in zip(self.compilados, ativacoes, regras)]
+        centroides = self.base.centroides(list(distintos)) if distintos else []
+        return {nome: (c._media_sugeno_um(ativ, r) if k is None else centroides[k], ativ)
+                for nome, c, k, ativ, r in zip(self.nomes, self.compilados, posicoes, ativacoes, regras)}
+
+    def avaliar(self, entradas, bloco=4096):
+        """N entradas. Retorna {nome: (riscos (N,), ativações (N x R))}."""
+        entradas = [np.atleast_1d(np.asarray(x, dtype=np.float64)) for x in entradas]
+        n = entradas[0].shape[0]
+        riscos = np.empty((len(self.compilados), n), dtype=np.float64)
+        ativ = np.empty((n, self._todas.mascara.shape[0]), dtype=np.float64)
+        for i in range(0, n, bloco):
+            fatia = [x[i:i + bloco] for x in entradas]
+            a = self._todas.ativacoes(self.base.fuzzificar(fatia))
+            ativ[i:i + bloco] = a
+            mamdani = []
+            for k, (c, f) in enumerate(zip(self.compilados, self.fatias)):
+                if c.sugeno is not None:
+                    riscos[k, i:i + bloco] = c.media_sugeno(a[:, f])
+                else:
+                    mamdani.append(k)
+            if mamdani:
+                cortes = np.concatenate([self.compilados[k].cortes(a[:, self.fatias[k]]) for k in mamdani])
+                # linhas de cortes repetidas (entre doenças ou pacientes) são defuzzificadas uma vez
+                unicos, inverso = np.unique(cortes, axis=0, return_inverse=True)
+                riscos[mamdani, i:i + bloco] = self.base.defuzzificar(unicos)[inverso.ravel()].reshape(len(mamdani), -1)
+        return {nome: (riscos[k], ativ[:, f]) for k, (nome, f) in enumerate(zip(self.nomes, self.fatias))}
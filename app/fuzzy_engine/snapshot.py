@@ -0,0 +1,121 @@
+# fuzzy_engine/snapshot.py
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+
+import numpy as np
+
+from fuzzy_engine.regras_compiladas import RegrasCompiladas
+from fuzzy_engine.tabela_risco import CACHE_DIR
+
+# incrementar quando o layout do arquivo mudar (o formato das regras
+# compiladas tem versão própria, RegrasCompiladas.exportar)
+VERSAO_SNAPSHOT = 1
+MAGICA = b"FUZZYSNP"
+# início de cada array alinhado a 64 bytes (linha de cache)
+ALINHAMENTO = 64
+
+DIR_SNAPSHOTS = CACHE_DIR / "snapshots"
+
+
+def caminho_padrao(dir_regras, modo, inferencia="mamdani"):
+    """
+    Arquivo do snapshot de um diretório de regras num modo, em
+    DIR_SNAPSHOTS. Inferências diferentes da Mamdani ("sugeno" ou
+    {doença: inferência}) têm arquivo próprio.
+    """
+    h = hashlib.sha256(str(Path(dir_regras).resolve()).encode()).hexdigest()[:12]
+    if isinstance(inferencia, dict):
+        chave = json.dumps(inferencia, sort_keys=True, ensure_ascii=False).encode()
+        modo = f"{modo}_misto{hashlib.sha256(chave).hexdigest()[:8]}"
+    elif inferencia != "mamdani":
+        modo = f"{modo}_{inferencia}"
+    return DIR_SNAPSHOTS / f"motor_{modo}_{h}.snap"
+
+
+def salvar_snapshot(path, conjuntos, info):
+    """
+    Grava num único arquivo as formas compiladas de `conjuntos` (lista de
+    (nome, ordem, origem, RegrasCompiladas)) e o dict `info` (JSON).
+
+    Layout: MAGICA, tamanho do cabeçalho (uint64 little-endian), cabeçalho
+    JSON e os arrays crus, cada um alinhado a ALINHAMENTO bytes. O
+    cabeçalho guarda a posição, o dtype e a forma de cada array, de modo que
+    carregar_snapshot os mapeia sem cópia. A gravação é atômica (arquivo
+    temporário + os.replace).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    arrays, doencas = [], []
+    for nome, ordem, origem, compilado in conjuntos:
+        meta, dados = compilado.exportar()
+        posicoes = {}
+        for k, a in dados.items():
+            a = np.ascontiguousarray(a)
+            if a.dtype.hasobject:
+                raise ValueError(f"{nome}.{k}: arrays de objetos não cabem num snapshot")
+            posicoes[k] = [len(arrays), a.dtype.str, list(a.shape)]
+            arrays.append(a)
+        doencas.append({"nome": nome, "ordem": ordem, "origem": origem, "meta": meta, "arrays": posicoes})
+
+    # posições relativas ao fim do cabeçalho (que só se conhece depois de serializado)
+    deslocamentos, fim = [], 0
+    for a in arrays:
+        fim = -(-fim // ALINHAMENTO) * ALINHAMENTO
+        deslocamentos.append(fim)
+        fim += a.nbytes
+    for d in doencas:
+        for pos in d["arrays"].values():
+            pos[0] = deslocamentos[pos[0]]
+    cabecalho = json.dumps({"versao": VERSAO_SNAPSHOT, "info": info, "doencas": doencas},
+                           ensure_ascii=False).encode("utf-8")
+    inicio = -(-(len(MAGICA) + 8 + len(cabecalho)) // ALINHAMENTO) * ALINHAMENTO
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGICA + len(cabecalho).to_bytes(8, "little") + cabecalho)
+        for a, desloc in zip(arrays, deslocamentos):
+            f.write(b"\0" * (inicio + desloc - f.tell()))
+            f.write(a.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+def _cabecalho(mapa):
+    """(cabeçalho, início da área de arrays) de um snapshot mapeado."""
+    prefixo = len(MAGICA) + 8
+    if mapa[:len(MAGICA)] != MAGICA:
+        raise ValueError("Arquivo não é um snapshot do motor fuzzy")
+    tamanho = int.from_bytes(mapa[len(MAGICA):prefixo], "little")
+    cabecalho = json.loads(mapa[prefixo:prefixo + tamanho].decode("utf-8"))
+    if cabecalho["versao"] != VERSAO_SNAPSHOT:
+        raise ValueError(f"Versão de snapshot incompatível: {cabecalho['versao']}")
+    return cabecalho, -(-(prefixo + tamanho) // ALINHAMENTO) * ALINHAMENTO
+
+
+def carregar_snapshot(path):
+    """
+    Lê um snapshot gravado por salvar_snapshot. Retorna (info, lista de
+    (nome, ordem, origem, RegrasCompiladas)).
+
+    O arquivo é mapeado com mmap somente leitura e os arrays das regras
+    compiladas são vistas (np.frombuffer) sobre o mapeamento: nada é copiado
+    e processos que carregam o mesmo arquivo compartilham as mesmas páginas
+    do cache do sistema operacional. O mapeamento vive enquanto algum array
+    o referenciar. Só as listas Python da avaliação escalar e o índice de
+    suporte (pequenos) são montados por processo.
+    """
+    with open(path, "rb") as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    cabecalho, inicio = _cabecalho(mapa)
+    conjuntos = []
+    for d in cabecalho["doencas"]:
+        dados = {}
+        for k, (desloc, dtype, forma) in d["arrays"].items():
+            dtype = np.dtype(dtype)
+            n = int(np.prod(forma, dtype=np.int64))
+            dados[k] = np.frombuffer(mapa, dtype=dtype, count=n, offset=inicio + desloc).reshape(forma)
+        conjuntos.append((d["nome"], d["ordem"], d["origem"], RegrasCompiladas.importar(d["meta"], dados)))
+    return cabecalho["info"], conjuntos
@@ -0,0 +1,61 @@
+# fuzzy_engine/sugeno.py
+import numpy as np
+
+
+def amostrar_entradas(compilado, n, semente=0):
+    """n entradas uniformes nos universos das variáveis (lista de arrays (n,), uma por variável)."""
+    rng = np.random.default_rng(semente)
+    return [rng.uniform(u[0], u[-1], n) for u in compilado.universos]
+
+
+def ajustar_constantes(compilado, entradas):
+    """
+    Constantes Sugeno ({termo: valor}) que mais aproximam o risco Mamdani
+    de `compilado` nas `entradas` (lista de arrays, uma por variável).
+
+    O risco Sugeno é linear nas constantes: em cada entrada, a média delas
+    ponderada pela força normalizada de cada termo (soma de ativação x peso
+    das regras que o ativam, ver RegrasCompiladas.media_sugeno). O ajuste é
+    um mínimos quadrados sobre essas forças, partindo dos centroides dos
+    termos: um termo que nunca ativa nas entradas fica no centroide. As
+    constantes são limitadas ao universo da saída.
+    """
+    mamdani = compilado.com_sugeno(None)
+    riscos, ativ = mamdani.avaliar(entradas)
+    forcas = ativ @ mamdani.pesos
+    total = forcas.sum(axis=1)
+    ok = (total > 0) & np.isfinite(riscos)
+    centroides = np.array(list(mamdani.centroides_saida().values()))
+    if not ok.any():
+        return dict(zip(mamdani.termos_saida, centroides.tolist()))
+    f = forcas[ok] / total[ok, None]
+    # solução de norma mínima para a correção: direções sem informação ficam nos centroides
+    correcao = np.linalg.lstsq(f, riscos[ok] - f @ centroides, rcond=None)[0]
+    u = mamdani.universo_saida
+    z = np.clip(centroides + correcao, u[0], u[-1])
+    return dict(zip(mamdani.termos_saida, z.tolist()))
+
+
+def comparar(compilado, constantes, entradas, limiar=1.0):
+    """
+    Desvio do Sugeno com `constantes` em relação ao Mamdani de `compilado`
+    nas `entradas`: erro absoluto médio, p95 e máximo (pontos de risco),
+    fração das entradas com desvio acima de `limiar` e entradas em que
+    nenhuma regra ativou (as mesmas nas duas inferências, fora da conta).
+    """
+    mamdani = compilado.com_sugeno(None)
+    riscos, ativ = mamdani.avaliar(entradas)
+    sugeno = mamdani.media_sugeno(ativ, [constantes[t] for t in mamdani.termos_saida])
+    ok = np.isfinite(riscos) & np.isfinite(sugeno)
+    erro = np.abs(sugeno[ok] - riscos[ok])
+    if not erro.size:
+        return {"n": 0, "sem_regras": int((~ok).sum()), "mae": float("nan"), "p95": float("nan"),
+                "max": float("nan"), "acima_limiar": float("nan")}
+    return {
+        "n": int(erro.size),
+        "sem_regras": int((~ok).sum()),
+        "mae": float(erro.mean()),
+        "p95": float(np.percentile(erro, 95)),
+        "max": float(erro.max()),
+        "acima_limiar": float((erro > limiar).mean()),
+    }
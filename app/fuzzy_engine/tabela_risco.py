@@ -0,0 +1,134 @@
+# fuzzy_engine/tabela_risco.py
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+CACHE_DIR = Path.home() / ".fuzzy_cache"
+
+# passos padrão da grade (febre °C, tosse, saturação %)
+PASSOS_PADRAO = (0.1, 0.25, 0.5)
+
+# incrementar quando o formato dos arquivos mudar
+VERSAO_FORMATO = 1
+
+
+class TabelaRisco:
+    """
+    Superfície de risco pré-calculada numa grade 3-D (febre x tosse x
+    saturação), consultada por interpolação trilinear.
+
+    A tabela é gravada em `cache_dir` como <doença>_<hash>.npy (carregado com
+    mmap) mais um .npz com os eixos e os erros de interpolação medidos.
+    O hash inclui a definição das regras e os passos da grade, então a
+    tabela só é reconstruída quando algum dos dois muda.
+    """
+
+    def __init__(self, eixos, valores, erro_max=None, chave=None, erro_p99=None):
+        self.eixos = [np.asarray(e, dtype=np.float64) for e in eixos]
+        self.valores = valores
+        self.erro_max = erro_max
+        self.erro_p99 = erro_p99
+        self.chave = chave
+        self._ini = [float(e[0]) for e in self.eixos]
+        self._passo = [float(e[1] - e[0]) for e in self.eixos]
+        self._n = [len(e) for e in self.eixos]
+
+    @classmethod
+    def construir(cls, compilado, passos=PASSOS_PADRAO, amostras_erro=20000, seed=0):
+        """Avalia o motor compilado em toda a grade e mede o erro de interpolação."""
+        eixos = []
+        for u, passo in zip(compilado.universos, passos):
+            n = int(round((u[-1] - u[0]) / passo)) + 1
+            eixos.append(np.linspace(u[0], u[-1], n))
+        malha = np.meshgrid(*eixos, indexing='ij')
+        riscos, _ = compilado.avaliar([m.ravel() for m in malha])
+        tabela = cls(eixos, riscos.reshape(malha[0].shape))
+
+        # erro contra o motor exato em pontos aleatórios (fora dos nós).
+        # A superfície do skfuzzy tem saltos (p.ex. quando um termo passa a
+        # ter grau > 0), então o máximo reflete as células que cruzam esses
+        # saltos; o p99 mostra o erro típico.
+        rng = np.random.default_rng(seed)
+        pts = [rng.uniform(e[0], e[-1], amostras_erro) for e in eixos]
+        exato, _ = compilado.avaliar(pts)
+        aprox = tabela.consultar(*pts)
+        diff = np.abs(aprox - exato)
+        diff = diff[np.isfinite(diff)]
+        tabela.erro_max = float(diff.max()) if diff.size else 0.0
+        tabela.erro_p99 = float(np.percentile(diff, 99)) if diff.size else 0.0
+        return tabela
+
+    @classmethod
+    def carregar_ou_construir(cls, nome, compilado, passos=PASSOS_PADRAO, cache_dir=CACHE_DIR):
+        """Carrega a tabela do cache em disco, construindo-a se necessário."""
+        chave = hashlib.sha256(f"{compilado.assinatura}|{tuple(passos)}|{VERSAO_FORMATO}".encode()).hexdigest()[:16]
+        cache_dir = Path(cache_dir)
+        base = cache_dir / f"{_nome_arquivo(nome)}_{chave}"
+        npy, npz = base.with_suffix(".npy"), base.with_suffix(".npz")
+
+        if npy.exists() and npz.exists():
+            try:
+                meta = np.load(npz)
+                valores = np.load(npy, mmap_mode='r')
+                return cls([meta['febre'], meta['tosse'], meta['saturacao']],
+                           valores, float(meta['erro_max']), chave, float(meta['erro_p99']))
+            except Exception:
+                pass  # arquivo corrompido: reconstruir
+
+        tabela = cls.construir(compilado, passos)
+        tabela.chave = chave
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # gravação atômica: escreve em temporário e renomeia
+        tmp = base.with_name(base.name + f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            np.save(f, np.asarray(tabela.valores))
+        os.replace(tmp, npy)
+        with open(tmp, "wb") as f:
+            np.savez(f, febre=tabela.eixos[0], tosse=tabela.eixos[1], saturacao=tabela.eixos[2],
+                     erro_max=tabela.erro_max, erro_p99=tabela.erro_p99, info=json.dumps({"doenca": nome, "passos": list(passos)}))
+        os.replace(tmp, npz)
+        tabela.valores = np.load(npy, mmap_mode='r')
+        return tabela
+
+    def consultar(self, febre, tosse, saturacao):
+        """Interpolação trilinear vetorizada. Aceita escalares ou arrays."""
+        escalar = np.ndim(febre) == 0 and np.ndim(tosse) == 0 and np.ndim(saturacao) == 0
+        if escalar:
+            return self.consultar_escalar(float(febre), float(tosse), float(saturacao))
+
+        idx, frac = [], []
+        for x, ini, passo, n in zip((febre, tosse, saturacao), self._ini, self._passo, self._n):
+            p = np.clip((np.asarray(x, dtype=np.float64) - ini) / passo, 0, n - 1)
+            i = np.minimum(p.astype(np.intp), n - 2)
+            idx.append(i)
+            frac.append(p - i)
+        (i, j, k), (a, b, c) = idx, frac
+        v = self.valores
+        c00 = v[i, j, k] * (1 - c) + v[i, j, k + 1] * c
+        c01 = v[i, j + 1, k] * (1 - c) + v[i, j + 1, k + 1] * c
+        c10 = v[i + 1, j, k] * (1 - c) + v[i + 1, j, k + 1] * c
+        c11 = v[i + 1, j + 1, k] * (1 - c) + v[i + 1, j + 1, k + 1] * c
+        return (c00 * (1 - b) + c01 * b) * (1 - a) + (c10 * (1 - b) + c11 * b) * a
+
+    def consultar_escalar(self, febre, tosse, saturacao):
+        """Caminho escalar em Python puro (evita o overhead do NumPy por chamada)."""
+        ids, fr = [], []
+        for x, ini, passo, n in zip((febre, tosse, saturacao), self._ini, self._passo, self._n):
+            p = min(max((x - ini) / passo, 0.0), n - 1.0)
+            i = min(int(p), n - 2)
+            ids.append(i)
+            fr.append(p - i)
+        (i, j, k), (a, b, c) = ids, fr
+        v = self.valores
+        c00 = float(v[i, j, k]) * (1 - c) + float(v[i, j, k + 1]) * c
+        c01 = float(v[i, j + 1, k]) * (1 - c) + float(v[i, j + 1, k + 1]) * c
+        c10 = float(v[i + 1, j, k]) * (1 - c) + float(v[i + 1, j, k + 1]) * c
+        c11 = float(v[i + 1, j + 1, k]) * (1 - c) + float(v[i + 1, j + 1, k + 1]) * c
+        return (c00 * (1 - b) + c01 * b) * (1 - a) + (c10 * (1 - b) + c11 * b) * a
+
+
+def _nome_arquivo(nome):
+    return "".join(ch if ch.isascii() and ch.isalnum() else "_" for ch in nome)
@@ -0,0 +1,44 @@
+# fuzzy_engine/varredura.py
+import numpy as np
+
+
+class Varredura:
+    """
+    Resultado de DiagnosticoFuzzy.varrer: risco de uma doença com uma ou
+    duas entradas percorrendo uma faixa e as demais fixas no paciente.
+
+      variaveis      nomes das entradas variadas, na ordem dos eixos
+      eixos          valores de cada entrada variada
+      riscos         curva (M,) ou superfície (M1 x M2); NaN sem regra acionada
+      ativacoes      grau de cada regra em cada ponto (... x R)
+      base           {'febre': ..., 'tosse': ..., 'saturacao': ...} do paciente
+      risco_base     risco no ponto base (None se nenhuma regra foi acionada)
+      sensibilidades {variável: dR/dvariável em cada ponto}, por diferenças
+                     finitas (centrais no interior, laterais nas bordas)
+    """
+
+    def __init__(self, disease, base, variaveis, eixos, riscos, ativacoes, risco_base):
+        self.disease = disease
+        self.base = dict(base)
+        self.variaveis = list(variaveis)
+        self.eixos = [np.asarray(e, dtype=np.float64) for e in eixos]
+        self.riscos = riscos
+        self.ativacoes = ativacoes
+        self.risco_base = risco_base
+        self.sensibilidades = {
+            v: (np.gradient(riscos, e, axis=k) if e.size > 1 else np.full(riscos.shape, np.nan))
+            for k, (v, e) in enumerate(zip(self.variaveis, self.eixos))
+        }
+
+    @property
+    def variacao(self):
+        """Diferença de risco (pontos percentuais) em relação ao ponto base."""
+        if self.risco_base is None:
+            return np.full(self.riscos.shape, np.nan)
+        return self.riscos - self.risco_base
+
+    def risco_em(self, **valores):
+        """Risco no ponto da varredura mais próximo dos valores dados (p.ex. saturacao=91)."""
+        idx = tuple(int(np.abs(e - valores.get(v, self.base[v])).argmin())
+                    for v, e in zip(self.variaveis, self.eixos))
+        return float(self.riscos[idx])
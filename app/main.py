@@ -1,21 +1,116 @@
 # app/main.py
 import sys
-from PyQt5.QtWidgets import (
+import threading
+import time
+
+# fases da partida (nome, instante); impressas com --medir-partida
+_FASES = [("início", time.perf_counter())]
+
+
+# tempo de construção de cada aba (título, segundos)
+_TEMPOS_ABAS = []
+
+
+def _marcar(fase):
+    _FASES.append((fase, time.perf_counter()))
+
+
+from PyQt5.QtWidgets import (  # noqa: E402
     QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout,
     QPushButton, QLineEdit, QMessageBox, QComboBox, QTabWidget,
-    QTextEdit, QListWidget, QFileDialog
+    QTextEdit, QListView, QFileDialog, QProgressBar, QDateEdit
 )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
-from pathlib import Path
+from PyQt5.QtCore import Qt, QDate, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal  # noqa: E402
+from PyQt5.QtGui import QFont  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+from utils.history_manager import HistoryManager  # noqa: E402
+from utils.metricas import configurar_por_ambiente  # noqa: E402
+from ui_main import QSS  # noqa: E402
+
+# DiagnosticoFuzzy (skfuzzy), FuzzyPlotter/FigureCanvas (matplotlib) e
+# PDFExporter (fpdf) são importados só quando usados
+
 
-from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
-from fuzzy_engine.fuzzy_plotter import FuzzyPlotter
-from utils.history_manager import HistoryManager
-from utils.pdf_exporter import PDFExporter
-from ui_main import QSS
+class CarregadorMotor(QObject):
+    """
+    Constrói o DiagnosticoFuzzy numa thread em segundo plano e emite
+    `pronto` (entregue na thread da interface) ao terminar.
+    """
+    pronto = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.engine = None
+        self.erro = None
+        self._thread = threading.Thread(target=self._run, name="carregador-motor", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def wait(self):
+        self._thread.join()
+
+    def _run(self):
+        try:
+            from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+            engine = DiagnosticoFuzzy()
+            # on_calcular e on_exportar repetem o mesmo cálculo; chave exata
+            # (sem quantização) para não alterar os valores digitados
+            engine.ativar_memo(max_itens=256, passos=None)
+            self.engine = engine
+        except Exception as e:
+            self.erro = e
+        _marcar("motor (thread)")
+        self.pronto.emit()
+
+
+class Cancelada(Exception):
+    """A tarefa foi superada por uma mais nova."""
+
+
+class SinaisTarefa(QObject):
+    progresso = pyqtSignal(int, str)
+    concluida = pyqtSignal(object)
+    falhou = pyqtSignal(str)
+    terminada = pyqtSignal()
+
+
+class Tarefa(QRunnable):
+    """
+    Executa fn(avancar) num QThreadPool. fn chama avancar(pct, etapa) entre
+    as etapas: isso emite `progresso` e interrompe a tarefa (Cancelada) se
+    ela foi cancelada. Os sinais são entregues na thread da interface, e
+    tarefas canceladas não emitem `concluida` nem `falhou`.
+    """
+
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+        self.sinais = SinaisTarefa()
+        self.cancelada = False
+
+    def cancelar(self):
+        self.cancelada = True
+
+    def _avancar(self, pct, etapa):
+        if self.cancelada:
+            raise Cancelada
+        self.sinais.progresso.emit(pct, etapa)
+
+    def run(self):
+        try:
+            res = self.fn(self._avancar)
+            if not self.cancelada:
+                self.sinais.concluida.emit(res)
+        except Cancelada:
+            pass
+        except Exception as e:
+            if not self.cancelada:
+                self.sinais.falhou.emit(str(e))
+        finally:
+            self.sinais.terminada.emit()
 
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 class MainWindow(QWidget):
     def __init__(self):
@@ -24,14 +119,140 @@ class MainWindow(QWidget):
         self.setMinimumSize(900, 600)
         self.setStyleSheet(QSS)
 
-        # motores e utilitários
-        self.engine = DiagnosticoFuzzy()
-        self.plotter = FuzzyPlotter(self.engine)
+        # o motor é construído em segundo plano; self.engine espera por ele
+        self._engine = None
+        self._carregador = CarregadorMotor(self)
+        self._carregador.pronto.connect(self._on_motor_pronto)
+        self._carregador.start()
+
+        # utilitários pesados criados no primeiro uso. O plotter da interface
+        # e o da exportação (thread do pool) têm figuras próprias.
+        self._plotter = None
+        self._plotter_export = None
+        self._lock_export = threading.Lock()
+        self._pdf = None
         self.history = HistoryManager()
-        self.pdf = PDFExporter()
+
+        # cálculo e exportação rodam fora da thread da interface; um cálculo
+        # novo cancela o anterior (self._tarefa_calculo)
+        self.pool_tarefas = QThreadPool(self)
+        self.pool_tarefas.setMaxThreadCount(2)
+        self._tarefas = set()
+        self._tarefa_calculo = None
+
+        # abas ainda não construídas: {placeholder: (construtor, título)}
+        self._pendentes = {}
+        self.lst_history = None
+        self.modelo_historico = None
+        self.txt_regras = None
+        self.preview_window = None
+
+        # arquivos de regras (app/regras) verificados periodicamente no
+        # pool, uma verificação por vez (self._tarefa_regras)
+        self._timer_regras = QTimer(self)
+        self._timer_regras.setInterval(2000)
+        self._timer_regras.timeout.connect(self._verificar_regras)
+        self._tarefa_regras = None
+        self._erro_regras = None
 
         self._build_ui()
 
+    # --- construção sob demanda ---
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._carregador.wait()
+            if self._carregador.erro is not None:
+                raise RuntimeError("Falha ao carregar o motor fuzzy") from self._carregador.erro
+            self._on_motor_pronto()
+        return self._engine
+
+    @property
+    def plotter(self):
+        if self._plotter is None:
+            from fuzzy_engine.fuzzy_plotter import FuzzyPlotter
+            self._plotter = FuzzyPlotter(self.engine)
+        return self._plotter
+
+    @property
+    def pdf(self):
+        if self._pdf is None:
+            from utils.pdf_exporter import PDFExporter
+            self._pdf = PDFExporter()
+        return self._pdf
+
+    def _on_motor_pronto(self):
+        if self._engine is not None:
+            return
+        if self._carregador.erro is not None:
+            QMessageBox.critical(self, "Erro", f"Falha ao carregar o motor fuzzy: {self._carregador.erro}")
+            return
+        self._engine = self._carregador.engine
+        # nomes vindos do registro de regras: nenhuma doença é compilada aqui
+        self.combo_disease.addItems(self._engine.doencas())
+        self._set_tooltips()
+        self.btn_calcular.setEnabled(True)
+        self.btn_export.setEnabled(True)
+        self._timer_regras.start()
+
+    def _verificar_regras(self):
+        """
+        Relê no pool as regras alteradas em disco (stat, leitura, hash e
+        recompilação ficam fora da thread da interface); a lista de doenças
+        e a aba de regras são atualizadas quando a verificação termina.
+        """
+        if self._tarefa_regras is not None:
+            return  # a anterior ainda não terminou
+        engine = self._engine
+        tarefa = Tarefa(lambda avancar: engine.recarregar_regras())
+        tarefa.sinais.concluida.connect(self._on_regras_verificadas)
+        tarefa.sinais.falhou.connect(self._on_regras_falharam)
+        tarefa.sinais.terminada.connect(self._on_verificacao_terminada)
+        self._tarefa_regras = tarefa
+        self.pool_tarefas.start(tarefa)
+
+    def _on_verificacao_terminada(self):
+        self._tarefa_regras = None
+
+    def _on_regras_falharam(self, erro):
+        # avisa uma vez por erro; a versão anterior das regras continua em uso
+        if erro != self._erro_regras:
+            self._erro_regras = erro
+            QMessageBox.warning(self, "Regras", f"Erro ao recarregar as regras (mantida a versão anterior):\n{erro}")
+
+    def _on_regras_verificadas(self, mudaram):
+        self._erro_regras = None
+        if not mudaram:
+            return
+        atual = self.combo_disease.currentText()
+        self.combo_disease.clear()
+        self.combo_disease.addItems(self._engine.doencas())
+        if atual in self._engine.rulesets:
+            self.combo_disease.setCurrentText(atual)
+        self._set_tooltips()
+        if self.txt_regras is not None:
+            self._refresh_rules_text()
+
+    def _tab_preguicosa(self, tabs, construtor, titulo):
+        """Adiciona uma aba vazia que só é construída ao ser ativada."""
+        placeholder = QWidget()
+        placeholder.setLayout(QVBoxLayout())
+        placeholder.layout().setContentsMargins(0, 0, 0, 0)
+        self._pendentes[placeholder] = (construtor, titulo)
+        tabs.addTab(placeholder, titulo)
+
+    def _conectar_tabs(self, tabs):
+        tabs.currentChanged.connect(lambda i: self._construir_tab(tabs.widget(i)))
+        self._construir_tab(tabs.currentWidget())
+
+    def _construir_tab(self, placeholder):
+        pendente = self._pendentes.pop(placeholder, None)
+        if pendente is not None:
+            construtor, titulo = pendente
+            t0 = time.perf_counter()
+            placeholder.layout().addWidget(construtor())
+            _TEMPOS_ABAS.append((titulo, time.perf_counter() - t0))
+
     def _build_ui(self):
         layout = QVBoxLayout()
         header = QLabel("Diagnóstico Médico - Fuzzy")
@@ -42,10 +263,12 @@ class MainWindow(QWidget):
 
         tabs = QTabWidget()
         tabs.addTab(self._tab_diagnostico(), "Diagnóstico")
-        tabs.addTab(self._tab_graficos(), "Gráficos Fuzzy")
-        tabs.addTab(self._tab_regras(), "Regras Fuzzy")
-        tabs.addTab(self._tab_historico(), "Histórico / Exportar")
+        self._tab_preguicosa(tabs, self._tab_graficos, "Gráficos Fuzzy")
+        self._tab_preguicosa(tabs, self._tab_regras, "Regras Fuzzy")
+        self._tab_preguicosa(tabs, self._tab_historico, "Histórico / Exportar")
+        self._conectar_tabs(tabs)
         layout.addWidget(tabs)
+        self.tabs = tabs
 
         self.setLayout(layout)
 
@@ -57,29 +280,14 @@ class MainWindow(QWidget):
         # inputs
         form = QHBoxLayout()
 
+        # doenças e tooltips são preenchidos quando o motor fica pronto
         self.combo_disease = QComboBox()
-        self.combo_disease.addItems(list(self.engine.rulesets.keys()))
         self.input_febre = QLineEdit()
         self.input_febre.setPlaceholderText("Temperatura (°C) — ex: 38.7")
         self.input_tosse = QLineEdit()
         self.input_tosse.setPlaceholderText("Tosse (0-10) — ex: 7")
         self.input_sat = QLineEdit()
         self.input_sat.setPlaceholderText("Saturação (%) — ex: 89")
-
-        # tooltips com intervalos válidos (obtidos do motor fuzzy)
-        try:
-            fmin = float(self.engine.febre.universe[0])
-            fmax = float(self.engine.febre.universe[-1])
-            tmin = float(self.engine.tosse.universe[0])
-            tmax = float(self.engine.tosse.universe[-1])
-            smin = float(self.engine.saturacao.universe[0])
-            smax = float(self.engine.saturacao.universe[-1])
-            self.input_febre.setToolTip(f"Intervalo válido: {fmin} — {fmax} °C (use . ou , para decimais)")
-            self.input_tosse.setToolTip(f"Intervalo válido: {tmin} — {tmax}")
-            self.input_sat.setToolTip(f"Intervalo válido: {smin} — {smax} %")
-        except Exception:
-            # se algo falhar, não bloquear UI — tooltips serão omitidos
-            pass
         form.addWidget(self.combo_disease)
         form.addWidget(self.input_febre)
         form.addWidget(self.input_tosse)
@@ -92,6 +300,9 @@ class MainWindow(QWidget):
         self.btn_calcular.clicked.connect(self.on_calcular)
         self.btn_export = QPushButton("Exportar Relatório (PDF)")
         self.btn_export.clicked.connect(self.on_exportar)
+        if self._engine is None:
+            self.btn_calcular.setEnabled(False)
+            self.btn_export.setEnabled(False)
         btn_layout.addWidget(self.btn_calcular)
         btn_layout.addWidget(self.btn_export)
         v.addLayout(btn_layout)
@@ -101,6 +312,11 @@ class MainWindow(QWidget):
         self.lbl_result.setFont(QFont("Segoe UI", 14))
         v.addWidget(self.lbl_result)
 
+        self.progresso = QProgressBar()
+        self.progresso.setRange(0, 100)
+        self.progresso.hide()
+        v.addWidget(self.progresso)
+
         # figuras para preview (inicializadas na ação)
         self.fig_feb = None
         self.fig_tos = None
@@ -110,53 +326,47 @@ class MainWindow(QWidget):
         w.setLayout(v)
         return w
 
+    def _set_tooltips(self):
+        # tooltips com intervalos válidos (obtidos do motor fuzzy)
+        try:
+            fmin = float(self.engine.febre.universe[0])
+            fmax = float(self.engine.febre.universe[-1])
+            tmin = float(self.engine.tosse.universe[0])
+            tmax = float(self.engine.tosse.universe[-1])
+            smin = float(self.engine.saturacao.universe[0])
+            smax = float(self.engine.saturacao.universe[-1])
+            self.input_febre.setToolTip(f"Intervalo válido: {fmin} — {fmax} °C (use . ou , para decimais)")
+            self.input_tosse.setToolTip(f"Intervalo válido: {tmin} — {tmax}")
+            self.input_sat.setToolTip(f"Intervalo válido: {smin} — {smax} %")
+        except Exception:
+            # se algo falhar, não bloquear UI — tooltips serão omitidos
+            pass
+
     # --- Tab Gráficos ---
     def _tab_graficos(self):
         w = QWidget()
         v = QVBoxLayout()
 
+        # cada gráfico só é desenhado quando a sub-aba é aberta; figuras
+        # próprias, pois as do self.plotter ficam na janela de preview
+        from fuzzy_engine.fuzzy_plotter import FuzzyPlotter
+        plotter = FuzzyPlotter(self.engine)
         tabs = QTabWidget()
-
-        # febre
-        tab_f = QWidget()
-        l_f = QVBoxLayout()
-        fig = self.plotter.plot_febre()
-        canvas = FigureCanvas(fig)
-        l_f.addWidget(canvas)
-        tab_f.setLayout(l_f)
-        tabs.addTab(tab_f, "Febre")
-
-        # tosse
-        tab_t = QWidget()
-        l_t = QVBoxLayout()
-        fig2 = self.plotter.plot_tosse()
-        canvas2 = FigureCanvas(fig2)
-        l_t.addWidget(canvas2)
-        tab_t.setLayout(l_t)
-        tabs.addTab(tab_t, "Tosse")
-
-        # saturacao
-        tab_s = QWidget()
-        l_s = QVBoxLayout()
-        fig3 = self.plotter.plot_saturacao()
-        canvas3 = FigureCanvas(fig3)
-        l_s.addWidget(canvas3)
-        tab_s.setLayout(l_s)
-        tabs.addTab(tab_s, "Saturação")
-
-        # risco
-        tab_r = QWidget()
-        l_r = QVBoxLayout()
-        fig4 = self.plotter.plot_risco()
-        canvas4 = FigureCanvas(fig4)
-        l_r.addWidget(canvas4)
-        tab_r.setLayout(l_r)
-        tabs.addTab(tab_r, "Risco")
+        self._tab_preguicosa(tabs, lambda: self._canvas(plotter.plot_febre()), "Febre")
+        self._tab_preguicosa(tabs, lambda: self._canvas(plotter.plot_tosse()), "Tosse")
+        self._tab_preguicosa(tabs, lambda: self._canvas(plotter.plot_saturacao()), "Saturação")
+        self._tab_preguicosa(tabs, lambda: self._canvas(plotter.plot_risco()), "Risco")
+        self._conectar_tabs(tabs)
 
         v.addWidget(tabs)
         w.setLayout(v)
         return w
 
+    @staticmethod
+    def _canvas(fig):
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        return FigureCanvas(fig)
+
     # --- Tab Regras ---
     def _tab_regras(self):
         w = QWidget()
@@ -218,13 +428,42 @@ class MainWindow(QWidget):
 
     # --- Tab Histórico ---
     def _tab_historico(self):
+        from utils.history_model import HistoryModel
+
         w = QWidget()
         v = QVBoxLayout()
 
+        # filtros aplicados na consulta ao banco (HistoryModel.filtrar)
+        filtros = QHBoxLayout()
+        self.combo_hist_doenca = QComboBox()
+        self.combo_hist_doenca.addItem("Todas", None)
+        for disease in self.history.doencas():
+            self.combo_hist_doenca.addItem(disease, disease)
+        self.data_hist_desde = self._campo_data()
+        self.data_hist_ate = self._campo_data()
+        self.lbl_hist_total = QLabel()
+        for rotulo, campo in (("Doença:", self.combo_hist_doenca), ("De:", self.data_hist_desde),
+                              ("Até:", self.data_hist_ate)):
+            filtros.addWidget(QLabel(rotulo))
+            filtros.addWidget(campo)
+        filtros.addStretch()
+        filtros.addWidget(self.lbl_hist_total)
+        v.addLayout(filtros)
+
         top = QHBoxLayout()
-        self.lst_history = QListWidget()
-        self._refresh_history()
+        # só a primeira página é lida; as demais chegam ao rolar (fetchMore)
+        self.modelo_historico = HistoryModel(self.history, parent=self)
+        self.modelo_historico.modelReset.connect(self._atualizar_total_historico)
+        self.modelo_historico.rowsInserted.connect(self._atualizar_total_historico)
+        self.lst_history = QListView()
+        # linhas de mesma altura: a lista não mede cada item ao rolar
+        self.lst_history.setUniformItemSizes(True)
+        self.lst_history.setModel(self.modelo_historico)
+        self._atualizar_total_historico()
         top.addWidget(self.lst_history)
+        self.combo_hist_doenca.currentIndexChanged.connect(self._filtrar_historico)
+        self.data_hist_desde.dateChanged.connect(self._filtrar_historico)
+        self.data_hist_ate.dateChanged.connect(self._filtrar_historico)
 
         side = QVBoxLayout()
         self.btn_refresh = QPushButton("Atualizar")
@@ -240,35 +479,119 @@ class MainWindow(QWidget):
         w.setLayout(v)
         return w
 
+    @staticmethod
+    def _campo_data():
+        campo = QDateEdit()
+        campo.setCalendarPopup(True)
+        campo.setDisplayFormat("dd/MM/yyyy")
+        campo.setMinimumDate(QDate(2000, 1, 1))
+        # a data mínima aparece como "—" e significa sem limite
+        campo.setSpecialValueText("—")
+        campo.setDate(campo.minimumDate())
+        return campo
+
+    def _filtrar_historico(self):
+        desde, ate = (None if c.date() == c.minimumDate() else c.date().toPyDate()
+                      for c in (self.data_hist_desde, self.data_hist_ate))
+        self.modelo_historico.filtrar(self.combo_hist_doenca.currentData(), desde, ate)
+
+    def _atualizar_total_historico(self, *_):
+        m = self.modelo_historico
+        self.lbl_hist_total.setText(f"{m.rowCount()} de {m.total} entradas carregadas")
+
     def _refresh_history(self):
-        self.lst_history.clear()
-        rows = self.history.list(50)
-        for e in rows:
-            ts = e.get("timestamp")
-            disease = e.get("disease")
-            risco = e.get("risco")
-            self.lst_history.addItem(f"{ts} — {disease} — risco {risco:.2f}%")
+        """Relê a primeira página (p.ex. entradas gravadas por outro processo)."""
+        if self.modelo_historico is None:
+            return  # aba ainda não aberta; será lida ao ser construída
+        self.modelo_historico.recarregar()
+
+    def _historico_adicionado(self, entrada):
+        """Insere só a entrada nova na lista do histórico (se a aba já foi aberta)."""
+        if self.modelo_historico is None:
+            return
+        self.modelo_historico.adicionar(entrada)
+        if self.combo_hist_doenca.findData(entrada["disease"]) < 0:
+            self.combo_hist_doenca.addItem(entrada["disease"], entrada["disease"])
 
     def _clear_history(self):
         self.history.clear()
         self._refresh_history()
         QMessageBox.information(self, "Histórico", "Histórico limpo.")
 
+    # --- Tarefas ---
+    def _executar(self, fn, concluida):
+        """Enfileira fn(avancar) no pool; `concluida(resultado)` roda na thread da interface."""
+        tarefa = Tarefa(fn)
+        tarefa.sinais.progresso.connect(self._on_progresso)
+        tarefa.sinais.concluida.connect(concluida)
+        tarefa.sinais.falhou.connect(lambda msg: QMessageBox.warning(self, "Erro", msg))
+        tarefa.sinais.terminada.connect(lambda: self._on_tarefa_terminada(tarefa))
+        # referência mantida até o fim para que os sinais sobrevivam
+        self._tarefas.add(tarefa)
+        self.pool_tarefas.start(tarefa)
+        return tarefa
+
+    def _on_progresso(self, pct, etapa):
+        self.progresso.setFormat(f"{etapa} — %p%")
+        self.progresso.setValue(pct)
+        self.progresso.show()
+
+    def _on_tarefa_terminada(self, tarefa):
+        self._tarefas.discard(tarefa)
+        if not self._tarefas:
+            self.progresso.hide()
+
+    @staticmethod
+    def _figuras(plotter, avancar, feb, tos, sat, risco, pct=(20, 35, 50, 65)):
+        """Posiciona o destaque nas quatro figuras do plotter."""
+        figs = []
+        for p, (plot, valor, nome) in zip(pct, (
+                (plotter.plot_febre, feb, "febre"),
+                (plotter.plot_tosse, tos, "tosse"),
+                (plotter.plot_saturacao, sat, "saturação"),
+                (plotter.plot_risco, risco, "risco"))):
+            avancar(p, f"Gráfico de {nome}")
+            figs.append(plot(highlight_value=valor))
+        return figs
+
     # --- Events ---
     def on_calcular(self):
         vals = self._get_input_values()
         if not vals:
             return
         feb, tos, sat = vals
-
         disease = self.combo_disease.currentText()
-        risco, fired, sim = self.engine.calcular_risco(disease, feb, tos, sat)
+        engine = self.engine
+
+        # os gráficos do preview só movem a linha de destaque (blit), o que é
+        # feito na thread da interface ao receber o resultado
+        def calcular(avancar):
+            avancar(0, "Inferência")
+            risco, fired, _ = engine.calcular_risco(disease, feb, tos, sat)
+            avancar(100, "Concluído")
+            return disease, feb, tos, sat, risco, fired
+
+        # um cálculo novo supera o que ainda estiver em andamento
+        if self._tarefa_calculo is not None:
+            self._tarefa_calculo.cancelar()
+        tarefa = self._executar(calcular, lambda res: self._on_calculado(tarefa, res))
+        self._tarefa_calculo = tarefa
+        self.lbl_result.setText("Resultado: calculando…")
+
+    def _on_calculado(self, tarefa, res):
+        if tarefa is not self._tarefa_calculo:
+            return  # resultado de um cálculo já superado
+        self._tarefa_calculo = None
+        disease, feb, tos, sat, risco, fired = res
         self.lbl_result.setText(f"Resultado: {risco:.2f} %")
-        # salvar no histórico
-        self.history.add(disease, {"febre": feb, "tosse": tos, "saturacao": sat}, risco)
-        self._refresh_history()
+        # gravado só aqui, para o resultado aceito: um cálculo superado ou
+        # cancelado não deixa no banco uma entrada que a lista nunca recebe
+        entrada = self.history.add(disease, {"febre": feb, "tosse": tos, "saturacao": sat}, risco)
+        self._historico_adicionado(entrada)
         # atualizar mini-gráficos com destaque
-        self._update_minigraphs(feb, tos, sat, risco)
+        figs = self._figuras(self.plotter, lambda *_: None, feb, tos, sat, risco)
+        self.fig_feb, self.fig_tos, self.fig_sat, self.fig_risk = figs
+        self._show_preview_window()
         # mostrar regras ativadas
         if fired:
             top = sorted(fired, key=lambda x: -x[1])[:5]
@@ -277,26 +600,19 @@ class MainWindow(QWidget):
                 msg += f"R{idx+1} — grau {deg:.3f}\n"
             QMessageBox.information(self, "Regras acionadas", msg)
 
-    def _update_minigraphs(self, feb, tos, sat, risco):
-        # gerar figuras
-        self.fig_feb = self.plotter.plot_febre(highlight_value=feb)
-        self.fig_tos = self.plotter.plot_tosse(highlight_value=tos)
-        self.fig_sat = self.plotter.plot_saturacao(highlight_value=sat)
-        self.fig_risk = self.plotter.plot_risco(highlight_value=risco)
-        # remover widgets antigos se existirem
-        # inserir canvases numa nova janela (pop-up) para evitar reorganização complexa
-        # Vamos abrir uma janela de visualização rápida
-        self._show_preview_window()
-
     def _show_preview_window(self):
-        # janela de preview
+        # a janela e os canvases são criados uma vez; depois só reexibidos
+        if self.preview_window is not None:
+            self.preview_window.show()
+            self.preview_window.raise_()
+            return
         preview = QWidget()
         preview.setWindowTitle("Preview das Pertinências")
         layout = QHBoxLayout()
-        c1 = FigureCanvas(self.fig_feb)
-        c2 = FigureCanvas(self.fig_tos)
-        c3 = FigureCanvas(self.fig_sat)
-        c4 = FigureCanvas(self.fig_risk)
+        c1 = self._canvas(self.fig_feb)
+        c2 = self._canvas(self.fig_tos)
+        c3 = self._canvas(self.fig_sat)
+        c4 = self._canvas(self.fig_risk)
         layout.addWidget(c1)
         layout.addWidget(c2)
         layout.addWidget(c3)
@@ -314,26 +630,58 @@ class MainWindow(QWidget):
             return
         feb, tos, sat = vals
         disease = self.combo_disease.currentText()
-        risco, fired, sim = self.engine.calcular_risco(disease, feb, tos, sat)
-        # criar figuras atuais (caso não existam)
-        figs = []
-        figs.append(self.plotter.plot_febre(highlight_value=feb))
-        figs.append(self.plotter.plot_tosse(highlight_value=tos))
-        figs.append(self.plotter.plot_saturacao(highlight_value=sat))
-        figs.append(self.plotter.plot_risco(highlight_value=risco))
 
         # escolher arquivo
         path, _ = QFileDialog.getSaveFileName(self, "Salvar PDF", f"relatorio_{disease}.pdf", "PDF Files (*.pdf)")
         if not path:
             return
         filename = Path(path).stem
-        # exportar
-        out = self.pdf.export(filename, {"febre": feb, "tosse": tos, "saturacao": sat, "doenca": disease}, risco, figs)
-        QMessageBox.information(self, "Exportado", f"Relatório salvo: {out}")
+        if self._plotter_export is None:
+            from fuzzy_engine.fuzzy_plotter import FuzzyPlotter
+            self._plotter_export = FuzzyPlotter(self.engine)
+        engine, pdf, plotter = self.engine, self.pdf, self._plotter_export
+
+        def exportar(avancar):
+            avancar(0, "Inferência")
+            risco, fired, _ = engine.calcular_risco(disease, feb, tos, sat)
+            # figuras persistentes do plotter de exportação: uma exportação por vez
+            with self._lock_export:
+                figs = self._figuras(plotter, avancar, feb, tos, sat, risco)
+                avancar(80, "PDF")
+                return pdf.export(filename, {"febre": feb, "tosse": tos, "saturacao": sat, "doenca": disease}, risco, figs)
+
+        self._executar(exportar, lambda out: QMessageBox.information(self, "Exportado", f"Relatório salvo: {out}"))
+
+
+def _relatorio_partida(win, app):
+    """Constrói as abas restantes, imprime o tempo de cada fase e encerra."""
+    win.engine  # aguarda o motor
+    for placeholder in list(win._pendentes):
+        win._construir_tab(placeholder)
+    anterior = _FASES[0][1]
+    for fase, t in _FASES[1:]:
+        print(f"{fase:<24} {(t - anterior) * 1000:8.1f} ms  (acumulado {(t - _FASES[0][1]) * 1000:8.1f} ms)",
+              file=sys.stderr)
+        anterior = t
+    for nome, dt in _TEMPOS_ABAS:
+        print(f"aba {nome:<20} {dt * 1000:8.1f} ms", file=sys.stderr)
+    app.quit()
+
 
 if __name__ == "__main__":
-    from pathlib import Path
+    medir = "--medir-partida" in sys.argv
+    if medir:
+        sys.argv.remove("--medir-partida")
+    # FUZZY_METRICAS_PORTA / _ARQUIVO / _LOG: tempos por etapa (ver utils/metricas.py)
+    configurar_por_ambiente()
+    _marcar("imports")
     app = QApplication(sys.argv)
+    _marcar("QApplication")
     win = MainWindow()
+    _marcar("MainWindow.__init__")
     win.show()
+    # o timer dispara quando o laço de eventos já processou a primeira pintura
+    QTimer.singleShot(0, lambda: _marcar("janela exibida"))
+    if medir:
+        QTimer.singleShot(0, lambda: _relatorio_partida(win, app))
     sys.exit(app.exec_())
@@ -1,43 +1,210 @@
 # utils/history_manager.py
 import json
+import sqlite3
+import threading
 from datetime import datetime
 from pathlib import Path
 
+from utils.metricas import METRICAS
+
+HISTORY_DB = Path.home() / ".fuzzy_history.sqlite3"
+# arquivo do formato antigo (lista JSON), migrado uma vez para o SQLite
 HISTORY_FILE = Path.home() / ".fuzzy_history.json"
 
+# entradas mantidas; as mais antigas são removidas a cada add
+RETENCAO_PADRAO = 100_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS historico (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    disease   TEXT NOT NULL,
+    inputs    TEXT NOT NULL,
+    risco     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS historico_timestamp ON historico(timestamp);
+CREATE INDEX IF NOT EXISTS historico_disease ON historico(disease, id);
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT);
+"""
+
+
 class HistoryManager:
-    def __init__(self, path: Path = HISTORY_FILE):
+    """
+    Histórico de cálculos num arquivo SQLite em modo WAL.
+
+    add() é um INSERT (custo independente do tamanho do histórico) seguido
+    da remoção, pela chave primária, do que passou de `retencao`. list()
+    consulta só a página pedida, com filtros opcionais de doença e período.
+    Cada thread usa sua própria conexão; vários processos podem gravar ao
+    mesmo tempo (o SQLite serializa as escritas, com espera de até 5 s).
+
+    Na primeira abertura, o histórico antigo em JSON (HISTORY_FILE) é
+    importado e renomeado para *.json.migrado.
+    """
+
+    def __init__(self, path: Path = HISTORY_DB, retencao: int = RETENCAO_PADRAO, legado: Path = HISTORY_FILE):
+        path = Path(path)
+        if path.suffix == ".json":
+            # compatibilidade: caminho do formato antigo
+            legado, path = path, path.with_suffix(".sqlite3")
         self.path = path
-        if not path.exists():
-            self._write([])
+        self.retencao = retencao
+        self._local = threading.local()
 
-    def _read(self):
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return []
+        con = self._con()
+        con.executescript(_SCHEMA)
+        self._migrar(Path(legado))
 
-    def _write(self, data):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    def _con(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _migrar(self, legado):
+        if not legado.exists():
+            return
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            # a marca em `meta` evita importar duas vezes se outro processo
+            # abriu o banco ao mesmo tempo
+            if con.execute("SELECT 1 FROM meta WHERE chave = 'migrado_json'").fetchone() is None:
+                try:
+                    with open(legado, "r", encoding="utf-8") as f:
+                        antigos = json.load(f)
+                except Exception:
+                    antigos = []
+                # o JSON guardava o mais recente primeiro
+                con.executemany(
+                    "INSERT INTO historico (timestamp, disease, inputs, risco) VALUES (?, ?, ?, ?)",
+                    [(e.get("timestamp", ""), e.get("disease", ""),
+                      json.dumps(e.get("inputs", {}), ensure_ascii=False), float(e.get("risco", 0.0)))
+                     for e in reversed(antigos) if isinstance(e, dict)])
+                con.execute("INSERT INTO meta (chave, valor) VALUES ('migrado_json', ?)", (str(legado),))
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        try:
+            legado.rename(legado.with_name(legado.name + ".migrado"))
+        except OSError:
+            pass
 
     def add(self, disease, inputs: dict, risco: float):
-        data = self._read()
         entry = {
             "timestamp": datetime.now().isoformat(),
             "disease": disease,
             "inputs": inputs,
             "risco": float(risco)
         }
-        data.insert(0, entry)
-        # keep only last 200 entries to limit file size
-        data = data[:200]
-        self._write(data)
+        with METRICAS.medir("historico.add"):
+            con = self._con()
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                cur = con.execute(
+                    "INSERT INTO historico (timestamp, disease, inputs, risco) VALUES (?, ?, ?, ?)",
+                    (entry["timestamp"], disease, json.dumps(inputs, ensure_ascii=False), entry["risco"]))
+                entry["id"] = cur.lastrowid
+                # retenção: normalmente remove no máximo uma linha, pela chave primária
+                con.execute("DELETE FROM historico WHERE id <= ?", (cur.lastrowid - self.retencao,))
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
         return entry
 
-    def list(self, limit=50):
-        return self._read()[:limit]
+    def add_lote(self, entradas):
+        """
+        Grava várias entradas numa única transação. Cada entrada é um dict
+        com disease, inputs, risco e, opcionalmente, timestamp (datetime ou
+        ISO; padrão: agora). Retorna as entradas gravadas, com id, na ordem
+        recebida.
+        """
+        agora = datetime.now().isoformat()
+        gravadas = []
+        for e in entradas:
+            ts = e.get("timestamp") or agora
+            gravadas.append({
+                "timestamp": ts.isoformat() if isinstance(ts, datetime) else str(ts),
+                "disease": e["disease"],
+                "inputs": e["inputs"],
+                "risco": float(e["risco"]),
+            })
+        if not gravadas:
+            return gravadas
+        with METRICAS.medir("historico.add_lote"):
+            con = self._con()
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                for e in gravadas:
+                    e["id"] = con.execute(
+                        "INSERT INTO historico (timestamp, disease, inputs, risco) VALUES (?, ?, ?, ?)",
+                        (e["timestamp"], e["disease"], json.dumps(e["inputs"], ensure_ascii=False),
+                         e["risco"])).lastrowid
+                con.execute("DELETE FROM historico WHERE id <= ?", (gravadas[-1]["id"] - self.retencao,))
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+        return gravadas
+
+    def list(self, limit=50, offset=0, disease=None, desde=None, ate=None, antes_id=None):
+        """
+        Entradas mais recentes primeiro. `desde`/`ate` (datetime ou ISO)
+        limitam o período; `antes_id` pagina pela chave (mais barato que
+        `offset` em páginas profundas: passe o id da última entrada recebida).
+        """
+        where, args = self._filtros(disease, desde, ate)
+        if antes_id is not None:
+            where.append("id < ?")
+            args.append(antes_id)
+        sql = "SELECT * FROM historico"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ? OFFSET ?"
+        with METRICAS.medir("historico.list"):
+            rows = self._con().execute(sql, args + [limit, offset]).fetchall()
+            return [self._entrada(r) for r in rows]
+
+    def count(self, disease=None, desde=None, ate=None):
+        where, args = self._filtros(disease, desde, ate)
+        sql = "SELECT COUNT(*) FROM historico"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return self._con().execute(sql, args).fetchone()[0]
+
+    def doencas(self):
+        """Doenças presentes no histórico, em ordem alfabética."""
+        return [r[0] for r in self._con().execute("SELECT DISTINCT disease FROM historico ORDER BY disease")]
 
     def clear(self):
-        self._write([])
+        self._con().execute("DELETE FROM historico")
+
+    @staticmethod
+    def _filtros(disease, desde, ate):
+        where, args = [], []
+        if disease is not None:
+            where.append("disease = ?")
+            args.append(disease)
+        if desde is not None:
+            where.append("timestamp >= ?")
+            args.append(desde.isoformat() if isinstance(desde, datetime) else str(desde))
+        if ate is not None:
+            where.append("timestamp <= ?")
+            args.append(ate.isoformat() if isinstance(ate, datetime) else str(ate))
+        return where, args
+
+    @staticmethod
+    def _entrada(row):
+        return {
+            "id": row["id"],
+            "timestamp": row["timestamp"],
+            "disease": row["disease"],
+            "inputs": json.loads(row["inputs"]),
+            "risco": row["risco"],
+        }
@@ -0,0 +1,115 @@
+# utils/history_model.py
+import json
+from datetime import date, datetime, time
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt
+
+# entradas lidas do banco por página (fetchMore)
+TAMANHO_PAGINA = 200
+
+
+class HistoryModel(QAbstractListModel):
+    """
+    Modelo Qt (lista) do histórico, mais recente primeiro, sobre um
+    HistoryManager.
+
+    Só a primeira página é lida ao abrir ou filtrar; as seguintes vêm do
+    banco conforme a lista rola (canFetchMore/fetchMore, chamados pela
+    QListView ao chegar ao fim), paginando pela chave (antes_id), então o
+    custo de cada página não depende de quantas já foram lidas. adicionar()
+    insere só a entrada nova no topo (beginInsertRows), sem reler nada. Os
+    filtros de doença e período viram cláusulas WHERE da consulta.
+
+    Papéis: DisplayRole (texto da linha), ToolTipRole (entradas do cálculo)
+    e UserRole (o dict da entrada, como em HistoryManager.list).
+    """
+
+    def __init__(self, history, tamanho_pagina=TAMANHO_PAGINA, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.tamanho_pagina = tamanho_pagina
+        self.disease = None
+        self.desde = None
+        self.ate = None
+        self._linhas = []
+        self._fim = False
+        self.total = 0
+        self.recarregar()
+
+    # --- leitura ---
+    def recarregar(self):
+        """Descarta o que foi lido e volta à primeira página (filtros atuais)."""
+        self.beginResetModel()
+        self._linhas = []
+        self._fim = False
+        self._linhas = self._ler_pagina()
+        self.total = self.history.count(self.disease, self.desde, self.ate)
+        self.endResetModel()
+
+    def filtrar(self, disease=None, desde=None, ate=None):
+        """
+        Filtra por doença e período. `desde`/`ate` aceitam datetime, date
+        (dia inteiro, inclusive) ou texto ISO; None remove o filtro.
+        """
+        if isinstance(ate, date) and not isinstance(ate, datetime):
+            ate = datetime.combine(ate, time.max)
+        if isinstance(desde, date) and not isinstance(desde, datetime):
+            desde = datetime.combine(desde, time.min)
+        self.disease, self.desde, self.ate = disease, desde, ate
+        self.recarregar()
+
+    def _ler_pagina(self):
+        antes = self._linhas[-1]["id"] if self._linhas else None
+        pagina = self.history.list(self.tamanho_pagina, disease=self.disease, desde=self.desde,
+                                   ate=self.ate, antes_id=antes)
+        self._fim = len(pagina) < self.tamanho_pagina
+        return pagina
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._fim
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._fim:
+            return
+        antes = len(self._linhas)
+        pagina = self._ler_pagina()
+        if not pagina:
+            return
+        self.beginInsertRows(QModelIndex(), antes, antes + len(pagina) - 1)
+        self._linhas.extend(pagina)
+        self.endInsertRows()
+
+    # --- escrita ---
+    def adicionar(self, entrada):
+        """Insere no topo uma entrada recém-gravada (HistoryManager.add), se passar nos filtros."""
+        if not self._passa(entrada):
+            return
+        if self._linhas and entrada["id"] <= self._linhas[0]["id"]:
+            return  # já lida do banco (p.ex. por um recarregar depois do add)
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._linhas.insert(0, entrada)
+        self.total += 1
+        self.endInsertRows()
+
+    def _passa(self, entrada):
+        ts = entrada["timestamp"]
+        iso = [v.isoformat() if isinstance(v, datetime) else v for v in (self.desde, self.ate)]
+        return ((self.disease is None or entrada["disease"] == self.disease)
+                and (iso[0] is None or ts >= iso[0])
+                and (iso[1] is None or ts <= iso[1]))
+
+    # --- QAbstractListModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._linhas):
+            return None
+        e = self._linhas[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{e['timestamp']} — {e['disease']} — risco {e['risco']:.2f}%"
+        if role == Qt.ToolTipRole:
+            return json.dumps(e["inputs"], ensure_ascii=False)
+        if role == Qt.UserRole:
+            return e
+        return None
@@ -0,0 +1,241 @@
+# utils/metricas.py
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from pathlib import Path
+
+# limites superiores (segundos) dos baldes dos histogramas: 10 µs a 10 s
+LIMITES_PADRAO = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                  0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+NOME_METRICA = "fuzzy_etapa_segundos"
+
+_NULO = nullcontext()
+
+
+class Histograma:
+    """Contagens por balde (não cumulativas), soma e total de observações."""
+
+    __slots__ = ("limites", "baldes", "soma", "n")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.baldes = [0] * (len(limites) + 1)  # o último é +Inf
+        self.soma = 0.0
+        self.n = 0
+
+    def observar(self, segundos):
+        self.baldes[bisect_left(self.limites, segundos)] += 1
+        self.soma += segundos
+        self.n += 1
+
+    def quantil(self, q):
+        """Quantil aproximado: limite superior do balde que contém a posição q."""
+        if self.n == 0:
+            return None
+        alvo = q * self.n
+        acumulado = 0
+        for i, c in enumerate(self.baldes):
+            acumulado += c
+            if acumulado >= alvo:
+                return self.limites[i] if i < len(self.limites) else float("inf")
+        return float("inf")
+
+
+class _Medicao:
+    __slots__ = ("metricas", "etapa", "rotulos", "t0")
+
+    def __init__(self, metricas, etapa, rotulos):
+        self.metricas = metricas
+        self.etapa = etapa
+        self.rotulos = rotulos
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metricas.observar(self.etapa, time.perf_counter() - self.t0, **self.rotulos)
+        return False
+
+
+class Metricas:
+    """
+    Histogramas de duração por etapa (calcular_risco, gráficos, histórico,
+    PDF), separados por rótulos (p.ex. doenca="Viral").
+
+    Desligado por padrão: medir() devolve um contexto nulo compartilhado e
+    quem instrumenta caminhos quentes testa `ativo` antes de ler o relógio,
+    então o custo sem métricas é uma verificação de atributo. Ganchos
+    (adicionar_gancho) recebem cada observação (etapa, segundos, rótulos);
+    gancho_log os transforma em log estruturado (uma linha JSON por etapa).
+    A exportação é no formato texto do Prometheus, em arquivo ou por HTTP.
+    """
+
+    def __init__(self, limites=LIMITES_PADRAO):
+        self.ativo = False
+        self.limites = tuple(limites)
+        self._hist = {}
+        self._ganchos = []
+        self._lock = threading.Lock()
+        self._servidor = None
+
+    def ativar(self):
+        self.ativo = True
+        return self
+
+    def desativar(self):
+        self.ativo = False
+
+    def limpar(self):
+        with self._lock:
+            self._hist.clear()
+
+    def adicionar_gancho(self, gancho):
+        """gancho(etapa, segundos, rotulos) é chamado a cada observação, fora do lock."""
+        self._ganchos.append(gancho)
+        return gancho
+
+    def remover_gancho(self, gancho):
+        self._ganchos.remove(gancho)
+
+    def medir(self, etapa, **rotulos):
+        """Context manager que registra a duração do bloco (nulo se desligado)."""
+        if not self.ativo:
+            return _NULO
+        return _Medicao(self, etapa, rotulos)
+
+    def observar(self, etapa, segundos, **rotulos):
+        chave = (etapa, tuple(sorted(rotulos.items())))
+        with self._lock:
+            hist = self._hist.get(chave)
+            if hist is None:
+                hist = self._hist[chave] = Histograma(self.limites)
+            hist.observar(segundos)
+        for gancho in self._ganchos:
+            gancho(etapa, segundos, rotulos)
+
+    def resumo(self):
+        """Lista de dicts (etapa, rótulos, n, soma, p50, p90, p99) para log ou inspeção."""
+        with self._lock:
+            itens = sorted(self._hist.items())
+            linhas = []
+            for (etapa, rotulos), h in itens:
+                linhas.append({
+                    "etapa": etapa, **dict(rotulos), "n": h.n, "soma_s": h.soma,
+                    "media_s": h.soma / h.n if h.n else None,
+                    "p50_s": h.quantil(0.5), "p90_s": h.quantil(0.9), "p99_s": h.quantil(0.99),
+                })
+        return linhas
+
+    def prometheus(self):
+        """Todas as séries no formato texto de exposição do Prometheus."""
+        linhas = [
+            f"# HELP {NOME_METRICA} Duração das etapas do diagnóstico fuzzy, em segundos.",
+            f"# TYPE {NOME_METRICA} histogram",
+        ]
+        with self._lock:
+            for (etapa, rotulos), h in sorted(self._hist.items()):
+                base = ",".join(f'{k}="{_escapar(v)}"' for k, v in (("etapa", etapa),) + rotulos)
+                acumulado = 0
+                for limite, c in zip(self.limites + (float("inf"),), h.baldes):
+                    acumulado += c
+                    le = "+Inf" if limite == float("inf") else repr(limite)
+                    linhas.append(f'{NOME_METRICA}_bucket{{{base},le="{le}"}} {acumulado}')
+                linhas.append(f"{NOME_METRICA}_sum{{{base}}} {h.soma!r}")
+                linhas.append(f"{NOME_METRICA}_count{{{base}}} {h.n}")
+        return "\n".join(linhas) + "\n"
+
+    def salvar_prometheus(self, path):
+        """Grava o texto do Prometheus de forma atômica (p.ex. para o textfile collector)."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+        return path
+
+    def servir(self, porta=9464, host="127.0.0.1"):
+        """Expõe GET /metrics numa thread em segundo plano. Retorna o servidor."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metricas = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                corpo = metricas.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer((host, porta), _Handler)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+        self._servidor = servidor
+        return servidor
+
+    def gravar_periodicamente(self, path, intervalo=15.0):
+        """Regrava `path` a cada `intervalo` segundos e ao sair do processo."""
+        def laco():
+            while True:
+                time.sleep(intervalo)
+                self.salvar_prometheus(path)
+
+        threading.Thread(target=laco, name="metricas-arquivo", daemon=True).start()
+        atexit.register(self.salvar_prometheus, path)
+
+
+def gancho_log(logger=None, nivel=logging.INFO):
+    """Gancho que registra cada observação como uma linha JSON no logger."""
+    logger = logger or logging.getLogger("fuzzy.metricas")
+
+    def gancho(etapa, segundos, rotulos):
+        if logger.isEnabledFor(nivel):
+            logger.log(nivel, json.dumps({"etapa": etapa, "ms": round(segundos * 1e3, 4), **rotulos},
+                                         ensure_ascii=False))
+    return gancho
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# registro global usado pelo motor, gráficos, histórico e exportador de PDF
+METRICAS = Metricas()
+
+
+def configurar_por_ambiente(metricas=METRICAS, ambiente=os.environ):
+    """
+    Liga as métricas conforme variáveis de ambiente:
+      FUZZY_METRICAS_PORTA    expõe /metrics em 127.0.0.1:<porta>
+      FUZZY_METRICAS_ARQUIVO  grava o texto do Prometheus nesse arquivo (a cada 15 s e ao sair)
+      FUZZY_METRICAS_LOG      registra cada etapa como JSON no logger "fuzzy.metricas" (1/true)
+    Retorna True se alguma delas estava definida.
+    """
+    porta = ambiente.get("FUZZY_METRICAS_PORTA")
+    arquivo = ambiente.get("FUZZY_METRICAS_ARQUIVO")
+    log = ambiente.get("FUZZY_METRICAS_LOG", "").lower() in ("1", "true", "sim")
+    if not (porta or arquivo or log):
+        return False
+    metricas.ativar()
+    if porta:
+        metricas.servir(int(porta))
+    if arquivo:
+        metricas.gravar_periodicamente(arquivo)
+    if log:
+        if not logging.getLogger().handlers:
+            logging.basicConfig(level=logging.INFO, format="%(message)s")
+        metricas.adicionar_gancho(gancho_log())
+    return True
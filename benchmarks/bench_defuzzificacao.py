@@ -0,0 +1,87 @@
+# benchmarks/bench_defuzzificacao.py
+# Compara os modos "amostrado" e "analitico" do motor compilado com universos
+# cada vez mais finos: custo de avaliar_um e diferença de risco entre os modos.
+# O modo analítico não amostra os universos, então o custo e o resultado não
+# devem mudar com o passo. Uso: python benchmarks/bench_defuzzificacao.py
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from fuzzy_engine.definicoes import DIR_DEFINICOES  # noqa: E402
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy  # noqa: E402
+
+# divisor aplicado ao passo de todos os universos (1 = arquivos originais)
+REFINOS = (1, 10, 100)
+REPETICOES = 2000
+# diferença aceita entre resultados analíticos de resoluções diferentes
+TOLERANCIA = 1e-9
+ATIVACAO_MINIMA = 1e-6
+
+_RNG = np.random.default_rng(1234)
+ENTRADAS = list(zip(_RNG.uniform(35, 41, 300), _RNG.uniform(0, 10, 300), _RNG.uniform(70, 100, 300)))
+
+
+def copiar_regras(destino, refino):
+    """Cópia de app/regras com o passo dos universos dividido por `refino`."""
+    shutil.copytree(DIR_DEFINICOES, destino)
+    path = Path(destino) / "variaveis.json"
+    spec = json.loads(path.read_text(encoding="utf-8"))
+    for grupo in ("entradas", "saida"):
+        for var in spec[grupo].values():
+            inicio, fim, passo = var["universo"]
+            passo /= refino
+            # mantém o último ponto do universo original
+            var["universo"] = [inicio, fim - (refino - 1) * passo, passo]
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    return destino
+
+
+def validas(compilado):
+    """
+    Entradas com alguma regra ativada de forma não desprezível. Com ativações
+    da ordem de 1e-30 o modo amostrado (como o skfuzzy) devolve ~0 por causa
+    do piso eps da área, enquanto o analítico devolve o centroide de fato.
+    """
+    return [e for e in ENTRADAS if max(compilado.avaliar_um(e)[1]) >= ATIVACAO_MINIMA]
+
+
+def medir(compilado, entradas):
+    t0 = time.perf_counter()
+    for i in range(REPETICOES):
+        compilado.avaliar_um(entradas[i % len(entradas)])
+    return (time.perf_counter() - t0) / REPETICOES
+
+
+def main():
+    referencia = {}
+    pior = 0.0
+    entradas = {d: validas(c) for d, c in DiagnosticoFuzzy(modo="analitico").compilados.items()}
+    with tempfile.TemporaryDirectory(prefix="fuzzy_defuzz_") as tmp:
+        for refino in REFINOS:
+            dir_regras = copiar_regras(Path(tmp) / f"x{refino}", refino)
+            amostrado = DiagnosticoFuzzy(dir_regras=dir_regras)
+            analitico = DiagnosticoFuzzy(dir_regras=dir_regras, modo="analitico")
+            pontos = amostrado.risco.universe.size
+            for disease, lista in entradas.items():
+                t_am = medir(amostrado.compilados[disease], lista)
+                t_an = medir(analitico.compilados[disease], lista)
+                r_am = np.array([amostrado.compilados[disease].avaliar_um(e)[0] for e in lista])
+                r_an = np.array([analitico.compilados[disease].avaliar_um(e)[0] for e in lista])
+                ref = referencia.setdefault(disease, r_an)
+                pior = max(pior, float(np.max(np.abs(r_an - ref))))
+                print(f"passo/{refino:<4} {disease:<14} risco {pontos:6d} pts   "
+                      f"amostrado {t_am * 1e6:9.1f} us   analitico {t_an * 1e6:7.1f} us   "
+                      f"|diferença| máx {np.max(np.abs(r_am - r_an)):.4f}")
+    print(f"\nvariação do modo analítico entre resoluções: {pior:.2e}")
+    return 0 if pior <= TOLERANCIA else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
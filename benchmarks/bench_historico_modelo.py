@@ -0,0 +1,99 @@
+# benchmarks/bench_historico_modelo.py
+# Aba "Histórico" com dezenas de milhares de entradas: abrir a lista
+# (HistoryModel + QListView), rolar até o fim (páginas lidas sob demanda),
+# acrescentar uma entrada nova e filtrar por doença e data. Roda sem janela
+# (QT_QPA_PLATFORM=offscreen).
+# Uso: python benchmarks/bench_historico_modelo.py [--entradas 50000]
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from PyQt5.QtWidgets import QApplication, QListView  # noqa: E402
+
+from utils.history_manager import HistoryManager  # noqa: E402
+from utils.history_model import HistoryModel  # noqa: E402
+
+DOENCAS = ("Respiratória", "Viral", "Bacteriana")
+
+
+def popular(path, n):
+    """Grava n entradas direto no banco, uma a cada minuto até agora."""
+    history = HistoryManager(path)
+    inicio = datetime.now() - timedelta(minutes=n)
+    con = sqlite3.connect(path)
+    con.executemany("INSERT INTO historico (timestamp, disease, inputs, risco) VALUES (?, ?, ?, ?)",
+                    [((inicio + timedelta(minutes=i)).isoformat(), DOENCAS[i % 3],
+                      json.dumps({"febre": 38.0, "tosse": 5, "saturacao": 92}), float(i % 100))
+                     for i in range(n)])
+    con.commit()
+    con.close()
+    return history
+
+
+def cronometrar(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lista do histórico com muitas entradas.")
+    parser.add_argument("--entradas", type=int, default=50_000)
+    args = parser.parse_args()
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    with tempfile.TemporaryDirectory(prefix="fuzzy_hist_") as tmp:
+        history = popular(Path(tmp) / "h.sqlite3", args.entradas)
+        view = QListView()
+        view.setUniformItemSizes(True)
+        view.resize(600, 400)
+        view.show()
+
+        modelo = None
+
+        def abrir():
+            nonlocal modelo
+            modelo = HistoryModel(history)
+            view.setModel(modelo)
+            app.processEvents()
+
+        print(f"abrir a aba ({args.entradas} entradas)        {cronometrar(abrir):8.1f} ms   "
+              f"{modelo.rowCount()} linhas carregadas")
+
+        # rola até o fim como o usuário: a view pede mais páginas ao chegar ao fim
+        paginas, pior = 0, 0.0
+        t0 = time.perf_counter()
+        while modelo.canFetchMore():
+            t = time.perf_counter()
+            view.scrollToBottom()
+            app.processEvents()
+            pior = max(pior, time.perf_counter() - t)
+            paginas += 1
+        total = time.perf_counter() - t0
+        print(f"rolar até o fim                     {total * 1e3:8.1f} ms   {paginas} páginas, "
+              f"pior passo {pior * 1e3:.1f} ms, {modelo.rowCount()} linhas")
+
+        entrada = history.add("Viral", {"febre": 39.0, "tosse": 7, "saturacao": 88}, 71.5)
+        ms = cronometrar(lambda: (modelo.adicionar(entrada), app.processEvents()))
+        print(f"acrescentar uma entrada             {ms:8.1f} ms   {modelo.rowCount()} linhas (nada relido)")
+
+        ms = cronometrar(lambda: (modelo.filtrar(disease="Bacteriana"), app.processEvents()))
+        print(f"filtrar por doença                  {ms:8.1f} ms   {modelo.total} entradas")
+        hoje = date.today()
+        ms = cronometrar(lambda: (modelo.filtrar(desde=hoje, ate=hoje), app.processEvents()))
+        print(f"filtrar por data (hoje)             {ms:8.1f} ms   {modelo.total} entradas")
+        view.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
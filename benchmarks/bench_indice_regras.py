@@ -0,0 +1,82 @@
+# benchmarks/bench_indice_regras.py
+# Custo de avaliar_um com e sem o índice de suporte das regras, em conjuntos
+# sintéticos cada vez maiores (n termos triangulares por entrada e uma regra
+# E para cada combinação, n³ regras). Em cada entrada só algumas regras
+# podem disparar, então com o índice o custo deve crescer pouco com n.
+# Confere também que os resultados são idênticos aos da avaliação completa.
+# Uso: python benchmarks/bench_indice_regras.py
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy  # noqa: E402
+
+TERMOS = (3, 5, 8, 10)
+REPETICOES = 2000
+UNIVERSOS = {"febre": [35, 41.1, 0.1], "tosse": [0, 10.1, 0.1], "saturacao": [70, 101, 1]}
+SAIDA = {"risco": {"universo": [0, 101, 1], "termos": {
+    "baixo": ["trimf", 0, 0, 50], "medio": ["trapmf", 30, 50, 70, 90], "alto": ["trimf", 70, 100, 100]}}}
+
+_RNG = np.random.default_rng(1234)
+ENTRADAS = list(zip(_RNG.uniform(35, 41, 500), _RNG.uniform(0, 10, 500), _RNG.uniform(70, 100, 500)))
+
+
+def triangulos(inicio, fim, n):
+    """n trimf igualmente espaçados cobrindo [inicio, fim] (ombros nas pontas)."""
+    centros = np.linspace(inicio, fim, n)
+    passo = centros[1] - centros[0]
+    return {f"t{i}": ["trimf", round(c - passo, 6), round(c, 6), round(c + passo, 6)]
+            for i, c in enumerate(centros)}
+
+
+def criar_regras(destino, n):
+    """Grava variaveis.json e uma doença com n³ regras em `destino`."""
+    destino.mkdir()
+    entradas = {v: {"universo": u, "termos": triangulos(u[0], u[1] - u[2] / 2 if v != "saturacao" else 100, n)}
+                for v, u in UNIVERSOS.items()}
+    (destino / "variaveis.json").write_text(json.dumps({"entradas": entradas, "saida": SAIDA}), encoding="utf-8")
+    saidas = ("baixo", "medio", "alto")
+    regras = [{"se": {"febre": f"t{i}", "tosse": f"t{j}", "saturacao": f"t{k}"},
+               "entao": saidas[min(2, 3 * (i + j + (n - 1 - k)) // (3 * (n - 1) + 1))]}
+              for i in range(n) for j in range(n) for k in range(n)]
+    (destino / "sintetica.json").write_text(json.dumps({"doenca": "Sintética", "regras": regras}),
+                                            encoding="utf-8")
+    return destino
+
+
+def medir(compilado, usar_indice):
+    compilado.usar_indice = usar_indice
+    t0 = time.perf_counter()
+    for i in range(REPETICOES):
+        compilado.avaliar_um(ENTRADAS[i % len(ENTRADAS)])
+    return (time.perf_counter() - t0) / REPETICOES
+
+
+def main():
+    iguais = True
+    with tempfile.TemporaryDirectory(prefix="fuzzy_indice_") as tmp:
+        for n in TERMOS:
+            for modo in ("amostrado", "analitico"):
+                d = DiagnosticoFuzzy(dir_regras=criar_regras(Path(tmp) / f"{n}_{modo}", n), modo=modo)
+                c = d.compilados["Sintética"]
+                c.usar_indice = False
+                completos = [c.avaliar_um(e) for e in ENTRADAS]
+                c.usar_indice = True
+                iguais &= completos == [c.avaliar_um(e) for e in ENTRADAS]
+                media = np.mean([len(c.regras_possiveis(e)) for e in ENTRADAS])
+                t_todas, t_indice = medir(c, False), medir(c, True)
+                print(f"{n ** 3:5d} regras  {modo:<10} candidatas {media:5.1f}   "
+                      f"todas {t_todas * 1e6:8.1f} us   índice {t_indice * 1e6:7.1f} us   "
+                      f"({t_todas / t_indice:4.1f}x)")
+    print("\nresultados idênticos à avaliação completa:", "sim" if iguais else "NÃO")
+    return 0 if iguais else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
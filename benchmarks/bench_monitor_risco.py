@@ -0,0 +1,103 @@
+# benchmarks/bench_monitor_risco.py
+# Leituras contínuas de muitos leitos (febre e saturação em passeio
+# aleatório com ruído, tosse fixa por paciente): calcular_risco a cada
+# amostra x MonitorRisco (média móvel, zona morta, quantização e emissão só
+# quando o risco ou as regras mudam, histórico gravado em lote). Informa
+# vazão, quantas avaliações e atualizações houve, linhas gravadas no
+# histórico e o quanto o último risco emitido se afasta do risco exato da
+# amostra bruta.
+# Uso: python benchmarks/bench_monitor_risco.py [--pacientes 2000] [--amostras 50]
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from fuzzy_engine.diagnostico_fuzzy import SEM_REGRAS, DiagnosticoFuzzy  # noqa: E402
+from fuzzy_engine.monitor_risco import MonitorRisco  # noqa: E402
+from utils.history_manager import HistoryManager  # noqa: E402
+
+
+def leituras(pacientes, amostras, semente=0):
+    """(febre, tosse, saturação) de cada amostra: arrays (amostras x pacientes)."""
+    rng = np.random.default_rng(semente)
+    base_f = rng.uniform(36.5, 39.5, pacientes)
+    base_s = rng.uniform(86, 99, pacientes)
+    febre = base_f + np.cumsum(rng.normal(0, 0.02, (amostras, pacientes)), axis=0) \
+        + rng.normal(0, 0.05, (amostras, pacientes))
+    saturacao = base_s + np.cumsum(rng.normal(0, 0.1, (amostras, pacientes)), axis=0) \
+        + rng.normal(0, 0.4, (amostras, pacientes))
+    tosse = np.broadcast_to(rng.integers(0, 11, pacientes).astype(float), (amostras, pacientes))
+    return np.clip(febre, 35, 42), tosse, np.clip(saturacao, 70, 100)
+
+
+def risco_exato(engine, disease, f, t, s):
+    try:
+        return engine.calcular_risco(disease, f, t, s)[0]
+    except ValueError as e:
+        if str(e) != SEM_REGRAS:
+            raise
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Risco por amostra x MonitorRisco em fluxos contínuos.")
+    parser.add_argument("--pacientes", type=int, default=2000)
+    parser.add_argument("--amostras", type=int, default=50, help="amostras por paciente")
+    parser.add_argument("--doenca", default="Respiratória")
+    args = parser.parse_args()
+
+    engine = DiagnosticoFuzzy()
+    febre, tosse, saturacao = leituras(args.pacientes, args.amostras)
+    n = febre.size
+    print(f"{args.pacientes} pacientes x {args.amostras} amostras = {n} leituras ({args.doenca})\n")
+
+    with tempfile.TemporaryDirectory(prefix="fuzzy_monitor_") as tmp:
+        # referência: uma avaliação e uma linha de histórico por amostra
+        history = HistoryManager(Path(tmp) / "a.sqlite3")
+        exatos = np.full(febre.shape, np.nan)
+        t0 = time.perf_counter()
+        for k in range(args.amostras):
+            for p in range(args.pacientes):
+                r = risco_exato(engine, args.doenca, febre[k, p], tosse[k, p], saturacao[k, p])
+                if r is not None:
+                    exatos[k, p] = r
+                    history.add(args.doenca, {"febre": float(febre[k, p]), "tosse": float(tosse[k, p]),
+                                              "saturacao": float(saturacao[k, p])}, r)
+        dt = time.perf_counter() - t0
+        print(f"{'calcular_risco + add por amostra':<34} {dt:7.2f} s  {n / dt:9,.0f} leituras/s   "
+              f"{n} avaliações, {history.count()} linhas no histórico")
+
+        history = HistoryManager(Path(tmp) / "b.sqlite3")
+        monitor = MonitorRisco(engine, history=history)
+        emitido = np.full(febre.shape, np.nan)
+        atual = [None] * args.pacientes
+        t0 = time.perf_counter()
+        for k in range(args.amostras):
+            for p in range(args.pacientes):
+                # a tosse vem só na primeira leitura (triagem)
+                a = monitor.observar(p, args.doenca, febre=febre[k, p], saturacao=saturacao[k, p],
+                                     tosse=tosse[k, p] if k == 0 else None)
+                if a is not None:
+                    atual[p] = a["risco"]
+                emitido[k, p] = np.nan if atual[p] is None else atual[p]
+        monitor.descarregar()
+        dt = time.perf_counter() - t0
+        est = monitor.estatisticas()
+        print(f"{'MonitorRisco':<34} {dt:7.2f} s  {n / dt:9,.0f} leituras/s   "
+              f"{est['avaliacoes']} avaliações, {est['emitidas']} atualizações, "
+              f"{history.count()} linhas no histórico")
+
+    desvio = np.abs(emitido - exatos)
+    desvio = desvio[~np.isnan(desvio)]
+    print(f"\nrisco emitido x risco exato da leitura bruta (pontos percentuais): "
+          f"mediana {np.median(desvio):.2f}, p95 {np.percentile(desvio, 95):.2f}, máximo {desvio.max():.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# benchmarks/bench_plotter_memoria.py
+# Verifica que o FuzzyPlotter reutiliza as figuras: milhares de destaques não
+# devem criar figuras nem artistas novos, e a memória Python deve ficar estável.
+# Uso: python benchmarks/bench_plotter_memoria.py
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy  # noqa: E402
+from fuzzy_engine.fuzzy_plotter import FuzzyPlotter  # noqa: E402
+
+CALCULOS = 3000
+# crescimento aceito entre o aquecimento e o fim (bytes)
+LIMITE_CRESCIMENTO = 256 * 1024
+
+
+def destacar(plotter, i):
+    figs = [
+        plotter.plot_febre(highlight_value=35 + (i % 60) * 0.1),
+        plotter.plot_tosse(highlight_value=i % 11),
+        plotter.plot_saturacao(highlight_value=70 + i % 31),
+        plotter.plot_risco(highlight_value=i % 101),
+    ]
+    return figs
+
+
+def main():
+    plotter = FuzzyPlotter(DiagnosticoFuzzy())
+    # canvas com suporte a blit, como o FigureCanvasQTAgg da interface
+    figs = destacar(plotter, 0)
+    for fig in figs:
+        FigureCanvasAgg(fig).draw()
+    artistas = [len(f.axes[0].get_children()) for f in figs]
+
+    for i in range(200):  # aquecimento
+        destacar(plotter, i)
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    for i in range(CALCULOS):
+        atuais = destacar(plotter, i)
+    dt = time.perf_counter() - t0
+    crescimento = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+
+    mesmas = all(a is b for a, b in zip(figs, atuais))
+    artistas_fim = [len(f.axes[0].get_children()) for f in atuais]
+    print(f"{CALCULOS} cálculos: {dt / CALCULOS * 1e3:.3f} ms por cálculo (4 gráficos), "
+          f"crescimento de memória {crescimento / 1024:.1f} KiB, "
+          f"mesmas figuras: {mesmas}, artistas {artistas} -> {artistas_fim}")
+    ok = mesmas and artistas == artistas_fim and crescimento < LIMITE_CRESCIMENTO
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
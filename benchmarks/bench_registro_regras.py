@@ -0,0 +1,95 @@
+# benchmarks/bench_registro_regras.py
+# Centenas de variantes de conjuntos de regras (cópias das doenças de
+# app/regras com pesos e nomes diferentes, como versões por hospital ou
+# protocolo) num diretório temporário. Compara o motor com todas compiladas
+# (fixadas) e com o registro limitado (LRU de --max-conjuntos): partida,
+# memória estimada das formas compiladas, acertos do cache e latência de
+# calcular_risco com acesso concentrado em poucas variantes (Zipf).
+# Uso: python benchmarks/bench_registro_regras.py [--variantes 300] [--max-conjuntos 32] [--pedidos 20000]
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from fuzzy_engine.definicoes import DIR_DEFINICOES, ARQUIVO_VARIAVEIS  # noqa: E402
+from fuzzy_engine.diagnostico_fuzzy import SEM_REGRAS, DiagnosticoFuzzy  # noqa: E402
+
+
+def criar_variantes(destino, n, semente=0):
+    """Grava variaveis.json e n arquivos de doença derivados dos originais."""
+    rng = np.random.default_rng(semente)
+    (destino / f"{ARQUIVO_VARIAVEIS}.json").write_bytes((DIR_DEFINICOES / f"{ARQUIVO_VARIAVEIS}.json").read_bytes())
+    bases = [json.loads(p.read_text(encoding="utf-8")) for p in sorted(DIR_DEFINICOES.glob("*.json"))
+             if p.stem != ARQUIVO_VARIAVEIS]
+    for i in range(n):
+        spec = json.loads(json.dumps(bases[i % len(bases)]))
+        spec["doenca"] = f"{spec['doenca']} v{i:03d}"
+        spec["ordem"] = i
+        for regra in spec["regras"]:
+            regra["peso"] = round(float(rng.uniform(0.5, 1.0)), 3)
+        (destino / f"variante_{i:03d}.json").write_text(json.dumps(spec, ensure_ascii=False), encoding="utf-8")
+
+
+def rodar(engine, pedidos):
+    """Latências (s) de calcular_risco, separadas em acertos e faltas do registro."""
+    acertos, faltas = [], []
+    for disease, valores in pedidos:
+        compilada = engine.registro.compilada(disease)
+        t0 = time.perf_counter()
+        try:
+            engine.calcular_risco(disease, *valores)
+        except ValueError as e:
+            if str(e) != SEM_REGRAS:
+                raise
+        (acertos if compilada else faltas).append(time.perf_counter() - t0)
+    return acertos, faltas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Registro de regras com LRU x todas as variantes compiladas.")
+    parser.add_argument("--variantes", type=int, default=300)
+    parser.add_argument("--max-conjuntos", type=int, default=32)
+    parser.add_argument("--pedidos", type=int, default=20_000)
+    parser.add_argument("--zipf", type=float, default=1.3, help="expoente da popularidade das variantes")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory(prefix="fuzzy_registro_") as tmp:
+        criar_variantes(Path(tmp), args.variantes)
+        nomes = DiagnosticoFuzzy(dir_regras=tmp).doencas()
+        escolhas = (rng.zipf(args.zipf, args.pedidos) - 1) % len(nomes)
+        valores = np.column_stack([rng.uniform(36, 41, args.pedidos), rng.integers(0, 11, args.pedidos),
+                                   rng.uniform(85, 100, args.pedidos)])
+        pedidos = [(nomes[k], tuple(v)) for k, v in zip(escolhas, valores)]
+        print(f"{len(nomes)} variantes, {args.pedidos} pedidos (Zipf {args.zipf}: "
+              f"{len(set(escolhas))} variantes distintas pedidas)\n")
+
+        formas = {
+            "todas compiladas": dict(fixadas=nomes),
+            f"registro LRU ({args.max_conjuntos})": dict(max_conjuntos=args.max_conjuntos),
+        }
+        for titulo, kw in formas.items():
+            t0 = time.perf_counter()
+            engine = DiagnosticoFuzzy(dir_regras=tmp, **kw)
+            partida = time.perf_counter() - t0
+            acertos, faltas = rodar(engine, pedidos)
+            est = engine.registro.estatisticas()
+            compiladas = [d for d in est["por_doenca"].values() if d["compilacao_ms"] is not None]
+            print(f"{titulo:<22} partida {partida * 1e3:8.1f} ms   compiladas {est['compiladas']:4d}   "
+                  f"memória {est['bytes'] / 2 ** 20:6.2f} MB   acertos {len(acertos) / len(pedidos):6.1%}   "
+                  f"remoções {est['remocoes']}")
+            print(f"{'':<22} latência: acerto p50 {statistics.median(acertos) * 1e6:7.1f} µs" +
+                  (f", falta p50 {statistics.median(faltas) * 1e3:6.2f} ms" if faltas else "") +
+                  f"   compilação média {statistics.mean(d['compilacao_ms'] for d in compiladas):.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+# benchmarks/bench_regras_acionadas.py
+# Compara o custo da inferência (compute do skfuzzy) com o da extração das
+# regras acionadas em calcular_risco. Uso: python benchmarks/bench_regras_acionadas.py
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy  # noqa: E402
+
+CASOS = [(38.7, 7, 89), (39.5, 5, 92), (36.6, 1, 98), (40.2, 9, 78)]
+REPETICOES = 500
+
+
+def medir(engine, disease):
+    t_inf = t_exp = 0.0
+    for i in range(REPETICOES):
+        feb, tos, sat = CASOS[i % len(CASOS)]
+        # varia a febre para não cair no cache interno do skfuzzy
+        feb += (i % 50) * 0.001
+        with engine._lock_skfuzzy, engine.pool.simulacao(disease) as csim:
+            t0 = time.perf_counter()
+            csim.input['febre'] = feb
+            csim.input['tosse'] = tos
+            csim.input['saturacao'] = sat
+            csim.compute()
+            t1 = time.perf_counter()
+            engine._regras_acionadas(disease, csim)
+            t2 = time.perf_counter()
+        t_inf += t1 - t0
+        t_exp += t2 - t1
+    return t_inf / REPETICOES, t_exp / REPETICOES
+
+
+def main():
+    engine = DiagnosticoFuzzy()
+    pior = 0.0
+    for disease in engine.rulesets:
+        inf, exp = medir(engine, disease)
+        razao = exp / inf
+        pior = max(pior, razao)
+        print(f"{disease:<14} inferência {inf * 1e6:9.1f} us   regras acionadas {exp * 1e6:7.1f} us   ({razao:.1%})")
+    # a explicação não pode custar mais que a própria inferência
+    return 0 if pior < 1.0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# benchmarks/bench_snapshot.py
+# Partida a frio de um processo que pontua pacientes: construir o motor dos
+# arquivos de regras (DiagnosticoFuzzy()) x carregar o snapshot
+# (DiagnosticoFuzzy.de_snapshot). Cada medida roda num processo novo (imports
+# incluídos) até o primeiro calcular_risco; informa também a memória máxima
+# e se o skfuzzy foi importado. Por fim, N processos carregam o mesmo
+# snapshot e contam quantas páginas do arquivo estão compartilhadas.
+# Uso: python benchmarks/bench_snapshot.py [--repeticoes 5] [--processos 4]
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+PROCESSO = """
+import time
+t0 = time.perf_counter()
+import json, resource, sys
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+engine = {criar}
+engine.calcular_risco("Viral", 38.7, 7, 89)
+t1 = time.perf_counter()
+print(json.dumps({{"ms": (t1 - t0) * 1e3, "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "skfuzzy": "skfuzzy" in sys.modules}}))
+"""
+
+# mantém o snapshot mapeado e informa quanto do mapeamento é compartilhado (Linux)
+COMPARTILHADO = """
+import sys
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+engine = DiagnosticoFuzzy.de_snapshot({snap!r})
+print("pronto", flush=True)
+sys.stdin.readline()
+"""
+
+
+def rodar(criar):
+    r = subprocess.run([sys.executable, "-c", PROCESSO.format(criar=criar)], cwd=RAIZ / "app",
+                       capture_output=True, text=True, check=True)
+    return json.loads(r.stdout.strip().splitlines()[-1])
+
+
+def paginas_compartilhadas(pid, snap):
+    """(kB mapeados do snapshot, kB compartilhados com outros processos) via /proc/<pid>/smaps."""
+    try:
+        linhas = Path(f"/proc/{pid}/smaps").read_text().splitlines()
+    except OSError:
+        return None
+    total = compartilhado = 0
+    dentro = False
+    for linha in linhas:
+        campos = linha.split()
+        if "-" in campos[0] and len(campos) >= 5:
+            dentro = campos[-1] == str(snap)
+        elif dentro and campos[0] == "Rss:":
+            total += int(campos[1])
+        elif dentro and campos[0] in ("Shared_Clean:", "Shared_Dirty:"):
+            compartilhado += int(campos[1])
+    return total, compartilhado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partida a frio: motor construído x snapshot.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--processos", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="fuzzy_snap_") as tmp:
+        snap = Path(tmp) / "motor.snap"
+        formas = {
+            "DiagnosticoFuzzy()": "DiagnosticoFuzzy()",
+            "de_snapshot (sem arquivo: constrói e grava)": None,
+            "de_snapshot": f"DiagnosticoFuzzy.de_snapshot({str(snap)!r})",
+        }
+        for nome, criar in formas.items():
+            if criar is None:
+                r = [rodar(f"DiagnosticoFuzzy.de_snapshot({str(snap)!r})")]
+            else:
+                r = [rodar(criar) for _ in range(args.repeticoes)]
+            ms = statistics.median(x["ms"] for x in r)
+            print(f"{nome:<45} {ms:8.1f} ms   memória {r[0]['rss_mb']:6.1f} MB   "
+                  f"skfuzzy {'sim' if r[0]['skfuzzy'] else 'não'}")
+        print(f"\nsnapshot: {snap.stat().st_size / 1024:.1f} kB")
+
+        procs = [subprocess.Popen([sys.executable, "-c", COMPARTILHADO.format(snap=str(snap))], cwd=RAIZ / "app",
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+                 for _ in range(args.processos)]
+        try:
+            for p in procs:
+                p.stdout.readline()
+            for p in procs:
+                info = paginas_compartilhadas(p.pid, snap)
+                if info is None:
+                    print("(/proc/<pid>/smaps indisponível: contagem de páginas compartilhadas omitida)")
+                    break
+                print(f"processo {p.pid}: {info[0]} kB do snapshot residentes, {info[1]} kB compartilhados")
+        finally:
+            for p in procs:
+                p.communicate("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
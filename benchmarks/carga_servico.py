@@ -0,0 +1,158 @@
+# benchmarks/carga_servico.py
+# Gerador de carga para app/cli_servico.py: mede vazão e latência (p50/p99)
+# com concorrência crescente. Cada cliente mantém uma conexão keep-alive e
+# envia um pedido por vez, então a concorrência é o número de pedidos em voo.
+#
+# Uso:
+#   python benchmarks/carga_servico.py                       # sobe um serviço numa porta livre
+#   python benchmarks/carga_servico.py --url 127.0.0.1:8765  # usa um serviço já rodando
+#   python benchmarks/carga_servico.py --unix /tmp/fuzzy.sock --concorrencias 1,8,64 --duracao 5
+#   python benchmarks/carga_servico.py --servico "--max-lote 64 --paralelos 1" --saida carga.json
+import argparse
+import asyncio
+import json
+import shlex
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+RAIZ = Path(__file__).resolve().parents[1]
+DOENCAS = ("Respiratória", "Viral", "Bacteriana")
+
+
+class Cliente:
+    """Conexão HTTP/1.1 keep-alive mínima (TCP ou socket Unix)."""
+
+    def __init__(self, host=None, porta=None, unix=None):
+        self.host, self.porta, self.unix = host, porta, unix
+
+    async def conectar(self):
+        if self.unix:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.unix)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.porta)
+        return self
+
+    async def requisitar(self, metodo, caminho, corpo=b""):
+        self.writer.write(f"{metodo} {caminho} HTTP/1.1\r\nHost: localhost\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(corpo)}\r\n\r\n".encode()
+                          + corpo)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        tamanho = 0
+        while True:
+            linha = await self.reader.readline()
+            if linha in (b"\r\n", b""):
+                break
+            if linha.lower().startswith(b"content-length:"):
+                tamanho = int(linha.split(b":")[1])
+        return status, await self.reader.readexactly(tamanho)
+
+    def fechar(self):
+        self.writer.close()
+
+
+def corpos(n, seed=0):
+    """Pedidos JSON pré-codificados (entradas aleatórias, doenças alternadas)."""
+    rng = np.random.default_rng(seed)
+    return [json.dumps({"id": i, "disease": DOENCAS[i % len(DOENCAS)],
+                        "febre": round(float(rng.uniform(35, 41)), 1), "tosse": int(rng.integers(0, 11)),
+                        "saturacao": int(rng.integers(70, 101))}, ensure_ascii=False).encode()
+            for i in range(n)]
+
+
+async def nivel(endereco, concorrencia, duracao, pedidos):
+    """Roda `concorrencia` clientes por `duracao` segundos. Retorna o resumo do nível."""
+    latencias, status = [], {}
+    clientes = [await Cliente(**endereco).conectar() for _ in range(concorrencia)]
+    fim = time.perf_counter() + duracao
+
+    async def laco(k, cliente):
+        i = k
+        while time.perf_counter() < fim:
+            t0 = time.perf_counter()
+            s, _ = await cliente.requisitar("POST", "/risco", pedidos[i % len(pedidos)])
+            latencias.append(time.perf_counter() - t0)
+            status[s] = status.get(s, 0) + 1
+            i += concorrencia
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(laco(k, c) for k, c in enumerate(clientes)))
+    total = time.perf_counter() - t0
+    _, corpo = await clientes[0].requisitar("GET", "/estatisticas")
+    for c in clientes:
+        c.fechar()
+    lat = np.array(latencias) * 1e3
+    return {
+        "concorrencia": concorrencia,
+        "pedidos": len(latencias),
+        "vazao_s": round(len(latencias) / total, 1),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p99_ms": round(float(np.percentile(lat, 99)), 3),
+        "max_ms": round(float(lat.max()), 3),
+        "status": {str(k): v for k, v in sorted(status.items())},
+        "servidor": json.loads(corpo),
+    }
+
+
+def subir_servico(opcoes):
+    """Inicia cli_servico.py numa porta livre e retorna (processo, host, porta)."""
+    proc = subprocess.Popen([sys.executable, "cli_servico.py", "--porta", "0", *shlex.split(opcoes)],
+                            cwd=RAIZ / "app", stdout=subprocess.PIPE, text=True)
+    linha = proc.stdout.readline()
+    if not linha.startswith("ouvindo em http://"):
+        proc.kill()
+        raise RuntimeError(f"o serviço não iniciou: {linha!r}")
+    host, porta = linha.split("http://")[1].strip().rsplit(":", 1)
+    return proc, host, int(porta)
+
+
+async def rodar(args, endereco):
+    pedidos = corpos(5000)
+    resultados = []
+    print(f"{'concorr.':>8} {'pedidos':>8} {'vazão/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'máx ms':>8} "
+          f"{'lote médio':>10}  status")
+    for c in args.concorrencias:
+        r = await nivel(endereco, c, args.duracao, pedidos)
+        resultados.append(r)
+        print(f"{c:>8} {r['pedidos']:>8} {r['vazao_s']:>9.1f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{r['max_ms']:>8.2f} {r['servidor']['lote_medio'] or 0:>10.1f}  {r['status']}")
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Carga crescente sobre o serviço de pontuação fuzzy.")
+    parser.add_argument("--url", help="host:porta de um serviço já rodando")
+    parser.add_argument("--unix", help="socket Unix de um serviço já rodando")
+    parser.add_argument("--servico", default="", help="opções extras para o cli_servico.py iniciado aqui")
+    parser.add_argument("--concorrencias", default="1,4,16,64,256",
+                        type=lambda s: [int(x) for x in s.split(",")], help="níveis (padrão 1,4,16,64,256)")
+    parser.add_argument("--duracao", type=float, default=3.0, help="segundos por nível (padrão 3)")
+    parser.add_argument("--saida", help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    proc = None
+    if args.unix:
+        endereco = {"unix": args.unix}
+    elif args.url:
+        host, porta = args.url.replace("http://", "").rsplit(":", 1)
+        endereco = {"host": host, "porta": int(porta)}
+    else:
+        proc, host, porta = subir_servico(args.servico)
+        endereco = {"host": host, "porta": porta}
+    try:
+        resultados = asyncio.run(rodar(args, endereco))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+    if args.saida:
+        Path(args.saida).write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# benchmarks/suite.py
+# Suíte de desempenho sem interface gráfica: motor, gráficos, histórico e PDF.
+#
+# Uso:
+#   python benchmarks/suite.py                         # mede e grava resultados/<commit>.json (ignorado pelo git)
+#   python benchmarks/suite.py --salvar-baseline       # também grava baseline.json
+#   python benchmarks/suite.py --comparar baseline.json [--tolerancia 0.25]
+#   python benchmarks/suite.py --filtro calcular_risco # só os casos cujo nome contém o texto
+#
+# Cada caso é medido em várias rodadas; o valor registrado é a mediana por
+# chamada (em microssegundos) da rodada mais rápida, o que reduz o ruído de
+# outros processos. Com --comparar, o código de saída é 1 se algum caso ficar
+# mais lento que baseline * (1 + tolerância).
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+RAIZ = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(RAIZ / "app"))
+
+import matplotlib  # noqa: E402
+import numpy as np  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy  # noqa: E402
+from fuzzy_engine.fuzzy_plotter import FuzzyPlotter  # noqa: E402
+from utils.history_manager import HistoryManager  # noqa: E402
+from utils.pdf_exporter import PDFExporter  # noqa: E402
+
+DIR_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# entradas fixas (semente fixa) para que todas as execuções meçam o mesmo trabalho
+_RNG = np.random.default_rng(1234)
+ENTRADAS = list(zip(_RNG.uniform(35, 41, 500).round(2), _RNG.integers(0, 11, 500), _RNG.integers(70, 101, 500)))
+
+
+def medir(fn, repeticoes, rodadas=5, aquecimento=3):
+    """Mediana (segundos por chamada) da rodada mais rápida; fn recebe o índice da chamada."""
+    for i in range(aquecimento):
+        fn(i)
+    melhores = []
+    gc_ativo = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rodadas):
+            tempos = []
+            for i in range(repeticoes):
+                t0 = time.perf_counter()
+                fn(i)
+                tempos.append(time.perf_counter() - t0)
+            melhores.append(statistics.median(tempos))
+    finally:
+        if gc_ativo:
+            gc.enable()
+    return min(melhores)
+
+
+# --- casos ---
+def casos(tmp):
+    """Gera (nome, fn, repetições). Cada fn é preparado aqui, fora da medição."""
+    yield "init/DiagnosticoFuzzy", lambda i: DiagnosticoFuzzy(), 10
+    snapshot = Path(tmp) / "motor.snap"
+    DiagnosticoFuzzy.de_snapshot(snapshot)
+    yield "init/de_snapshot", lambda i: DiagnosticoFuzzy.de_snapshot(snapshot), 20
+
+    engine = DiagnosticoFuzzy()
+    for disease in engine.rulesets:
+        # só entradas que acionam alguma regra (as demais levantam exceção no skfuzzy)
+        riscos, _ = engine.calcular_risco_lote(disease, *zip(*ENTRADAS))
+        validas = [e for e, r in zip(ENTRADAS, riscos) if r == r]
+
+        def calcular(i, disease=disease, validas=validas):
+            feb, tos, sat = validas[i % len(validas)]
+            engine.calcular_risco(disease, feb, tos, sat)
+        yield f"calcular_risco/{disease}", calcular, 200
+
+    # todas as doenças para o mesmo paciente (fuzzificação e centroides compartilhados)
+    yield "calcular_todas", lambda i: engine.calcular_todas(*ENTRADAS[i % len(ENTRADAS)]), 200
+    lote = [np.array(x) for x in zip(*ENTRADAS)]
+    yield "calcular_todas_lote@500", lambda i: engine.calcular_todas_lote(*lote), 10
+
+    # pertinências e centroide analíticos
+    engine_analitico = DiagnosticoFuzzy(modo="analitico")
+    for disease in engine.rulesets:
+        riscos, _ = engine_analitico.calcular_risco_lote(disease, *zip(*ENTRADAS))
+        validas = [e for e, r in zip(ENTRADAS, riscos) if r == r]
+
+        def calcular_analitico(i, disease=disease, validas=validas):
+            feb, tos, sat = validas[i % len(validas)]
+            engine_analitico.calcular_risco(disease, feb, tos, sat)
+        yield f"calcular_risco_analitico/{disease}", calcular_analitico, 200
+
+    # Sugeno de ordem zero (média ponderada das constantes, sem universo de saída)
+    engine_sugeno = DiagnosticoFuzzy(inferencia="sugeno")
+    for disease in engine.rulesets:
+        riscos, _ = engine_sugeno.calcular_risco_lote(disease, *zip(*ENTRADAS))
+        validas = [e for e, r in zip(ENTRADAS, riscos) if r == r]
+
+        def calcular_sugeno(i, disease=disease, validas=validas):
+            feb, tos, sat = validas[i % len(validas)]
+            engine_sugeno.calcular_risco(disease, feb, tos, sat)
+        yield f"calcular_risco_sugeno/{disease}", calcular_sugeno, 200
+
+    engine_skfuzzy = DiagnosticoFuzzy(avaliador="skfuzzy")
+    for disease in engine.rulesets:
+        riscos, _ = engine.calcular_risco_lote(disease, *zip(*ENTRADAS))
+        validas = [e for e, r in zip(ENTRADAS, riscos) if r == r]
+
+        def calcular_skfuzzy(i, disease=disease, validas=validas):
+            feb, tos, sat = validas[i % len(validas)]
+            engine_skfuzzy.calcular_risco(disease, feb, tos, sat)
+        yield f"calcular_risco_skfuzzy/{disease}", calcular_skfuzzy, 200
+
+    for disease in engine.rulesets:
+        # extração das regras acionadas de uma simulação já calculada (sem a inferência)
+        sim = engine.pool.retirar(disease)
+        sim.input['febre'], sim.input['tosse'], sim.input['saturacao'] = ENTRADAS[0]
+        sim.compute()
+        yield f"regras_acionadas/{disease}", lambda i, d=disease, s=sim: engine._regras_acionadas(d, s), 500
+
+    # simulações "e se": curva de saturação e superfície febre x saturação
+    faixa_sat, faixa_feb = np.arange(70, 100.5, 0.5), np.linspace(35, 41, 121)
+    yield "varrer/1d@61", lambda i: engine.varrer("Viral", 38.7, 7, 89, saturacao=faixa_sat), 50
+    yield "varrer/2d@121x121", lambda i: engine.varrer("Viral", 38.7, 7, 89, febre=faixa_feb,
+                                                       saturacao=np.linspace(70, 100, 121)), 10
+
+    # gráficos num canvas Agg com blit, como o canvas Qt da interface
+    plotter = FuzzyPlotter(engine)
+    for var in ("febre", "tosse", "saturacao", "risco"):
+        plot = getattr(plotter, f"plot_{var}")
+        FigureCanvasAgg(plot()).draw()
+        u = getattr(engine, var).universe
+        yield f"plot/{var}/sem_destaque", lambda i, plot=plot: plot(), 200
+        yield f"plot/{var}/com_destaque", lambda i, plot=plot, u=u: plot(highlight_value=u[i % len(u)]), 200
+
+    superficie = engine.varrer("Viral", 38.7, 7, 89, febre=faixa_feb, saturacao=np.linspace(70, 100, 121))
+    FigureCanvasAgg(plotter.plot_varredura(superficie)).draw()
+
+    def varredura_desenho(i):
+        plotter.plot_varredura(superficie).canvas.draw()
+    yield "plot/varredura_2d", varredura_desenho, 20
+
+    def figura_nova(i):
+        fig = FuzzyPlotter(engine).plot_febre(highlight_value=38.0)
+        FigureCanvasAgg(fig).draw()
+    yield "plot/figura_nova", figura_nova, 10
+
+    # histórico com o banco já contendo N entradas
+    for n in (0, 10_000, 100_000):
+        hist = HistoryManager(Path(tmp) / f"hist_{n}.sqlite3", legado=Path(tmp) / "inexistente.json")
+        con = hist._con()
+        con.executemany("INSERT INTO historico (timestamp, disease, inputs, risco) VALUES (?, ?, ?, ?)",
+                        (("2026-01-01T00:00:00", "Viral", '{"febre": 38.0}', 50.0) for _ in range(n)))
+        yield f"history/add@{n}", lambda i, h=hist: h.add("Viral", {"febre": 38.0, "tosse": 5, "saturacao": 90}, 50.0), 200
+        yield f"history/list50@{n}", lambda i, h=hist: h.list(50), 100
+
+    pdf = PDFExporter(Path(tmp))
+    figs = [plotter.plot_febre(38.7), plotter.plot_tosse(7), plotter.plot_saturacao(89), plotter.plot_risco(61.4)]
+    info = {"febre": 38.7, "tosse": 7, "saturacao": 89, "doenca": "Viral"}
+    yield "pdf/export", lambda i: pdf.export("bench", info, 61.4, figs), 5
+
+
+def metadados():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        # código alterado e não commitado: o resultado não é o do commit
+        alterado = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no", "--", "app", "benchmarks"],
+                                  cwd=RAIZ, capture_output=True, text=True, check=True).stdout.strip()
+        if alterado:
+            commit += "-modificado"
+    except (OSError, subprocess.CalledProcessError):
+        commit = "desconhecido"
+    return {
+        "commit": commit,
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def comparar(atual, baseline, tolerancia):
+    """Imprime a comparação e retorna a lista de casos que regrediram."""
+    regressoes = []
+    print(f"\ncomparação com {baseline['meta'].get('commit')} (tolerância {tolerancia:.0%}):")
+    for nome, us in atual["casos"].items():
+        base = baseline["casos"].get(nome)
+        if base is None:
+            print(f"  {nome:<36} {us:12.1f} us   (novo)")
+            continue
+        razao = us / base
+        marca = "REGRESSÃO" if razao > 1 + tolerancia else ""
+        print(f"  {nome:<36} {us:12.1f} us   base {base:12.1f} us   {razao:6.2f}x {marca}")
+        if marca:
+            regressoes.append(nome)
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do diagnóstico fuzzy.")
+    parser.add_argument("--comparar", metavar="JSON", help="baseline para comparar (falha se houver regressão)")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="aumento aceito sobre a baseline (padrão 0.25)")
+    parser.add_argument("--salvar-baseline", action="store_true", help=f"grava também {BASELINE.name}")
+    parser.add_argument("--filtro", default="", help="mede só os casos cujo nome contém este texto")
+    parser.add_argument("--saida", help="arquivo JSON de resultados (padrão: resultados/<commit>.json)")
+    args = parser.parse_args(argv)
+
+    resultado = {"meta": metadados(), "casos": {}}
+    with tempfile.TemporaryDirectory(prefix="fuzzy_bench_") as tmp:
+        for nome, fn, repeticoes in casos(tmp):
+            if args.filtro not in nome:
+                continue
+            us = medir(fn, repeticoes) * 1e6
+            resultado["casos"][nome] = round(us, 2)
+            print(f"{nome:<38} {us:12.1f} us")
+
+    saida = Path(args.saida) if args.saida else DIR_RESULTADOS / f"{resultado['meta']['commit']}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nresultados em {saida}")
+    if args.salvar_baseline:
+        BASELINE.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"baseline em {BASELINE}")
+
+    if args.comparar:
+        baseline = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        regressoes = comparar(resultado, baseline, args.tolerancia)
+        if regressoes:
+            print(f"\n{len(regressoes)} caso(s) com regressão: {', '.join(regressoes)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+# tests/conftest.py
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """Motor com as regras de app/regras (avaliador compilado, modo amostrado)."""
+    from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+
+    return DiagnosticoFuzzy()
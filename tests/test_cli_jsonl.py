@@ -0,0 +1,22 @@
+# tests/test_cli_jsonl.py
+import json
+
+from cli_jsonl import ler_pedidos, pontuar
+
+
+def test_pedidos_invalidos_nao_interrompem_o_fluxo(engine):
+    linhas = [
+        '{"id": 1, "disease": ["a"]}',
+        '{"id": 2, "disease": {"x": 1}}',
+        '{"id": 3, "doenca": null}',
+        '[1, 2]',
+        '{"id": 4, "disease": "Viral", "febre": [38], "tosse": 7, "saturacao": 89}',
+        '{"id": 5, "disease": "Viral", "febre": 38.7, "tosse": 7, "saturacao": 89}',
+    ]
+    respostas = list(pontuar(ler_pedidos(linhas), engine.compilados))
+    assert [r.get("erro") for r in respostas] == [
+        "doença desconhecida", "doença desconhecida", "doença desconhecida", "JSON inválido",
+        "febre inválido", None]
+    assert respostas[-1]["id"] == 5
+    assert respostas[-1]["risco"] == round(engine.calcular_risco("Viral", 38.7, 7, 89)[0], 4)
+    json.dumps(respostas)
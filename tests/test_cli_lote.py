@@ -0,0 +1,32 @@
+# tests/test_cli_lote.py
+import csv
+
+from cli_lote import ler_blocos, processar
+
+LINHAS = [
+    "id,disease,febre,tosse,saturacao",
+    "1,Viral,38.7,7,89",
+    "2,Viral,38.7,7",        # campo final ausente
+    "",
+    "3,Bacteriana,39",       # registro truncado
+    "4,Viral,38.7,7,89,x",   # campo a mais
+    "5,Viral,\"38,7\",7,89",
+]
+
+
+def test_linhas_curtas_nao_cortam_colunas(tmp_path):
+    entrada = tmp_path / "entrada.csv"
+    entrada.write_text("\n".join(LINHAS) + "\n", encoding="utf-8")
+    blocos = list(ler_blocos(entrada, 2))
+    assert [len(b["saturacao"]) for b in blocos] == [2, 2, 1]
+    assert all(len(v) == len(b["id"]) for b in blocos for v in b.values())
+    assert blocos[0]["saturacao"] == ["89", ""]
+
+    saida = tmp_path / "saida.csv"
+    linhas, _ = processar(entrada, saida, workers=1, bloco=2, progresso=None)
+    assert linhas == 5
+    with open(saida, newline="", encoding="utf-8") as f:
+        resultado = list(csv.DictReader(f))
+    assert [r["id"] for r in resultado] == ["1", "2", "3", "4", "5"]
+    assert [r["erro"] for r in resultado] == ["", "saturacao inválido", "tosse inválido", "", ""]
+    assert resultado[0]["risco"] == resultado[3]["risco"] == resultado[4]["risco"] != ""
@@ -0,0 +1,91 @@
+# tests/test_cli_servico.py
+import asyncio
+import json
+
+import pytest
+
+from cli_servico import FilaCheia, MicroLotes, ServicoFuzzy
+
+PEDIDO = {"id": 7, "disease": "Viral", "febre": 38.7, "tosse": 7, "saturacao": 89}
+
+
+def test_micro_lotes_juntam_pedidos_e_coincidem_com_o_motor(engine):
+    valores = [(36.0 + i * 0.05, i % 11, 99.0 - i * 0.1) for i in range(100)]
+
+    async def rodar():
+        lotes = MicroLotes(engine, max_lote=32, max_espera=0.01, paralelos=1).iniciar()
+        try:
+            return await asyncio.gather(*(lotes.avaliar("Bacteriana", v, 5.0) for v in valores)), lotes
+        finally:
+            await lotes.encerrar()
+
+    resultados, lotes = asyncio.run(rodar())
+    riscos, ativ = engine.calcular_risco_lote("Bacteriana", *zip(*valores))
+    assert [r for r, _ in resultados] == pytest.approx(riscos.tolist(), nan_ok=True)
+    assert all((a == b).all() for (_, a), b in zip(resultados, ativ))
+    est = lotes.estatisticas
+    assert sum(est.lotes) == len(valores)
+    assert 1 < est.n_lotes < len(valores) and max(est.lotes) <= 32
+
+
+def test_fila_cheia_e_tempo_esgotado(engine):
+    async def rodar():
+        # sem iniciar o coletor: os pedidos ficam na fila
+        servico = ServicoFuzzy(engine, timeout=0.01, tamanho_fila=1)
+        primeiro = asyncio.ensure_future(servico.pontuar(PEDIDO))
+        await asyncio.sleep(0)
+        with pytest.raises(FilaCheia):
+            await servico.lotes.avaliar("Viral", (38.7, 7, 89), 1.0)
+        cheio = await servico.pontuar(PEDIDO)
+        return await primeiro, cheio, servico.estatisticas.contagens
+
+    (status_exp, exp), (status_cheio, cheio), contagens = asyncio.run(rodar())
+    assert (status_exp, exp) == (504, {"id": 7, "erro": "tempo esgotado"})
+    assert (status_cheio, cheio) == (503, {"id": 7, "erro": "fila cheia"})
+    assert contagens["expirados"] == 1 and contagens["rejeitados_fila"] == 1
+
+
+async def _post(reader, writer, corpo):
+    corpo = corpo if isinstance(corpo, bytes) else json.dumps(corpo).encode("utf-8")
+    writer.write(b"POST /risco HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n%s" % (len(corpo), corpo))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    cabecalhos = {}
+    while (linha := await reader.readline()) != b"\r\n":
+        nome, _, valor = linha.decode("latin-1").partition(":")
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    return status, cabecalhos, json.loads(await reader.readexactly(int(cabecalhos["content-length"])))
+
+
+def test_http_respostas_e_erros_nao_derrubam_a_conexao(engine):
+    async def rodar():
+        servico = ServicoFuzzy(engine, timeout=5.0)
+        pronto = asyncio.get_running_loop().create_future()
+        tarefa = asyncio.ensure_future(servico.servir(porta=0, pronto=pronto.set_result))
+        host, porta = (await pronto).removeprefix("http://").split(":")
+        reader, writer = await asyncio.open_connection(host, int(porta))
+        respostas = [await _post(reader, writer, PEDIDO),
+                     await _post(reader, writer, {**PEDIDO, "disease": ["Viral"]}),
+                     await _post(reader, writer, {**PEDIDO, "disease": {"a": 1}}),
+                     await _post(reader, writer, b"{nao e json")]
+
+        avaliar_lote = servico.lotes._avaliar_lote
+        servico.lotes._avaliar_lote = lambda lote: 1 / 0
+        respostas.append(await _post(reader, writer, PEDIDO))
+        servico.lotes._avaliar_lote = avaliar_lote
+        respostas.append(await _post(reader, writer, PEDIDO))
+
+        writer.close()
+        tarefa.cancel()
+        await asyncio.gather(tarefa, return_exceptions=True)
+        return respostas, servico.estatisticas.contagens
+
+    respostas, contagens = asyncio.run(rodar())
+    risco = round(engine.calcular_risco("Viral", 38.7, 7, 89)[0], 4)
+    assert [s for s, _, _ in respostas] == [200, 400, 400, 400, 500, 200]
+    assert respostas[0][2]["id"] == 7 and respostas[0][2]["risco"] == risco
+    assert respostas[1][2] == {"id": 7, "erro": "doença desconhecida"}
+    assert respostas[3][2] == {"id": None, "erro": "JSON inválido"}
+    assert respostas[4][2] == {"erro": "erro interno"}
+    assert respostas[5][2]["risco"] == risco
+    assert contagens["erros"] == 1 and contagens["invalidos"] == 3
@@ -0,0 +1,71 @@
+# tests/test_equivalencia.py
+"""Os caminhos de cálculo do motor devem concordar entre si."""
+import math
+
+import numpy as np
+import pytest
+
+from fuzzy_engine.diagnostico_fuzzy import SEM_REGRAS, TOLERANCIA_LOTE, DiagnosticoFuzzy
+
+_RNG = np.random.default_rng(7)
+ENTRADAS = np.column_stack([_RNG.uniform(35, 41, 300).round(2), _RNG.integers(0, 11, 300),
+                            _RNG.uniform(70, 100, 300).round(1)])
+
+
+@pytest.fixture(scope="module")
+def engine_skfuzzy():
+    return DiagnosticoFuzzy(avaliador="skfuzzy")
+
+
+def _escalar(engine, disease, valores):
+    try:
+        return engine.calcular_risco(disease, *valores)[:2]
+    except ValueError as e:
+        assert str(e) == SEM_REGRAS
+        return math.nan, []
+
+
+@pytest.mark.parametrize("disease", ["Respiratória", "Viral", "Bacteriana"])
+def test_lote_coincide_com_escalar_e_skfuzzy(engine, engine_skfuzzy, disease):
+    riscos, ativ = engine.calcular_risco_lote(disease, *ENTRADAS.T)
+    for valores, risco_lote, ativ_lote in zip(ENTRADAS, riscos, ativ):
+        for motor in (engine, engine_skfuzzy):
+            risco, fired = _escalar(motor, disease, valores)
+            if math.isnan(risco_lote):
+                assert math.isnan(risco), (motor.avaliador, valores)
+                continue
+            assert abs(risco - risco_lote) <= TOLERANCIA_LOTE, (motor.avaliador, valores)
+            assert [i for i, _ in fired] == np.flatnonzero(ativ_lote > 0).tolist()
+            assert [g for _, g in fired] == pytest.approx(ativ_lote[ativ_lote > 0].tolist(), abs=1e-9)
+
+
+def test_calcular_todas_coincide_com_calcular_risco(engine):
+    for valores in ENTRADAS[:100]:
+        todas = engine.calcular_todas(*valores)
+        assert list(todas) == engine.doencas()
+        for disease, (risco, fired) in todas.items():
+            esperado, fired_esperado = _escalar(engine, disease, valores)
+            if math.isnan(esperado):
+                assert risco is None
+            else:
+                assert risco == pytest.approx(esperado, abs=TOLERANCIA_LOTE)
+                assert fired == fired_esperado
+    lote = engine.calcular_todas_lote(*ENTRADAS.T)
+    for disease, (riscos, ativ) in lote.items():
+        esperado, ativ_esperada = engine.calcular_risco_lote(disease, *ENTRADAS.T)
+        np.testing.assert_allclose(riscos, esperado, atol=TOLERANCIA_LOTE)
+        np.testing.assert_array_equal(ativ, ativ_esperada)
+
+
+@pytest.mark.parametrize("modo", ["amostrado", "analitico"])
+def test_indice_de_suporte_nao_muda_o_resultado(modo):
+    engine = DiagnosticoFuzzy(modo=modo)
+    for disease in engine.doencas():
+        compilado = engine.compilados[disease]
+        completo = compilado.com_modo(modo)
+        completo.usar_indice = False
+        for valores in ENTRADAS:
+            risco, ativ = compilado.avaliar_um(valores)
+            risco_completo, ativ_completa = completo.avaliar_um(valores)
+            assert ativ == ativ_completa
+            assert risco == risco_completo or (math.isnan(risco) and math.isnan(risco_completo))
@@ -0,0 +1,63 @@
+# tests/test_fuzzy_plotter.py
+import gc
+import tracemalloc
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from fuzzy_engine.fuzzy_plotter import FuzzyPlotter
+
+DESTAQUES = 1000
+# crescimento aceito entre o aquecimento e o fim (bytes)
+LIMITE_CRESCIMENTO = 256 * 1024
+
+
+def _destacar(plotter, i):
+    return [
+        plotter.plot_febre(highlight_value=35 + (i % 60) * 0.1),
+        plotter.plot_tosse(highlight_value=i % 11),
+        plotter.plot_saturacao(highlight_value=70 + i % 31),
+        plotter.plot_risco(highlight_value=i % 101),
+    ]
+
+
+def _artistas(figs):
+    return [len(f.axes[0].get_children()) for f in figs]
+
+
+def test_destaques_repetidos_nao_acumulam_figuras_nem_memoria(engine):
+    plotter = FuzzyPlotter(engine)
+    figs = _destacar(plotter, 0)
+    # canvas com blit, como o FigureCanvasQTAgg da interface
+    for fig in figs:
+        FigureCanvasAgg(fig).draw()
+    artistas = _artistas(figs)
+    for i in range(100):  # aquecimento (caches do matplotlib)
+        _destacar(plotter, i)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        inicio = tracemalloc.get_traced_memory()[0]
+        for i in range(DESTAQUES):
+            atuais = _destacar(plotter, i)
+        gc.collect()
+        crescimento = tracemalloc.get_traced_memory()[0] - inicio
+    finally:
+        tracemalloc.stop()
+
+    assert all(a is b for a, b in zip(figs, atuais))
+    assert _artistas(atuais) == artistas
+    assert crescimento < LIMITE_CRESCIMENTO, f"memória cresceu {crescimento / 1024:.0f} KiB"
+
+
+def test_varreduras_reutilizam_a_figura(engine):
+    plotter = FuzzyPlotter(engine)
+    figs, artistas = set(), set()
+    for sat in (88, 92, 96):
+        varredura = engine.varrer("Viral", 38.5, 6, sat, febre=np.linspace(36, 41, 21))
+        fig = plotter.plot_varredura(varredura)
+        figs.add(id(fig))
+        artistas.add(len(fig.axes[0].get_children()))
+    assert len(figs) == 1
+    assert len(artistas) == 1
@@ -0,0 +1,84 @@
+# tests/test_main.py
+import pytest
+
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+import main  # noqa: E402
+from utils.history_manager import HistoryManager  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def janela(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "HistoryManager", lambda: HistoryManager(tmp_path / "historico.sqlite3"))
+    for nome in ("information", "warning", "critical"):
+        monkeypatch.setattr(main.QMessageBox, nome, lambda *a, **k: None)
+    win = main.MainWindow()
+    win.engine  # aguarda o motor
+    win._timer_regras.stop()  # as verificações de regras são disparadas pelos testes
+    yield win
+    win.pool_tarefas.waitForDone()
+    if win.preview_window is not None:
+        win.preview_window.close()
+    win.close()
+
+
+def _esperar(win, app):
+    win.pool_tarefas.waitForDone()
+    app.processEvents()
+
+
+def test_calculo_superado_nao_grava_historico(janela, app):
+    aba = janela._tab_historico()  # noqa: F841 (mantém os widgets da aba vivos)
+    janela.combo_disease.setCurrentText("Viral")
+    janela.input_tosse.setText("7")
+    janela.input_sat.setText("89")
+    for feb in ("38,7", "39,5", "37,2"):
+        janela.input_febre.setText(feb)
+        janela.on_calcular()
+        # a tarefa termina, mas o resultado só chega à interface depois do
+        # próximo cálculo, que o supera
+        janela.pool_tarefas.waitForDone()
+    _esperar(janela, app)
+
+    entradas = janela.history.list()
+    assert [e["inputs"]["febre"] for e in entradas] == [37.2]
+    assert janela.modelo_historico.rowCount() == janela.history.count() == 1
+    assert janela.lbl_result.text() == f"Resultado: {entradas[0]['risco']:.2f} %"
+
+
+def test_verificacao_de_regras_roda_fora_da_thread_da_interface(janela, app, monkeypatch):
+    import threading
+
+    threads = []
+    avisos = []
+    monkeypatch.setattr(main.QMessageBox, "warning", lambda *a: avisos.append(a[2]))
+    respostas = iter([ValueError("viral.json: regra inválida"), ValueError("viral.json: regra inválida"),
+                      ["Viral"], []])
+
+    def recarregar():
+        threads.append(threading.current_thread())
+        r = next(respostas)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+    monkeypatch.setattr(janela._engine, "recarregar_regras", recarregar)
+    janela.combo_disease.setCurrentText("Viral")
+    janela.combo_disease.addItem("Obsoleta")
+    for _ in range(4):
+        janela._verificar_regras()
+        janela._verificar_regras()  # ignorada: a anterior ainda não terminou
+        _esperar(janela, app)
+        assert janela._tarefa_regras is None
+
+    assert len(threads) == 4 and threading.main_thread() not in threads
+    assert len(avisos) == 1  # o mesmo erro só é avisado uma vez
+    itens = [janela.combo_disease.itemText(i) for i in range(janela.combo_disease.count())]
+    assert itens == janela.engine.doencas() and janela.combo_disease.currentText() == "Viral"
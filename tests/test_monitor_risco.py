@@ -0,0 +1,129 @@
+# tests/test_monitor_risco.py
+import threading
+
+import pytest
+
+from fuzzy_engine.diagnostico_fuzzy import SEM_REGRAS
+from fuzzy_engine.monitor_risco import MonitorRisco
+
+
+class MotorFalso:
+    """Risco = febre x 10 (R1 sempre, R2 com saturação < 90); registra as chamadas."""
+
+    rulesets = {"Viral": None}
+
+    def __init__(self):
+        self.chamadas = []
+        self.falhar = None
+        self.bloquear = {}  # {febre: (entrou, liberar)}
+
+    def calcular_risco(self, disease, febre, tosse, saturacao):
+        self.chamadas.append((febre, tosse, saturacao))
+        if febre in self.bloquear:
+            entrou, liberar = self.bloquear[febre]
+            entrou.set()
+            assert liberar.wait(5)
+        if self.falhar is not None:
+            erro, self.falhar = self.falhar, None
+            raise erro
+        if febre < 35.5:
+            raise ValueError(SEM_REGRAS)
+        fired = [(0, 0.5)] + ([(1, 0.3)] if saturacao < 90 else [])
+        return febre * 10, fired, None
+
+
+def _monitor(**opcoes):
+    motor = MotorFalso()
+    return motor, MonitorRisco(motor, janela=1, zonas_mortas=(0.1, 0.0, 1.0), passos=None, **opcoes)
+
+
+def test_zona_morta_quantizacao_e_limiar_de_emissao():
+    motor, monitor = _monitor(limiar_risco=2.0)
+    assert monitor.observar("p", "Viral", febre=38.0, saturacao=95) is None  # falta a tosse
+    primeira = monitor.observar("p", "Viral", tosse=5)
+    assert primeira["motivo"] == "inicio" and primeira["risco"] == 380.0
+    # dentro da zona morta: o ponto não muda e o motor não é chamado
+    assert monitor.observar("p", "Viral", febre=38.05, saturacao=95.5) is None
+    assert len(motor.chamadas) == 1
+    # fora da zona morta, mas o risco varia menos que o limiar: avalia e não emite
+    assert monitor.observar("p", "Viral", febre=38.15) is None
+    assert len(motor.chamadas) == 2
+    assert monitor.observar("p", "Viral", febre=38.3)["motivo"] == "risco"
+    # risco igual, conjunto de regras diferente
+    assert monitor.observar("p", "Viral", saturacao=85)["motivo"] == "regras"
+    # nenhuma regra acionada
+    sem = monitor.observar("p", "Viral", febre=35.0)
+    assert (sem["motivo"], sem["risco"], sem["regras"]) == ("risco", None, [])
+
+    est = monitor.estatisticas()
+    assert (est["amostras"], est["avaliacoes"], est["emitidas"]) == (7, 5, 4)
+
+
+def test_ponto_quantizado_repetido_nao_chama_o_motor():
+    motor = MotorFalso()
+    monitor = MonitorRisco(motor, janela=1, zonas_mortas=(0.0, 0.0, 0.0), passos=(0.5, 1, 1))
+    monitor.observar("p", "Viral", febre=38.1, tosse=5, saturacao=95)
+    monitor.observar("p", "Viral", febre=37.9, tosse=5.2, saturacao=95.4)
+    assert motor.chamadas == [(38.0, 5, 95)]
+    monitor.observar("p", "Viral", febre=38.3)
+    assert motor.chamadas[-1] == (38.5, 5, 95)
+
+
+def test_falha_do_motor_nao_congela_o_fluxo():
+    motor, monitor = _monitor()
+    monitor.observar("p", "Viral", febre=38.0, tosse=5, saturacao=95)
+    motor.falhar = RuntimeError("motor indisponível")
+    with pytest.raises(RuntimeError):
+        monitor.observar("p", "Viral", febre=39.0)
+    # a mesma leitura é avaliada de novo, em vez de ficar com o risco antigo
+    atualizacao = monitor.observar("p", "Viral", febre=39.0)
+    assert atualizacao["risco"] == 390.0
+    assert motor.chamadas[-2:] == [(39.0, 5, 95), (39.0, 5, 95)]
+
+
+def test_descarta_o_fluxo_menos_recente():
+    motor, monitor = _monitor(max_fluxos=2)
+    for p in ("a", "b"):
+        monitor.observar(p, "Viral", febre=38.0, tosse=5, saturacao=95)
+    monitor.observar("a", "Viral", febre=38.0)  # "a" passa a ser o mais recente
+    monitor.observar("c", "Viral", febre=38.0, tosse=5, saturacao=95)
+    assert monitor.estatisticas()["descartados"] == 1
+    assert monitor.observar("a", "Viral", febre=38.0) is None  # ainda acompanhado
+    # "b" recomeça do zero: precisa das três entradas de novo
+    assert monitor.observar("b", "Viral", febre=38.0) is None
+    assert monitor.observar("b", "Viral", tosse=5, saturacao=95)["motivo"] == "inicio"
+    with pytest.raises(ValueError):
+        monitor.observar("d", "Inexistente", febre=38.0)
+
+
+def test_pacientes_diferentes_nao_esperam_pela_avaliacao_de_outro():
+    motor, monitor = _monitor()
+    entrou, liberar = threading.Event(), threading.Event()
+    motor.bloquear[40.0] = (entrou, liberar)
+    lento = threading.Thread(target=monitor.observar, args=("a", "Viral"),
+                             kwargs={"febre": 40.0, "tosse": 5, "saturacao": 95})
+    lento.start()
+    try:
+        assert entrou.wait(5)
+        # "a" está dentro do motor; "b" é avaliado e emitido mesmo assim
+        assert monitor.observar("b", "Viral", febre=38.0, tosse=5, saturacao=95)["risco"] == 380.0
+        assert monitor.estatisticas()["fluxos"] == 2
+    finally:
+        liberar.set()
+        lento.join(5)
+    assert monitor.estatisticas()["emitidas"] == 2
+
+
+def test_atualizacoes_gravadas_em_lote_no_historico(tmp_path):
+    from utils.history_manager import HistoryManager
+
+    history = HistoryManager(tmp_path / "historico.sqlite3")
+    motor, monitor = _monitor(history=history, tamanho_lote=2, intervalo_historico=60.0)
+    monitor.observar("a", "Viral", febre=38.0, tosse=5, saturacao=95)
+    assert history.count() == 0
+    monitor.observar("b", "Viral", febre=39.0, tosse=5, saturacao=95)
+    monitor.observar("c", "Viral", febre=35.0, tosse=5, saturacao=95)  # sem regras: não é gravada
+    monitor.observar("d", "Viral", febre=37.0, tosse=5, saturacao=95)
+    assert history.count() == 2
+    assert monitor.descarregar() == 1
+    assert sorted(e["risco"] for e in history.list()) == [370.0, 380.0, 390.0]
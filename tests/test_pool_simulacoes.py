@@ -0,0 +1,32 @@
+# tests/test_pool_simulacoes.py
+import pytest
+
+from fuzzy_engine.diagnostico_fuzzy import SEM_REGRAS, DiagnosticoFuzzy
+from utils.metricas import METRICAS
+
+# a primeira e a última não acionam regras de Respiratória; a do meio aciona
+SEQUENCIA = [(37.1, 8, 98), (39, 9, 75), (37.1, 8, 98)]
+
+
+@pytest.fixture(params=[False, True], ids=["sem_metricas", "com_metricas"])
+def metricas(request):
+    if request.param:
+        METRICAS.ativar()
+    yield request.param
+    METRICAS.desativar()
+    METRICAS.limpar()
+
+
+def test_simulacao_reutilizada_nao_devolve_risco_anterior(metricas):
+    engine = DiagnosticoFuzzy(avaliador="skfuzzy")
+    disease = "Respiratória"
+    with pytest.raises(ValueError, match=SEM_REGRAS):
+        engine.calcular_risco(disease, *SEQUENCIA[0])
+    risco, fired, _ = engine.calcular_risco(disease, *SEQUENCIA[1])
+    assert risco == pytest.approx(89.5)
+    assert fired
+    # mesma entrada da primeira chamada, agora respondida pelo cache do skfuzzy
+    with pytest.raises(ValueError, match=SEM_REGRAS):
+        engine.calcular_risco(disease, *SEQUENCIA[2])
+    # e uma entrada que acionou regras continua igual quando repetida
+    assert engine.calcular_risco(disease, *SEQUENCIA[1])[:2] == (risco, fired)
@@ -0,0 +1,38 @@
+# tests/test_registro_regras.py
+import numpy as np
+import pytest
+
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+
+ENTRADAS = [np.linspace(35, 41, 40), np.linspace(0, 10, 40), np.linspace(100, 70, 40)]
+
+
+def test_lru_descarta_e_recompila_com_o_mesmo_resultado(engine):
+    limitado = DiagnosticoFuzzy(max_conjuntos=1, fixadas=("Viral",))
+    registro = limitado.registro
+    assert registro.compilada("Viral")
+    assert not registro.compilada("Bacteriana")
+
+    for _ in range(2):
+        for disease in engine.doencas():
+            riscos, _ = limitado.calcular_risco_lote(disease, *ENTRADAS)
+            np.testing.assert_array_equal(riscos, engine.calcular_risco_lote(disease, *ENTRADAS)[0])
+            # a fixada nunca sai e no máximo uma outra fica compilada
+            assert registro.compilada("Viral")
+            assert sum(registro.compilada(d) for d in engine.doencas() if d != "Viral") <= 1
+
+    est = registro.estatisticas()
+    assert est["remocoes"] > 0
+    assert est["por_doenca"]["Respiratória"]["compilacoes"] == 2
+    assert est["por_doenca"]["Viral"]["compilacoes"] == 1
+
+
+def test_listar_e_consultar_nao_compila():
+    engine = DiagnosticoFuzzy(max_conjuntos=1)
+    registro = engine.registro
+    assert engine.doencas() == ["Respiratória", "Viral", "Bacteriana"]
+    assert "Viral" in engine.rulesets
+    assert len(engine.rulesets["Viral"]) == 4
+    assert registro.estatisticas()["compiladas"] == 0
+    with pytest.raises(ValueError, match="Doença desconhecida"):
+        engine.calcular_risco("Inexistente", 38, 5, 95)
@@ -0,0 +1,43 @@
+# tests/test_snapshot.py
+import json
+import shutil
+
+import numpy as np
+
+from fuzzy_engine.definicoes import DIR_DEFINICOES
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+from fuzzy_engine.snapshot import carregar_snapshot
+
+ENTRADAS = [np.linspace(35, 41, 50), np.linspace(0, 10, 50), np.linspace(100, 70, 50)]
+
+
+def test_snapshot_reproduz_o_motor_e_acompanha_os_arquivos(tmp_path):
+    regras = tmp_path / "regras"
+    shutil.copytree(DIR_DEFINICOES, regras)
+    snap = tmp_path / "motor.snap"
+    engine = DiagnosticoFuzzy(dir_regras=regras)
+    engine.salvar_snapshot(snap)
+    assert DiagnosticoFuzzy.snapshot_atual(snap, dir_regras=regras)
+    assert not DiagnosticoFuzzy.snapshot_atual(snap, dir_regras=regras, inferencia="sugeno")
+
+    carregado = DiagnosticoFuzzy.de_snapshot(snap, dir_regras=regras)
+    assert carregado.doencas() == engine.doencas()
+    assert carregado.registro.regras("Viral") is None  # veio do arquivo, sem skfuzzy
+    for disease in engine.doencas():
+        esperado, ativ = engine.calcular_risco_lote(disease, *ENTRADAS)
+        riscos, ativ_snap = carregado.calcular_risco_lote(disease, *ENTRADAS)
+        np.testing.assert_array_equal(riscos, esperado)
+        np.testing.assert_array_equal(ativ_snap, ativ)
+
+    # arquivo de regras alterado: o motor é reconstruído e o snapshot regravado
+    viral = regras / "viral.json"
+    spec = json.loads(viral.read_text(encoding="utf-8"))
+    spec["regras"] = spec["regras"][:1]
+    viral.write_text(json.dumps(spec), encoding="utf-8")
+    assert not DiagnosticoFuzzy.snapshot_atual(snap, dir_regras=regras)
+    reconstruido = DiagnosticoFuzzy.de_snapshot(snap, dir_regras=regras)
+    assert reconstruido.registro.regras("Viral") is not None
+    assert reconstruido.compilados["Viral"].mascara.shape[0] == 1
+    assert DiagnosticoFuzzy.snapshot_atual(snap, dir_regras=regras)
+    info, conjuntos = carregar_snapshot(snap)
+    assert {nome: c.mascara.shape[0] for nome, _, _, c in conjuntos}["Viral"] == 1
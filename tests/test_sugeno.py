@@ -0,0 +1,38 @@
+# tests/test_sugeno.py
+import math
+
+import numpy as np
+import pytest
+
+from fuzzy_engine.diagnostico_fuzzy import DiagnosticoFuzzy
+
+_RNG = np.random.default_rng(11)
+ENTRADAS = np.column_stack([_RNG.uniform(35, 41, 200).round(2), _RNG.integers(0, 11, 200),
+                            _RNG.uniform(70, 100, 200).round(1)])
+
+
+@pytest.fixture(scope="module")
+def engine_sugeno():
+    return DiagnosticoFuzzy(inferencia="sugeno")
+
+
+def test_sugeno_e_a_media_ponderada_das_ativacoes_mamdani(engine, engine_sugeno):
+    for disease in engine.doencas():
+        sugeno = engine_sugeno.compilados[disease]
+        riscos, ativ = engine_sugeno.calcular_risco_lote(disease, *ENTRADAS.T)
+        _, ativ_mamdani = engine.calcular_risco_lote(disease, *ENTRADAS.T)
+        np.testing.assert_array_equal(ativ, ativ_mamdani)
+        np.testing.assert_allclose(riscos, engine.compilados[disease].media_sugeno(ativ, sugeno.sugeno),
+                                   rtol=0, atol=1e-9)
+        for valores, risco_lote in zip(ENTRADAS, riscos):
+            risco, _ = sugeno.avaliar_um(valores)
+            assert risco == pytest.approx(risco_lote, abs=1e-9) or (math.isnan(risco) and math.isnan(risco_lote))
+
+
+def test_inferencia_por_doenca(engine, engine_sugeno):
+    misto = DiagnosticoFuzzy(inferencia={"Viral": "sugeno"})
+    lote = misto.calcular_todas_lote(*ENTRADAS.T)
+    for disease, (riscos, _) in lote.items():
+        referencia = engine_sugeno if disease == "Viral" else engine
+        esperado, _ = referencia.calcular_risco_lote(disease, *ENTRADAS.T)
+        np.testing.assert_allclose(riscos, esperado, rtol=0, atol=1e-9)